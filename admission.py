@@ -0,0 +1,136 @@
+"""
+Cost-aware admission control for extraction requests.
+
+Every upload is given a cost (pre-flight page cost plus its size) before
+extraction starts. Work is admitted while the total in-flight cost stays
+within capacity; beyond that, requests wait in a FIFO queue of bounded
+depth, and once the queue is full they are turned away with a Retry-After
+estimate instead of piling onto the CPU.
+"""
+
+import collections
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# One cost unit per megabyte on top of the pre-flight page cost
+BYTES_PER_COST_UNIT = 1024 * 1024
+
+def work_cost(file_size, page_cost=None):
+    """Cost units for a document of `file_size` bytes and pre-flight `page_cost`"""
+    return max(1.0, page_cost or 0.0) + file_size / BYTES_PER_COST_UNIT
+
+class AdmissionRejected(Exception):
+    """The queue is full or the wait timed out; retry after `retry_after` seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bounds in-flight extraction work by cost with a FIFO wait queue"""
+
+    def __init__(self, capacity=50, max_queue=32, max_wait=30):
+        self.capacity = float(capacity)
+        self.max_queue = int(max_queue)
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._queue = collections.deque()
+        self._recent_waits = collections.deque(maxlen=500)
+        self.in_flight = 0
+        self.in_flight_cost = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        # Smoothed seconds of service per cost unit, used for Retry-After
+        self.seconds_per_unit = 1.0
+
+    def _fits(self, cost):
+        # A job larger than capacity may still run, but only on its own
+        return self.in_flight == 0 or self.in_flight_cost + cost <= self.capacity
+
+    def _retry_after(self):
+        queued_cost = sum(cost for _, cost in self._queue)
+        backlog = self.in_flight_cost + queued_cost
+        return max(1, math.ceil(backlog * self.seconds_per_unit / self.capacity))
+
+    def _admit(self, cost):
+        self.in_flight += 1
+        self.in_flight_cost += cost
+        self.admitted += 1
+
+    def acquire(self, cost, priority=False):
+        """Block until `cost` units of work may start; return the wait in seconds.
+
+        `priority` lets cheap, fast-path work start immediately whenever it
+        fits, without queueing behind larger jobs.
+        """
+        start = time.time()
+        with self._cond:
+            if (priority or not self._queue) and self._fits(cost):
+                self._admit(cost)
+                self._recent_waits.append(0.0)
+                return 0.0
+
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected('Server is busy, please retry later.', self._retry_after())
+
+            waiter = (object(), cost)
+            self._queue.append(waiter)
+            deadline = start + self.max_wait
+            try:
+                while not (self._queue[0] is waiter and self._fits(cost)):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        self.timed_out += 1
+                        raise AdmissionRejected('Timed out waiting for capacity.', self._retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                self._queue.remove(waiter)
+                self._cond.notify_all()
+
+            self._admit(cost)
+            waited = time.time() - start
+            self._recent_waits.append(waited)
+            return waited
+
+    def release(self, cost, service_seconds=None):
+        """Mark `cost` units of work as finished"""
+        with self._cond:
+            self.in_flight -= 1
+            self.in_flight_cost = max(0.0, self.in_flight_cost - cost)
+            if service_seconds is not None and cost > 0:
+                self.seconds_per_unit = 0.8 * self.seconds_per_unit + 0.2 * (service_seconds / cost)
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, cost, priority=False):
+        """Context manager around acquire/release that also times the work"""
+        self.acquire(cost, priority=priority)
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.release(cost, time.time() - start)
+
+    def metrics(self):
+        """Snapshot of queue depth, in-flight work and recent wait times"""
+        with self._cond:
+            waits = sorted(self._recent_waits)
+            return {
+                'capacity': self.capacity,
+                'in_flight': self.in_flight,
+                'in_flight_cost': round(self.in_flight_cost, 2),
+                'queue_depth': len(self._queue),
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'wait_seconds_avg': round(sum(waits) / len(waits), 4) if waits else 0.0,
+                'wait_seconds_p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else 0.0,
+                'wait_seconds_max': round(waits[-1], 4) if waits else 0.0
+            }
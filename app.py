@@ -1,4 +1,4 @@
-from flask import Flask, request, render_template, jsonify, send_file, send_from_directory
+from flask import Flask, request, render_template, jsonify, send_file, send_from_directory, g, Response, stream_with_context
 import pdfplumber
 import PyPDF2
 import re
@@ -8,9 +8,35 @@ import os
 import csv
 import time
 import logging
+import uuid
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import get_input_stream
+from werkzeug.exceptions import RequestEntityTooLarge
 from datetime import datetime
 import tempfile
+import sqlite3
+from bisect import bisect_left, bisect_right
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from sandbox import ExtractionSandbox, SandboxError
+from preflight import inspect_pdf, route_document, source_size, open_binary
+from admission import AdmissionController, AdmissionRejected, work_cost
+from streaming_upload import receive_pdf_stream, UploadTooLarge, InvalidUpload
+from prefilter import PageIndex
+from results import ResultSet
+from page_cache import PageCache
+from templates import TemplateStore
+from matcher import PatternMatcher
+from overlaps import overlap_regions, resolve_overlaps
+from parallel_scan import ParallelScanner
+from shm_transport import pack_result, unpack_result
+from store import DocumentStore, file_sha256
+from tracing import Tracer, RingBufferSink, JsonlSink, request_id, span
+from memory import MemoryProbe, MemoryStats
+from explain import DecisionTrace
+from archive import ArchiveReader, InvalidArchive, ZIP_MAGIC
+from compression import negotiate, compress, compress_stream
+from contextlib import nullcontext
 
 # Environment configuration
 ENV = os.environ.get('FLASK_ENV', 'development').lower()
@@ -26,10 +52,96 @@ logger = logging.getLogger(__name__)
 logger.info(f"Starting application in {'PRODUCTION' if IS_PRODUCTION else 'DEVELOPMENT'} mode")
 
 app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_CONTENT_LENGTH'] = int(float(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024)  # 16MB max file size by default
+app.config['UPLOAD_SPOOL_BYTES'] = int(float(os.environ.get('UPLOAD_SPOOL_MB', 8)) * 1024 * 1024)  # Streamed uploads spill to disk past this
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['DEBUG'] = not IS_PRODUCTION
 
+# Per-request extraction budgets (0 disables a limit)
+app.config['EXTRACTION_MAX_SECONDS'] = float(os.environ.get('EXTRACTION_MAX_SECONDS', 60))
+app.config['EXTRACTION_MAX_PAGES'] = int(os.environ.get('EXTRACTION_MAX_PAGES', 500))
+app.config['EXTRACTION_MAX_CHARS'] = int(os.environ.get('EXTRACTION_MAX_CHARS', 5000000))
+
+# Run extraction in supervised child processes with resource limits
+app.config['EXTRACTION_SANDBOX'] = os.environ.get('EXTRACTION_SANDBOX', '').lower() in ('1', 'true', 'yes')
+app.config['SANDBOX_WORKERS'] = int(os.environ.get('SANDBOX_WORKERS', 2))
+app.config['SANDBOX_MEMORY_MB'] = int(os.environ.get('SANDBOX_MEMORY_MB', 1024))
+app.config['SANDBOX_CPU_SECONDS'] = int(os.environ.get('SANDBOX_CPU_SECONDS', 60))
+app.config['SANDBOX_TIMEOUT'] = float(os.environ.get('SANDBOX_TIMEOUT', 90))
+
+# Pre-flight inspection of uploads before full parsing
+app.config['PREFLIGHT_ENABLED'] = os.environ.get('PREFLIGHT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+app.config['PREFLIGHT_MAX_PAGES'] = int(os.environ.get('PREFLIGHT_MAX_PAGES', 2000))
+app.config['PREFLIGHT_FAST_COST'] = float(os.environ.get('PREFLIGHT_FAST_COST', 5))
+app.config['PREFLIGHT_REJECT_IMAGE_ONLY'] = os.environ.get('PREFLIGHT_REJECT_IMAGE_ONLY', 'true').lower() in ('1', 'true', 'yes')
+
+# Skip field scans on pages whose features rule the field out
+app.config['PAGE_PREFILTER'] = os.environ.get('PAGE_PREFILTER', 'true').lower() in ('1', 'true', 'yes')
+
+# Cache page text and field matches by page content (entries per cache)
+app.config['PAGE_CACHE'] = os.environ.get('PAGE_CACHE', 'true').lower() in ('1', 'true', 'yes')
+app.config['PAGE_CACHE_PAGES'] = int(os.environ.get('PAGE_CACHE_PAGES', 5000))
+app.config['PAGE_CACHE_SEGMENTS'] = int(os.environ.get('PAGE_CACHE_SEGMENTS', 5000))
+
+# Learn entity regions per document layout and extract only those regions
+app.config['TEMPLATE_REGIONS'] = os.environ.get('TEMPLATE_REGIONS', '').lower() in ('1', 'true', 'yes')
+app.config['TEMPLATE_MAX'] = int(os.environ.get('TEMPLATE_MAX', 200))
+
+# Regex engine for field patterns ('regex' or 're') and per-search timeout in seconds
+app.config['REGEX_BACKEND'] = os.environ.get('REGEX_BACKEND', 'regex')
+app.config['REGEX_TIMEOUT'] = float(os.environ.get('REGEX_TIMEOUT', 1.0))
+
+# Keep only the best of overlapping matches found by a field's patterns
+app.config['RESOLVE_OVERLAPS'] = os.environ.get('RESOLVE_OVERLAPS', 'true').lower() in ('1', 'true', 'yes')
+
+# Scan fields of long documents in windows across worker processes
+app.config['PARALLEL_SCAN'] = os.environ.get('PARALLEL_SCAN', '').lower() in ('1', 'true', 'yes')
+app.config['PARALLEL_SCAN_WORKERS'] = int(os.environ.get('PARALLEL_SCAN_WORKERS', os.cpu_count() or 2))
+app.config['PARALLEL_SCAN_WINDOW_CHARS'] = int(os.environ.get('PARALLEL_SCAN_WINDOW_CHARS', 100000))
+app.config['PARALLEL_SCAN_MIN_CHARS'] = int(os.environ.get('PARALLEL_SCAN_MIN_CHARS', 200000))
+
+# Pass text and match spans between processes through shared memory above this size
+app.config['SHM_TRANSPORT'] = os.environ.get('SHM_TRANSPORT', 'true').lower() in ('1', 'true', 'yes')
+app.config['SHM_TRANSPORT_MIN_BYTES'] = int(os.environ.get('SHM_TRANSPORT_MIN_BYTES', 4 << 20))
+
+# Read PDFs on disk through mmap instead of buffered file reads
+app.config['MMAP_INPUT'] = os.environ.get('MMAP_INPUT', 'false').lower() in ('1', 'true', 'yes')
+
+# SQLite database that processed documents are stored in for /search (empty disables)
+app.config['DOCUMENT_STORE'] = os.environ.get('DOCUMENT_STORE', '')
+
+# Request tracing: fraction of requests traced (0 disables), traces kept in
+# memory for /traces and an optional JSONL file every trace is appended to
+app.config['TRACE_SAMPLE_RATE'] = float(os.environ.get('TRACE_SAMPLE_RATE', 1.0))
+app.config['TRACE_BUFFER'] = int(os.environ.get('TRACE_BUFFER', 500))
+app.config['TRACE_FILE'] = os.environ.get('TRACE_FILE', '')
+
+# Peak memory per extraction stage: 'tracemalloc', 'rss' or empty to disable
+app.config['MEMORY_ACCOUNTING'] = os.environ.get('MEMORY_ACCOUNTING', '').lower()
+
+# Name decisions kept for an upload with explain=1 (the most recent lines)
+app.config['EXPLAIN_MAX_LINES'] = int(os.environ.get('EXPLAIN_MAX_LINES', 1000))
+
+# Zip archive uploads: compressed size, uncompressed size per PDF member and in
+# total, PDF members per archive, and members extracted concurrently
+app.config['ARCHIVE_MAX_BYTES'] = int(float(os.environ.get('ARCHIVE_MAX_MB', 64)) * 1024 * 1024)
+app.config['ARCHIVE_MEMBER_MAX_BYTES'] = int(float(os.environ.get('ARCHIVE_MEMBER_MAX_MB', 16)) * 1024 * 1024)
+app.config['ARCHIVE_TOTAL_MAX_BYTES'] = int(float(os.environ.get('ARCHIVE_TOTAL_MAX_MB', 256)) * 1024 * 1024)
+app.config['ARCHIVE_MAX_MEMBERS'] = int(os.environ.get('ARCHIVE_MAX_MEMBERS', 500))
+app.config['ARCHIVE_WORKERS'] = int(os.environ.get('ARCHIVE_WORKERS', 2))
+
+# Responses: characters of raw_text returned unless text_limit is given (0 for
+# all), and gzip/deflate negotiated from Accept-Encoding at a minimum size
+app.config['RESPONSE_TEXT_LIMIT'] = int(os.environ.get('RESPONSE_TEXT_LIMIT', 500))
+app.config['RESPONSE_COMPRESSION'] = os.environ.get('RESPONSE_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+app.config['RESPONSE_COMPRESS_MIN_BYTES'] = int(os.environ.get('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+app.config['RESPONSE_COMPRESS_LEVEL'] = int(os.environ.get('RESPONSE_COMPRESS_LEVEL', 6))
+
+# Admission control: in-flight cost capacity, wait queue depth and max wait
+app.config['ADMISSION_CAPACITY'] = float(os.environ.get('ADMISSION_CAPACITY', 50))
+app.config['ADMISSION_MAX_QUEUE'] = int(os.environ.get('ADMISSION_MAX_QUEUE', 32))
+app.config['ADMISSION_MAX_WAIT'] = float(os.environ.get('ADMISSION_MAX_WAIT', 30))
+
 # Create upload directory if it doesn't exist
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
@@ -105,8 +217,75 @@ def serve_static(filename):
     static_dir = os.path.join(os.path.dirname(__file__), 'static')
     return send_from_directory(static_dir, filename)
 
+class ExtractionBudget:
+    """Wall-time, page and character limits for a single extraction.
+
+    The extractor checks the budget between pages and between field passes.
+    Once a limit is hit, `exceeded` names it and `last_page` records the last
+    page whose text made it into the result, so callers can return a partial
+    result instead of nothing. A pattern search that hits REGEX_TIMEOUT marks
+    it 'regex'. With memory accounting on, `memory` carries
+    the peak bytes of each stage back from the process that extracted.
+    """
+
+    def __init__(self, max_seconds=None, max_pages=None, max_chars=None):
+        self.max_seconds = max_seconds or None
+        self.max_pages = max_pages or None
+        self.max_chars = max_chars or None
+        self.start_time = time.time()
+        self.last_page = 0
+        self.exceeded = None
+        self.memory = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a budget from the EXTRACTION_MAX_* settings"""
+        return cls(max_seconds=config.get('EXTRACTION_MAX_SECONDS'),
+                   max_pages=config.get('EXTRACTION_MAX_PAGES'),
+                   max_chars=config.get('EXTRACTION_MAX_CHARS'))
+
+    @property
+    def partial(self):
+        return self.exceeded is not None
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def time_left(self):
+        """Return False (and mark the budget) once the wall time is used up"""
+        if self.exceeded == 'time':
+            return False
+        if self.max_seconds and self.elapsed() >= self.max_seconds:
+            self.exceeded = 'time'
+            return False
+        return True
+
+    def allows_page(self, pages_done):
+        """Check whether another page may be extracted"""
+        if self.exceeded or not self.time_left():
+            return False
+        if self.max_pages and pages_done >= self.max_pages:
+            self.exceeded = 'pages'
+            return False
+        return True
+
+    def clip_text(self, text):
+        """Truncate text to the character budget, marking it if clipped"""
+        if self.max_chars and len(text) > self.max_chars:
+            self.exceeded = self.exceeded or 'chars'
+            return text[:self.max_chars]
+        return text
+
 class PDFDataExtractor:
-    def __init__(self):
+    # Output keys and the pattern type behind each (names use heuristics)
+    FIELDS = {'names': None, 'emails': 'email', 'phones': 'phone', 'addresses': 'address'}
+    # Lines on either side of a page break rescanned for matches that cross it
+    BOUNDARY_LINES = 3
+    
+    def __init__(self, matcher=None, resolve_overlaps=True, mmap_input=False):
+        self.matcher = matcher or PatternMatcher()
+        self.resolve_overlaps = resolve_overlaps
+        self.mmap_input = mmap_input
         # Enhanced regex patterns for better extraction
         self.patterns = {
             'email': [
@@ -128,6 +307,11 @@ class PDFDataExtractor:
             ]
         }
         
+        # Where matches overlap these patterns win over longer ones
+        self.preferred_patterns = {
+            'address': [self.patterns['address'][3]]  # full street, city, state and ZIP
+        }
+        
         # Common name prefixes and suffixes
         self.name_prefixes = {'mr', 'mrs', 'ms', 'dr', 'prof', 'sir', 'madam'}
         self.name_suffixes = {'jr', 'sr', 'ii', 'iii', 'iv', 'phd', 'md', 'esq'}
@@ -139,22 +323,95 @@ class PDFDataExtractor:
             'phone', 'email', 'address', 'linkedin', 'github', 'portfolio', 'website'
         }
     
-    def extract_text_from_pdf(self, pdf_path):
-        """Extract text from PDF using pdfplumber for better accuracy"""
+    def _open_pdf(self, source):
+        with span('pdf.open'):
+            return pdfplumber.open(source)
+    
+    @staticmethod
+    def _release_page(page):
+        """Drop a read page's parsed layout, which pdfplumber keeps until the PDF closes"""
+        page.flush_cache()
+        # The memoized text map holds every char of the page as well
+        get_textmap = getattr(page, 'get_textmap', None)
+        if hasattr(get_textmap, 'cache_clear'):
+            get_textmap.cache_clear()
+    
+    def extract_text_from_pdf(self, pdf_path, budget=None, page_numbers=None, page_index=None, cache=None,
+                              template=None):
+        """Extract text from PDF using pdfplumber for better accuracy
+
+        If an ExtractionBudget is given, pages are read until one of its
+        limits is reached and the text gathered so far is returned.
+        `page_numbers` (1-based) restricts extraction to those pages.
+        `pdf_path` may also be a seekable binary file object; paths are
+        memory-mapped when the extractor has `mmap_input`. A PageIndex
+        passed as `page_index` receives each page's text as it is read.
+        With a PageCache, pages whose content was seen before are not
+        laid out again. With a TemplateSession, pages of a known layout are
+        cropped to the template's regions.
+        """
         text = ""
+        if page_numbers is not None:
+            page_numbers = set(page_numbers)
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
+            with open_binary(pdf_path, mapped=self.mmap_input) as source, self._open_pdf(source) as pdf:
+                pages_read = 0
+                memo = {}
+                if template is not None and pdf.pages:
+                    template.identify(pdf.pages[0])
+                for page_number, page in enumerate(pdf.pages, 1):
+                    if page_numbers is not None and page_number not in page_numbers:
+                        continue
+                    if budget and not budget.allows_page(pages_read):
+                        break
+                    with span('pdf.page', page=page_number) as page_span:
+                        page_text = template.page_text(page, page_number) if template is not None else None
+                        if page_text is None:
+                            key = cache.page_key(page, memo) if cache is not None else None
+                            page_text = cache.texts.get(key) if key else None
+                            page_span.set(cached=page_text is not None)
+                            if page_text is None:
+                                page_text = page.extract_text()
+                                if key:
+                                    cache.texts.put(key, page_text)
+                            if template is not None:
+                                template.record(page, page_number, page_text)
+                        else:
+                            page_span.set(template=True)
+                        page_span.set(chars=len(page_text or ''))
+                    self._release_page(page)
+                    pages_read += 1
+                    page_start = len(text)
                     if page_text:
                         text += page_text + "\n"
+                    if budget:
+                        budget.last_page = page_number
+                        text = budget.clip_text(text)
+                    if page_index is not None:
+                        page_index.add(page_number, text[page_start:])
+                    if budget and budget.partial:
+                        break
         except Exception as e:
             # Fallback to PyPDF2 if pdfplumber fails
             try:
-                with open(pdf_path, 'rb') as file:
+                with open_binary(pdf_path, mapped=self.mmap_input) as file:
                     pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
+                    pages_read = 0
+                    for page_number, page in enumerate(pdf_reader.pages, 1):
+                        if page_numbers is not None and page_number not in page_numbers:
+                            continue
+                        if budget and not budget.allows_page(pages_read):
+                            break
+                        page_start = len(text)
                         text += page.extract_text() + "\n"
+                        pages_read += 1
+                        if budget:
+                            budget.last_page = page_number
+                            text = budget.clip_text(text)
+                        if page_index is not None:
+                            page_index.add(page_number, text[page_start:])
+                        if budget and budget.partial:
+                            break
             except Exception as e2:
                 print(f"Error extracting text: {e2}")
         return text
@@ -194,154 +451,550 @@ class PDFDataExtractor:
             return address
         return None
     
-    def extract_names(self, text):
-        """Extract multiple potential names using enhanced heuristics"""
-        lines = text.split('\n')
+    def extract_names(self, text, limit=None, explain=None):
+        """Extract multiple potential names using enhanced heuristics
+
+        Stops scanning once `limit` names have been found. A DecisionTrace
+        passed as `explain` records the rule that decided each line.
+        """
         potential_names = []
-        
-        # Look for name patterns throughout the document
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line or len(line) < 3:
-                continue
+        for name, _, _ in self.iter_names([(0, text)], explain=explain):
+            if name not in potential_names:
+                potential_names.append(name)
+                if limit and len(potential_names) >= limit:
+                    break
+        return potential_names
+    
+    def iter_names(self, segments, explain=None):
+        """Yield (name, start, end) for every name occurrence, duplicates included
+
+        `segments` is a list of (start offset, text) pieces of the document
+        text; spans are document offsets covering the words of the name.
+        Each non-blank line's decision is recorded into `explain` if given.
+        """
+        for offset, text in segments:
+            line_start = offset
+            
+            # Look for name patterns throughout the document
+            for raw_line in text.split('\n'):
+                line_offset = line_start
+                line_start += len(raw_line) + 1
+                line = raw_line.strip()
+                if not line or len(line) < 3:
+                    if line and explain is not None:
+                        explain.record(line_offset, line, 'too_short')
+                    continue
                 
-            # Skip lines with exclusion words (but allow some context)
-            exclusion_count = sum(1 for exclusion in self.name_exclusions if exclusion in line.lower())
-            if exclusion_count > 1:  # Allow single exclusion words in context
-                continue
+                # Skip lines with exclusion words (but allow some context)
+                exclusion_count = sum(1 for exclusion in self.name_exclusions if exclusion in line.lower())
+                if exclusion_count > 1:  # Allow single exclusion words in context
+                    if explain is not None:
+                        words = sorted(exclusion for exclusion in self.name_exclusions if exclusion in line.lower())
+                        explain.record(line_offset, line, 'exclusions', reason=f"section words: {', '.join(words)}")
+                    continue
                 
-            # Handle lines with emails differently - extract names before email
-            if '@' in line:
-                # Try to extract names from the beginning of the line before the email
-                parts = line.split()
-                potential_name_parts = []
+                # Handle lines with emails differently - extract names before email
+                if '@' in line:
+                    # Try to extract names from the beginning of the line before the email
+                    parts = line.split()
+                    potential_name_parts = []
                 
-                for part in parts:
-                    if '@' in part:  # Stop when we hit the email
-                        break
-                    # Check if this part looks like a name component
-                    clean_part = re.sub(r'[^\w]', '', part)
-                    if (len(clean_part) > 1 and 
-                        clean_part[0].isupper() and 
-                        clean_part[1:].islower() and 
-                        clean_part.isalpha()):
-                        potential_name_parts.append(clean_part)
-                    else:
-                        # Stop at first non-name part (like department)
-                        break
+                    for part in parts:
+                        if '@' in part:  # Stop when we hit the email
+                            break
+                        # Check if this part looks like a name component
+                        clean_part = re.sub(r'[^\w]', '', part)
+                        if (len(clean_part) > 1 and 
+                            clean_part[0].isupper() and 
+                            clean_part[1:].islower() and 
+                            clean_part.isalpha()):
+                            potential_name_parts.append(clean_part)
+                        else:
+                            # Stop at first non-name part (like department)
+                            break
                 
-                # Limit to first 2 parts for proper names (First Last)
-                if len(potential_name_parts) > 2:
-                    potential_name_parts = potential_name_parts[:2]
+                    # Limit to first 2 parts for proper names (First Last)
+                    if len(potential_name_parts) > 2:
+                        potential_name_parts = potential_name_parts[:2]
                 
-                # If we found 2+ name parts, consider it a name
-                if len(potential_name_parts) >= 2:
-                    name = ' '.join(potential_name_parts)
-                    if name not in potential_names and len(name) <= 50:
-                        potential_names.append(name)
-                continue
+                    # If we found 2+ name parts, consider it a name
+                    if len(potential_name_parts) >= 2:
+                        name = ' '.join(potential_name_parts)
+                        if len(name) <= 50:
+                            if explain is not None:
+                                explain.record(line_offset, line, 'email_line', name)
+                            yield (name,) + self._name_span(raw_line, line_offset, name)
+                        elif explain is not None:
+                            explain.record(line_offset, line, 'email_line', reason='name over 50 characters')
+                    elif explain is not None:
+                        explain.record(line_offset, line, 'email_line',
+                                       reason='fewer than 2 capitalized words before the email')
+                    continue
                 
-            # Special handling for tabular data - look for name-like patterns
-            # Handle table rows with multiple fields (Name Department Email Phone Office)
-            if (re.search(r'[A-Z][a-z]+\s+[A-Z][a-z]+\s+\w+\s+[\w@.-]+@[\w.-]+\s+\(\d{3}\)', line) or
-                re.search(r'^[A-Z][a-z]+\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s+[\w@.-]+@', line)):
-                # Extract first two words as potential name
-                parts = line.split()
-                if len(parts) >= 2:
-                    first_word = parts[0].strip()
-                    second_word = parts[1].strip()
+                # Special handling for tabular data - look for name-like patterns
+                # Handle table rows with multiple fields (Name Department Email Phone Office)
+                if (re.search(r'[A-Z][a-z]+\s+[A-Z][a-z]+\s+\w+\s+[\w@.-]+@[\w.-]+\s+\(\d{3}\)', line) or
+                    re.search(r'^[A-Z][a-z]+\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s+[\w@.-]+@', line)):
+                    # Extract first two words as potential name
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        first_word = parts[0].strip()
+                        second_word = parts[1].strip()
                     
-                    # Check if they look like names (capitalized, alphabetic)
-                    if (len(first_word) > 1 and len(second_word) > 1 and
-                        first_word[0].isupper() and first_word[1:].islower() and
-                        second_word[0].isupper() and second_word[1:].islower() and
-                        first_word.isalpha() and second_word.isalpha()):
-                        name = f"{first_word} {second_word}"
-                        if name not in potential_names:
-                            potential_names.append(name)
-                continue
+                        # Check if they look like names (capitalized, alphabetic)
+                        if (len(first_word) > 1 and len(second_word) > 1 and
+                            first_word[0].isupper() and first_word[1:].islower() and
+                            second_word[0].isupper() and second_word[1:].islower() and
+                            first_word.isalpha() and second_word.isalpha()):
+                            name = f"{first_word} {second_word}"
+                            if explain is not None:
+                                explain.record(line_offset, line, 'table_row', name)
+                            yield (name,) + self._name_span(raw_line, line_offset, name)
+                            continue
+                    if explain is not None:
+                        explain.record(line_offset, line, 'table_row', reason='first two words are not capitalized names')
+                    continue
             
-            words = line.split()
+                words = line.split()
             
-            # Look for 2-4 capitalized words that could be names
-            if 2 <= len(words) <= 6:  # Increased range for table data
-                # Check if first few words are properly capitalized names
-                valid_words = []
-                for j, word in enumerate(words[:4]):  # Only check first 4 words
-                    # Remove common punctuation
-                    clean_word = re.sub(r'[^\w]', '', word)
-                    if (len(clean_word) > 1 and 
-                        clean_word[0].isupper() and 
-                        clean_word[1:].islower() and 
-                        clean_word.isalpha()):
-                        valid_words.append(clean_word)
-                    else:
-                        break  # Stop at first non-name word
+                # Look for 2-4 capitalized words that could be names
+                if 2 <= len(words) <= 6:  # Increased range for table data
+                    # Check if first few words are properly capitalized names
+                    valid_words = []
+                    for j, word in enumerate(words[:4]):  # Only check first 4 words
+                        # Remove common punctuation
+                        clean_word = re.sub(r'[^\w]', '', word)
+                        if (len(clean_word) > 1 and 
+                            clean_word[0].isupper() and 
+                            clean_word[1:].islower() and 
+                            clean_word.isalpha()):
+                            valid_words.append(clean_word)
+                        else:
+                            break  # Stop at first non-name word
                 
-                # If we have 2+ valid name words, consider it a potential name
-                if len(valid_words) >= 2:
-                    name = ' '.join(valid_words)
-                    if name not in potential_names and len(name) <= 50:
-                        potential_names.append(name)
-        
-        return potential_names
+                    # If we have 2+ valid name words, consider it a potential name
+                    if len(valid_words) >= 2:
+                        name = ' '.join(valid_words)
+                        if len(name) <= 50:
+                            if explain is not None:
+                                explain.record(line_offset, line, 'capitalized_words', name)
+                            yield (name,) + self._name_span(raw_line, line_offset, name)
+                        elif explain is not None:
+                            explain.record(line_offset, line, 'capitalized_words', reason='name over 50 characters')
+                    elif explain is not None:
+                        explain.record(line_offset, line, 'capitalized_words',
+                                       reason='fewer than 2 leading capitalized words')
+                elif explain is not None:
+                    explain.record(line_offset, line, 'capitalized_words', reason=f'{len(words)} words, not 2 to 6')
     
-    def extract_multiple_values(self, text, field_type):
-        """Extract multiple instances of a field type"""
-        all_matches = []
-        
+    def _name_span(self, raw_line, line_offset, name):
+        """Document span of the leading words of a line that make up `name`"""
+        words = list(re.finditer(r'\S+', raw_line))[:name.count(' ') + 1]
+        return line_offset + words[0].start(), line_offset + words[-1].end()
+    
+    def extract_multiple_values(self, text, field_type, limit=None):
+        """Extract multiple instances of a field type
+
+        Returns distinct values in text order, at most `limit` of them.
+        """
+        cleaned_matches = []
+        for cleaned, _, _ in self.iter_values([(0, text)], field_type):
+            if cleaned not in cleaned_matches:
+                cleaned_matches.append(cleaned)
+                if limit and len(cleaned_matches) >= limit:
+                    break
+        return cleaned_matches
+    
+    def iter_values(self, segments, field_type, on_timeout=None):
+        """Yield (value, start, end) for every valid match, duplicates included
+
+        `segments` is a list of (start offset, text) pieces of the document
+        text; matches never span two of them. Spans are document offsets.
+        The patterns of the field type are run over a segment side by side
+        and its matches are yielded in text order, keeping only the best of
+        any overlapping matches (see overlaps.py). Each region of
+        overlapping matches is yielded once all patterns have moved past it,
+        so a caller with a limit stops scanning soon after its last value.
+        `on_timeout` is called when a pattern search times out and the scan
+        of that pattern ends early.
+        """
         if field_type not in self.patterns:
-            return []
+            return
             
         patterns = self.patterns[field_type]
         if not isinstance(patterns, list):
             patterns = [patterns]
-            
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-            all_matches.extend(matches)
+        preferred = self.preferred_patterns.get(field_type, [])
         
         # Clean and validate matches
-        cleaned_matches = []
-        for match in all_matches:
-            if field_type == 'email':
-                cleaned = self.clean_and_validate_email(match)
-            elif field_type == 'phone':
-                cleaned = self.clean_and_validate_phone(match)
-            elif field_type == 'address':
-                cleaned = self.clean_and_validate_address(match)
-            else:
-                cleaned = match.strip() if match else None
-                
-            if cleaned and cleaned not in cleaned_matches:
-                cleaned_matches.append(cleaned)
+        if field_type == 'email':
+            validate = self.clean_and_validate_email
+        elif field_type == 'phone':
+            validate = self.clean_and_validate_phone
+        elif field_type == 'address':
+            validate = self.clean_and_validate_address
+        else:
+            validate = lambda match: match.strip() or None
         
-        return cleaned_matches
+        for offset, text in segments:
+            streams = [self._candidates(pattern, index, 0 if pattern in preferred else 1, text, on_timeout)
+                       for index, pattern in enumerate(patterns)]
+            for region in overlap_regions(streams):
+                for cleaned, start, end in resolve_overlaps(region, validate, self.resolve_overlaps):
+                    yield cleaned, offset + start, offset + end
     
-    def extract_structured_data(self, text):
-        """Extract structured data from PDF text with multiple instances"""
-        extracted_data = {
-            'names': [],
-            'emails': [],
-            'phones': [],
-            'addresses': []
-        }
+    def _candidates(self, pattern, index, preference, text, on_timeout=None):
+        """Overlap candidates for the matches of one pattern, in text order"""
+        for found in self.matcher.finditer(pattern, text, re.IGNORECASE | re.MULTILINE, on_timeout):
+            # Same value re.findall gives: the group when the pattern has one
+            group = 1 if found.re.groups == 1 else 0
+            match = found.group(group)
+            if match:
+                yield preference, index, found.start(group), found.end(group), match
+    
+    def select_fields(self, fields=None):
+        """Normalize a field selection to output keys in canonical order.
+
+        Accepts None (all fields), a comma-separated string or an iterable of
+        output keys such as 'emails'. Raises ValueError for unknown fields.
+        """
+        if fields is None:
+            return list(self.FIELDS)
+        if isinstance(fields, str):
+            fields = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = set(fields) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. "
+                             f"Choose from: {', '.join(self.FIELDS)}")
+        return [field for field in self.FIELDS if field in fields]
+    
+    def field_limits(self, limits=None):
+        """Normalize per-field limits to a dict of output key -> max matches.
+
+        Accepts None, an int applied to every field, a dict, or a string like
+        '5' or 'emails:5,phones:2'. Raises ValueError for bad values.
+        """
+        if limits is None or limits == '':
+            return {}
+        if isinstance(limits, str):
+            if ':' not in limits:
+                limits = int(limits)
+            else:
+                limits = {field.strip(): int(value) for field, value in
+                          (item.split(':', 1) for item in limits.split(',') if item.strip())}
+        if isinstance(limits, int):
+            limits = {field: limits for field in self.FIELDS}
+        self.select_fields(list(limits))
+        if any(value < 1 for value in limits.values()):
+            raise ValueError('Field limits must be positive')
+        return dict(limits)
+    
+    def extract_structured_data(self, text, budget=None, fields=None, limits=None, page_index=None,
+                                explain=None):
+        """Extract structured data from PDF text with multiple instances
+
+        Returns distinct values per field; see extract_results for the
+        arguments and for where each value was found.
+        """
+        return self.extract_results(text, budget=budget, fields=fields, limits=limits,
+                                    page_index=page_index, explain=explain).to_dict()
+    
+    def extract_results(self, text, budget=None, fields=None, limits=None, page_index=None, cache=None,
+                        scanner=None, explain=None):
+        """Extract every field match from PDF text as a ResultSet
+
+        `fields` selects which output keys to extract (default: all); the
+        extractors for other fields are not run. `limits` caps the number of
+        matches per field (see field_limits). With a budget, field passes
+        that would start after the wall time is used up are skipped and
+        their lists are left empty. With the PageIndex filled in while
+        `text` was extracted, each field only scans the pages that can
+        contain it and matches carry their page numbers. A PageCache
+        memoizes the matches of every scanned page, and a ParallelScanner
+        splits long runs of pages across worker processes; fields
+        with a limit are scanned directly so they can stop early. A
+        DecisionTrace passed as `explain` records each line the name scan
+        decides; names are then scanned directly, bypassing cache and scanner.
+        A pattern search that times out marks the budget exceeded ('regex'),
+        since the matches after it are missing.
+        """
+        fields = self.select_fields(fields)
+        limits = self.field_limits(limits)
+        results = ResultSet(text, fields, pages=page_index.page_starts() if page_index is not None else None)
         
-        # Extract multiple names
-        extracted_data['names'] = self.extract_names(text)
+        def on_timeout():
+            if budget is not None:
+                budget.exceeded = budget.exceeded or 'regex'
         
-        # Extract multiple emails
-        extracted_data['emails'] = self.extract_multiple_values(text, 'email')
+        for field in fields:
+            if budget is not None and not budget.time_left():
+                break
+            segments = [(0, text)] if page_index is None else page_index.segments(field)
+            limit = limits.get(field)
+            if field == 'names' and explain is not None:
+                matches = self.iter_names(segments, explain=explain)
+            elif (cache is not None or scanner is not None) and not limit:
+                page_starts = page_index.page_starts() if page_index is not None else []
+                matches = self._segment_matches(field, segments, cache, scanner, page_starts, on_timeout)
+            else:
+                matches = self.iter_field(field, segments, on_timeout)
+            
+            with span('field', field=field) as field_span:
+                for value, start, end in matches:
+                    if results.add(field, value, start, end) and limit and results.count(field) >= limit:
+                        break
+                field_span.set(values=results.count(field))
+        
+        return results
+    
+    def iter_field(self, field, segments, on_timeout=None):
+        """Yield (value, start, end) for every match of an output field"""
+        if field == 'names':
+            # Names use line heuristics rather than patterns
+            return self.iter_names(segments)
+        return self.iter_values(segments, self.FIELDS[field], on_timeout)
+    
+    def _segment_matches(self, field, segments, cache=None, scanner=None, page_starts=(), on_timeout=None):
+        """Matches for a field over the segments, memoized per page text.
+
+        Each page of a segment is scanned on its own, so a page seen before,
+        such as an unchanged page of an appended document, reuses its
+        matches. Pages missing from the cache are scanned together, by the
+        scanner when they are long enough to split. Matches that cross a
+        page break are then found by rescanning only the lines around each
+        break (see _boundary_matches). Scans cut short by a pattern timeout
+        are not memoized.
+        """
+        starts = [start for start, _ in page_starts]
+        pages = []
+        for offset, text in segments:
+            first, last = bisect_right(starts, offset), bisect_left(starts, offset + len(text))
+            cuts = [offset] + starts[first:last] + [offset + len(text)]
+            pages += [(start, text[start - offset:end - offset]) for start, end in zip(cuts, cuts[1:]) if end > start]
         
-        # Extract multiple phone numbers
-        extracted_data['phones'] = self.extract_multiple_values(text, 'phone')
+        found = [None] * len(pages)
+        keys = [None] * len(pages)
+        if cache is not None:
+            for i, (_, text) in enumerate(pages):
+                keys[i] = cache.text_key(field, text)
+                found[i] = cache.matches.get(keys[i])
         
-        # Extract multiple addresses
-        extracted_data['addresses'] = self.extract_multiple_values(text, 'address')
+        missing = [i for i, matches in enumerate(found) if matches is None]
+        texts = [pages[i][1] for i in missing]
+        timed_out = set()
+        if scanner is not None and scanner.should_split(texts):
+            scanned = scanner.scan(field, texts, on_timeout=lambda: timed_out.update(missing))
+        else:
+            scanned = [list(self.iter_field(field, [(0, text)], lambda i=i: timed_out.add(i)))
+                       for i, text in zip(missing, texts)]
+        for i, matches in zip(missing, scanned):
+            found[i] = matches
+            if cache is not None and i not in timed_out:
+                cache.matches.put(keys[i], matches)
         
-        return extracted_data
+        page_matches = {}
+        for (offset, _), matches in zip(pages, found):
+            page_matches[offset] = [(value, offset + start, offset + end) for value, start, end in matches]
+        for offset, text in segments:
+            first, last = bisect_right(starts, offset), bisect_left(starts, offset + len(text))
+            matches = [match for start in [offset] + starts[first:last] for match in page_matches.get(start, ())]
+            # Names are found line by line, and every page ends a line
+            if field != 'names':
+                for start in starts[first:last]:
+                    crossing = self._boundary_matches(field, text, start - offset, lambda: timed_out.add(None))
+                    for value, match_start, match_end in crossing:
+                        match_start, match_end = offset + match_start, offset + match_end
+                        matches = [match for match in matches if match[2] <= match_start or match[1] >= match_end]
+                        matches.append((value, match_start, match_end))
+                    if crossing:
+                        matches.sort(key=lambda match: match[1])
+            yield from matches
+        if timed_out and on_timeout is not None:
+            on_timeout()
+    
+    def _boundary_matches(self, field, text, boundary, on_timeout=None):
+        """Matches in `text` that cross offset `boundary`, a page start.
+
+        Only BOUNDARY_LINES lines on either side of the break are scanned.
+        Overlaps are resolved within those lines, so a crossing match is
+        returned only if it beats the page's own matches it overlaps.
+        """
+        start = boundary
+        for _ in range(self.BOUNDARY_LINES):
+            start = text.rfind('\n', 0, max(start - 1, 0)) + 1
+        end = boundary
+        for _ in range(self.BOUNDARY_LINES):
+            end = text.find('\n', end) + 1 or len(text)
+        boundary -= start
+        return [(value, start + match_start, start + match_end)
+                for value, match_start, match_end in self.iter_field(field, [(0, text[start:end])], on_timeout)
+                if match_start < boundary < match_end]
 
-extractor = PDFDataExtractor()
+extractor = PDFDataExtractor(PatternMatcher(backend=app.config['REGEX_BACKEND'],
+                                            timeout=app.config['REGEX_TIMEOUT']),
+                             resolve_overlaps=app.config['RESOLVE_OVERLAPS'],
+                             mmap_input=app.config['MMAP_INPUT'])
+
+trace_buffer = RingBufferSink(app.config['TRACE_BUFFER'])
+trace_sinks = [trace_buffer]
+if app.config['TRACE_FILE']:
+    trace_sinks.append(JsonlSink(app.config['TRACE_FILE']))
+tracer = Tracer(trace_sinks, sample_rate=app.config['TRACE_SAMPLE_RATE'])
+
+@app.before_request
+def start_trace():
+    g.request_id = request_id(request.headers.get('X-Request-ID'))
+    rule = request.url_rule.rule if request.url_rule else request.path
+    g.trace = tracer.start(g.request_id, f"{request.method} {rule}")
+
+@app.after_request
+def add_request_id(response):
+    response.headers['X-Request-ID'] = g.get('request_id') or request_id()
+    if g.get('trace') is not None:
+        g.trace.root.set(status=response.status_code)
+    return response
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson')
+
+@app.after_request
+def compress_response(response):
+    """Apply the gzip or deflate encoding the client accepts to text and JSON responses"""
+    if (not app.config['RESPONSE_COMPRESSION'] or response.direct_passthrough or
+            'Content-Encoding' in response.headers or not 200 <= response.status_code < 300 or
+            not (response.mimetype in COMPRESSIBLE_TYPES or response.mimetype.startswith('text/'))):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    level = app.config['RESPONSE_COMPRESS_LEVEL']
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        if response.content_length is not None and response.content_length < app.config['RESPONSE_COMPRESS_MIN_BYTES']:
+            return response
+        with span('compress', encoding=encoding) as compress_span:
+            data = response.get_data()
+            response.set_data(compress(data, encoding, level))
+            compress_span.set(bytes=len(data), compressed_bytes=response.content_length)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.teardown_request
+def finish_trace(exc):
+    trace = g.pop('trace', None)
+    if trace is not None:
+        tracer.finish(trace)
+
+document_store = None
+if app.config['DOCUMENT_STORE']:
+    document_store = DocumentStore(app.config['DOCUMENT_STORE'])
+
+template_store = None
+if app.config['TEMPLATE_REGIONS']:
+    template_store = TemplateStore(max_templates=app.config['TEMPLATE_MAX'])
+
+page_cache = None
+if app.config['PAGE_CACHE']:
+    page_cache = PageCache(max_pages=app.config['PAGE_CACHE_PAGES'],
+                           max_segments=app.config['PAGE_CACHE_SEGMENTS'])
+
+memory_probe = None
+memory_stats = None
+if app.config['MEMORY_ACCOUNTING']:
+    memory_probe = MemoryProbe(app.config['MEMORY_ACCOUNTING'])
+    memory_stats = MemoryStats()
+
+def measure(stage, report):
+    """Record a stage's peak memory into report when accounting is on"""
+    return memory_probe.stage(stage, report) if memory_probe is not None else nullcontext()
+
+shm_min_bytes = app.config['SHM_TRANSPORT_MIN_BYTES'] if app.config['SHM_TRANSPORT'] else None
+
+field_scanner = None
+if app.config['PARALLEL_SCAN']:
+    field_scanner = ParallelScanner(extractor, workers=app.config['PARALLEL_SCAN_WORKERS'],
+                                    window_chars=app.config['PARALLEL_SCAN_WINDOW_CHARS'],
+                                    min_chars=app.config['PARALLEL_SCAN_MIN_CHARS'],
+                                    shm_min_bytes=shm_min_bytes)
+
+def run_extraction(filepath, budget=None, page_numbers=None, fields=None, limits=None, explain=None):
+    """Extract text and a ResultSet of field matches from a PDF on disk
+
+    With template regions enabled, a document of a known layout is first
+    extracted from its template's regions only, and again full page if an
+    expected field is missing; full-page results teach the template.
+    With memory accounting on, the budget's `memory` holds each stage's
+    peak bytes (the larger of both passes) and the pages extracted. A
+    DecisionTrace passed as `explain` holds the name decisions of the pass
+    whose results are returned.
+    """
+    template = template_store.session() if template_store is not None else None
+    memory = {}
+    
+    def extract():
+        page_index = PageIndex(prefilter=app.config['PAGE_PREFILTER'])
+        report = {}
+        if explain is not None:
+            explain.clear()
+        with span('extract.text') as text_span, measure('text', report):
+            text = extractor.extract_text_from_pdf(filepath, budget=budget, page_numbers=page_numbers,
+                                                   page_index=page_index, cache=page_cache, template=template)
+        with span('extract.fields', chars=len(text)) as fields_span, measure('fields', report):
+            results = extractor.extract_results(text, budget=budget, fields=fields, limits=limits,
+                                                page_index=page_index, cache=page_cache, scanner=field_scanner,
+                                                explain=explain)
+        if report:
+            text_span.set(peak_bytes=report['text'])
+            fields_span.set(peak_bytes=report['fields'])
+            for stage, peak in report.items():
+                memory[stage] = max(memory.get(stage, 0), peak)
+            memory['pages'] = len(page_index.pages)
+        logger.debug(f"Page prefilter: {page_index.stats()}")
+        return text, results, page_index
+    
+    text, results, page_index = extract()
+    if template is not None and not (budget and budget.partial):
+        if template.matched and not template.validate(results):
+            logger.info(f"Template {template.key[:12]} missed expected fields, extracting full pages")
+            template.fall_back()
+            text, results, page_index = extract()
+        # Partial results would teach the template incomplete regions
+        if not template.matched and not (budget and budget.partial):
+            template.learn(results, page_index)
+    if memory and budget is not None:
+        budget.memory = dict(memory, mode=memory_probe.mode)
+    return text, results, budget
+
+def run_extraction_shared(filepath, budget=None, page_numbers=None, fields=None, limits=None, explain=None):
+    """run_extraction for sandbox workers; large text and spans return through shared memory.
+
+    The worker fills its own copy of `explain`, so the trace is returned too.
+    """
+    text, results, budget = run_extraction(filepath, budget, page_numbers, fields, limits, explain)
+    return pack_result(text, results, shm_min_bytes), budget, explain
+
+sandbox = None
+if app.config['EXTRACTION_SANDBOX']:
+    sandbox = ExtractionSandbox(
+        run_extraction_shared,
+        workers=app.config['SANDBOX_WORKERS'],
+        memory_mb=app.config['SANDBOX_MEMORY_MB'],
+        cpu_seconds=app.config['SANDBOX_CPU_SECONDS'],
+        timeout=app.config['SANDBOX_TIMEOUT']
+    )
+
+def start_sandbox():
+    """Fork the sandbox workers, if enabled; servers call this before starting their threads"""
+    if sandbox:
+        sandbox.start()
+
+admission = AdmissionController(
+    capacity=app.config['ADMISSION_CAPACITY'],
+    max_queue=app.config['ADMISSION_MAX_QUEUE'],
+    max_wait=app.config['ADMISSION_MAX_WAIT']
+)
 
 @app.route('/')
 def index():
@@ -395,8 +1048,9 @@ def preview_example(filename):
             logger.error(f"Preview file not found: {filepath}")
             return jsonify({'error': 'File not found'}), 404
         
-        # Extract text from PDF for preview
-        text = extractor.extract_text_from_pdf(filepath)
+        # Extract text from PDF for preview (only enough to fill it)
+        budget = ExtractionBudget(max_seconds=app.config['EXTRACTION_MAX_SECONDS'], max_chars=501)
+        text = extractor.extract_text_from_pdf(filepath, budget=budget)
         
         # Limit preview to first 500 characters
         preview_text = text[:500] + '...' if len(text) > 500 else text
@@ -410,12 +1064,161 @@ def preview_example(filename):
         logger.error(f"Error previewing file {filename}: {str(e)}")
         return jsonify({'error': 'Preview not available'}), 500
 
+def process_pdf(source, filename, extra=None):
+    """Run pre-flight, admission and extraction for one PDF and build the response.
+
+    `source` is a path or a seekable binary file object; the caller owns it
+    and cleans it up. See extract_document for `extra` and the request
+    parameters.
+    """
+    result, status = extract_document(source, filename, extra)
+    if status != 200:
+        response = jsonify(result)
+        if 'retry_after' in result:
+            response.headers['Retry-After'] = str(result['retry_after'])
+        return response, status
+    with span('serialize') as serialize_span:
+        body = jsonify(result)
+        serialize_span.set(bytes=body.content_length)
+    return body
+
+def extract_document(source, filename, extra=None, values=None):
+    """Pre-flight, admission and extraction for one PDF, as (result dict, HTTP status).
+
+    `extra` is merged into a successful result. The optional `fields` and
+    `limit` request parameters (query string or form) select which fields
+    to extract and cap the matches per field. `include_text=0` leaves out
+    the raw text and `text_limit` sets how many characters of it are
+    returned (0 for all). With a document store, results are saved unless
+    `store=0` is passed, and with `explain=1` the result includes the name
+    extraction decisions. Threads working for a request pass its
+    parameters as `values`.
+    """
+    if values is None:
+        values = request.values
+    try:
+        fields = extractor.select_fields(values.get('fields') or None)
+        limits = extractor.field_limits(values.get('limit') or None)
+    except ValueError as e:
+        return {'error': f'Invalid field selection: {e}'}, 400
+    include_text = values.get('include_text', '1').lower() not in ('0', 'false', 'no')
+    try:
+        text_limit = int(values.get('text_limit', app.config['RESPONSE_TEXT_LIMIT']))
+        if text_limit < 0:
+            raise ValueError
+    except ValueError:
+        return {'error': 'text_limit must be a non-negative integer'}, 400
+    explain = None
+    if values.get('explain', '').lower() in ('1', 'true', 'yes'):
+        explain = DecisionTrace(max_lines=app.config['EXPLAIN_MAX_LINES'])
+
+    try:
+        start_time = time.time()
+        budget = ExtractionBudget.from_config(app.config)
+        
+        # Pre-flight: reject what we cannot extract and skip pages without text
+        page_numbers = None
+        route = 'queue'
+        cost = work_cost(source_size(source))
+        if app.config['PREFLIGHT_ENABLED']:
+            with span('preflight'):
+                report = inspect_pdf(source, max_pages=app.config['PREFLIGHT_MAX_PAGES'],
+                                     mapped=app.config['MMAP_INPUT'])
+            route, message = route_document(
+                report,
+                max_pages=app.config['PREFLIGHT_MAX_PAGES'],
+                fast_cost=app.config['PREFLIGHT_FAST_COST'],
+                reject_image_only=app.config['PREFLIGHT_REJECT_IMAGE_ONLY']
+            )
+            logger.info(f"Pre-flight for {filename}: route={route}, {report.to_dict()}")
+            if route == 'reject':
+                return {'error': message, 'preflight': report.to_dict()}, 400
+            if report.error is None and report.text_pages:
+                page_numbers = report.text_page_numbers
+                cost = work_cost(report.file_size, report.estimated_cost)
+        
+        # Wait for capacity (fast-path documents skip the queue), then
+        # extract text and structured data, isolated in a child process if enabled.
+        # In a trace, the time in 'admission' before 'extract' is the queue wait.
+        with span('admission', route=route, cost=round(cost, 2)), admission.admit(cost, priority=(route == 'fast')):
+            with span('extract', sandboxed=bool(sandbox)):
+                if sandbox:
+                    packet, budget, explain = sandbox.run(source, budget, page_numbers, fields, limits, explain)
+                    text, results = unpack_result(packet, ResultSet)
+                else:
+                    text, results, budget = run_extraction(source, budget, page_numbers, fields, limits, explain)
+        extracted_data = results.to_dict()
+        
+        # Log extraction metrics
+        processing_time = time.time() - start_time
+        total_fields = sum(len(values) if isinstance(values, list) else 1 for values in extracted_data.values())
+        
+        logger.info(f"PDF processed: {filename}, Fields extracted: {total_fields}, Time: {processing_time:.2f}s")
+        if budget.partial:
+            logger.warning(f"Extraction budget exceeded ({budget.exceeded}) for {filename} after page {budget.last_page}")
+        if budget.memory and memory_stats is not None:
+            pages = budget.memory['pages']
+            peaks = {stage: budget.memory[stage] for stage in ('text', 'fields')}
+            memory_stats.record(peaks, pages)
+            per_page = max(peaks.values()) // pages // 1024 if pages else 0
+            logger.info(f"Peak memory for {filename} ({budget.memory['mode']}): text {peaks['text'] / 2**20:.1f}MB, "
+                        f"fields {peaks['fields'] / 2**20:.1f}MB, {per_page}KB per page over {pages} pages")
+        
+        response = {
+            'success': True,
+            'data': extracted_data,
+            'processing_time': round(processing_time, 2),
+            'total_fields_extracted': total_fields,
+            'partial': budget.partial
+        }
+        if include_text:
+            response['raw_text'] = text[:text_limit] + '...' if text_limit and len(text) > text_limit else text
+        if budget.partial:
+            response['budget_exceeded'] = budget.exceeded
+            response['last_processed_page'] = budget.last_page
+        if values.get('provenance', '').lower() in ('1', 'true', 'yes'):
+            response['provenance'] = results.to_provenance()
+        if explain is not None:
+            response['explain'] = {'names': explain.to_dict(results)}
+        if document_store and values.get('store', '1').lower() not in ('0', 'false', 'no'):
+            # Narrowed results are kept but never stand in for a later full upload
+            complete = not budget.partial and fields == list(extractor.FIELDS) and not limits
+            try:
+                with span('store'):
+                    sha256 = (extra or {}).get('content_sha256') or file_sha256(source)
+                    response['document_id'] = document_store.save(filename, results, sha256=sha256,
+                                                                  partial=not complete)
+            except sqlite3.Error as e:
+                logger.error(f"Could not store {filename}: {e}")
+        if extra:
+            response.update(extra)
+        return response, 200
+        
+    except AdmissionRejected as e:
+        logger.warning(f"Upload rejected by admission control: {e}")
+        return {'error': str(e), 'retry_after': e.retry_after}, 429
+        
+    except SandboxError as e:
+        logger.error(f"Sandboxed extraction failed for {filename}: {e}")
+        return {'error': f'Error processing PDF: {e.reason}', 'reason': e.reason}, 500
+        
+    except Exception as e:
+        return {'error': f'Error processing PDF: {str(e)}'}, 500
+
+@app.errorhandler(413)
+def request_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({'error': f'File size exceeds {limit_mb}MB limit.'}), 413
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    if 'file' not in request.files:
+    with span('upload.receive') as receive_span:
+        files = request.files
+        receive_span.set(bytes=request.content_length)
+    if 'file' not in files:
         return jsonify({'error': 'No file uploaded'}), 400
     
-    file = request.files['file']
+    file = files['file']
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
@@ -423,9 +1226,9 @@ def upload_file():
     if not file.filename.lower().endswith('.pdf'):
         return jsonify({'error': 'Invalid file type. Only PDF files are allowed.'}), 400
     
-    # Check file size (16MB limit)
-    if file.content_length and file.content_length > 16 * 1024 * 1024:
-        return jsonify({'error': 'File size exceeds 16MB limit.'}), 400
+    # Check file size against the configured limit
+    if file.content_length and file.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return request_too_large(None)
     
     # Validate file content by reading first few bytes (PDF magic number)
     file.seek(0)
@@ -442,43 +1245,227 @@ def upload_file():
         if not filename or filename == '.pdf':
             filename = f"upload_{int(time.time())}.pdf"
         
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Unique path so concurrent uploads with the same name do not collide
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
+        with span('upload.save'):
+            file.save(filepath)
         
         try:
-            start_time = time.time()
-            
-            # Extract text from PDF
-            text = extractor.extract_text_from_pdf(filepath)
-            
-            # Extract structured data
-            extracted_data = extractor.extract_structured_data(text)
-            
-            # Log extraction metrics
-            processing_time = time.time() - start_time
-            total_fields = sum(len(values) if isinstance(values, list) else 1 for values in extracted_data.values())
-            
-            logger.info(f"PDF processed: {filename}, Fields extracted: {total_fields}, Time: {processing_time:.2f}s")
-            
+            return process_pdf(filepath, filename)
+        finally:
             # Clean up uploaded file
-            os.remove(filepath)
-            
-            return jsonify({
-                'success': True,
-                'data': extracted_data,
-                'raw_text': text[:500] + '...' if len(text) > 500 else text,
-                'processing_time': round(processing_time, 2),
-                'total_fields_extracted': total_fields
-            })
-            
-        except Exception as e:
-            # Clean up uploaded file on error
             if os.path.exists(filepath):
                 os.remove(filepath)
-            return jsonify({'error': f'Error processing PDF: {str(e)}'}), 500
     
     return jsonify({'error': 'Invalid file type. Please upload a PDF file.'}), 400
 
+@app.route('/upload/stream', methods=['POST'])
+def upload_stream():
+    """Accept a PDF as the raw request body, read in chunks as it arrives.
+
+    The body is hashed and its PDF header checked while streaming, and it is
+    kept in memory until UPLOAD_SPOOL_MB, after which it is spooled to a
+    temporary file. Pass the original name as ?filename=...
+    """
+    filename = secure_filename(request.args.get('filename', ''))
+    if not filename or filename == '.pdf':
+        filename = f"upload_{int(time.time())}.pdf"
+    if not filename.lower().endswith('.pdf'):
+        return jsonify({'error': 'Invalid file type. Only PDF files are allowed.'}), 400
+    
+    try:
+        with span('upload.receive') as receive_span:
+            upload = receive_pdf_stream(
+                request.stream,
+                max_bytes=app.config['MAX_CONTENT_LENGTH'],
+                spool_bytes=app.config['UPLOAD_SPOOL_BYTES'],
+                spool_dir=app.config['UPLOAD_FOLDER']
+            )
+            receive_span.set(bytes=upload.size, spooled=upload.spool_path is not None)
+    except UploadTooLarge:
+        return request_too_large(None)
+    except InvalidUpload as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        return process_pdf(upload.source, filename, extra={'content_sha256': upload.sha256})
+    finally:
+        upload.close()
+
+@app.route('/upload/archive', methods=['POST'])
+def upload_archive():
+    """Accept a zip archive of PDFs as the raw request body and stream back one JSON line per member.
+
+    The archive is received like /upload/stream (in memory, or spooled past
+    UPLOAD_SPOOL_MB) but its members are never written to disk: each PDF is
+    decompressed into memory, within the ARCHIVE_* size limits, and
+    extracted through pre-flight, admission and the sandbox like a single
+    upload, ARCHIVE_WORKERS at a time. Lines follow in completion order and
+    end with a summary. Query string parameters such as ?fields= apply to
+    every member.
+    """
+    limit_mb = app.config['ARCHIVE_MAX_BYTES'] // (1024 * 1024)
+    try:
+        with span('upload.receive') as receive_span:
+            upload = receive_pdf_stream(
+                get_input_stream(request.environ, max_content_length=app.config['ARCHIVE_MAX_BYTES']),
+                max_bytes=app.config['ARCHIVE_MAX_BYTES'],
+                spool_bytes=app.config['UPLOAD_SPOOL_BYTES'],
+                spool_dir=app.config['UPLOAD_FOLDER'],
+                magic=ZIP_MAGIC, suffix='.zip',
+                invalid_message='Invalid archive. Only zip files are accepted.'
+            )
+            receive_span.set(bytes=upload.size, spooled=upload.spool_path is not None)
+    except (UploadTooLarge, RequestEntityTooLarge):
+        return jsonify({'error': f'Archive exceeds {limit_mb}MB limit.'}), 413
+    except InvalidUpload as e:
+        return jsonify({'error': str(e)}), 400
+
+    reader = None
+    try:
+        reader = ArchiveReader(upload.source,
+                               max_member_bytes=app.config['ARCHIVE_MEMBER_MAX_BYTES'],
+                               max_total_bytes=app.config['ARCHIVE_TOTAL_MAX_BYTES'],
+                               max_members=app.config['ARCHIVE_MAX_MEMBERS'])
+        # Parameters come from the query string only: request.values would
+        # parse the body as a form and enforce MAX_CONTENT_LENGTH on it
+        return Response(stream_with_context(stream_archive(reader, upload, request.args.copy())),
+                        mimetype='application/x-ndjson')
+    except InvalidArchive as e:
+        upload.close()
+        return jsonify({'error': str(e)}), 400
+    except BaseException:
+        if reader is not None:
+            reader.close()
+        upload.close()
+        raise
+
+def stream_archive(reader, upload, values):
+    """JSON lines of member results as they finish, then a summary; closes the reader and upload.
+
+    `upload` is None when the archive was not received over HTTP, as from
+    the archive.py command line.
+    """
+    workers = max(1, app.config['ARCHIVE_WORKERS'])
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='archive')
+    counts = {'succeeded': 0, 'failed': 0}
+    start_time = time.time()
+
+    def extract_member(member):
+        filename = secure_filename(os.path.basename(member.name)) or 'member.pdf'
+        try:
+            with span('archive.member', member=member.name, bytes=member.size):
+                result, status = extract_document(member.source, filename,
+                                                  extra={'content_sha256': member.sha256}, values=values)
+        finally:
+            member.source.close()
+        return {'member': member.name, 'status': status, **result}
+
+    def line(result):
+        if 'status' in result:
+            counts['succeeded' if result['status'] == 200 else 'failed'] += 1
+        return json.dumps(result) + '\n'
+
+    pending = set()
+    try:
+        for member in reader:
+            if member.error:
+                yield line({'member': member.name, 'size': member.size, 'skipped': member.error})
+                continue
+            # Each member runs in a copy of this context so its spans join the request's trace
+            pending.add(pool.submit(contextvars.copy_context().run, extract_member, member))
+            # Decompress the next member only once a worker is free for it
+            while len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield line(future.result())
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield line(future.result())
+        summary = dict(reader.stats, **counts, processing_time=round(time.time() - start_time, 2))
+        logger.info(f"Archive processed: {reader.stats['pdfs']} PDFs, {counts['failed']} failed, "
+                    f"{reader.stats['skipped']} skipped, {summary['processing_time']}s")
+        yield json.dumps({'summary': summary}) + '\n'
+    except Exception as e:
+        # The status line has gone out; the error can only be reported in the stream
+        logger.error(f"Archive processing failed: {e}")
+        yield json.dumps({'error': f'Error processing archive: {e}'}) + '\n'
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        reader.close()
+        if upload is not None:
+            upload.close()
+
+@app.route('/search')
+def search():
+    """Find stored documents by entity value or page text.
+
+    ?q= is matched against normalized entity values (exact or prefix) and,
+    term by term, against page text. ?field= restricts entity matches to
+    one field and ?limit= caps each list.
+    """
+    if document_store is None:
+        return jsonify({'error': 'Document store is disabled. Set DOCUMENT_STORE to enable search.'}), 404
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing search query ?q='}), 400
+    try:
+        fields = extractor.select_fields(request.args.get('field') or None)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid field selection: {e}'}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    
+    start = time.perf_counter()
+    try:
+        entities = document_store.search_entities(query, fields, limit)
+        pages = document_store.search_text(query, limit)
+    except sqlite3.Error as e:
+        logger.error(f"Search failed for {query!r}: {e}")
+        return jsonify({'error': 'Search failed'}), 500
+    return jsonify({
+        'query': query,
+        'entities': entities,
+        'pages': pages,
+        'took_ms': round((time.perf_counter() - start) * 1000, 2)
+    })
+
+@app.route('/traces')
+def traces():
+    """Recent traces from the in-memory buffer, newest first.
+
+    Filter with ?name= (e.g. 'POST /upload'), ?min_ms= and ?trace_id=
+    (the X-Request-ID of a response); ?limit= caps the list.
+    """
+    try:
+        min_ms = float(request.args['min_ms']) if 'min_ms' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'min_ms must be a number'}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), app.config['TRACE_BUFFER'])
+    return jsonify({'traces': trace_buffer.query(limit=limit, name=request.args.get('name'),
+                                                 min_duration_ms=min_ms,
+                                                 trace_id=request.args.get('trace_id'))})
+
+@app.route('/metrics')
+def metrics():
+    """Operational metrics for admission control, the sandbox, extraction caches, regex, the store, tracing and memory"""
+    result = {'admission': admission.metrics()}
+    if sandbox:
+        result['sandbox'] = dict(sandbox.stats)
+    if page_cache:
+        result['page_cache'] = page_cache.stats()
+    if template_store:
+        result['templates'] = template_store.metrics()
+    if field_scanner:
+        result['parallel_scan'] = dict(field_scanner.stats)
+    result['regex'] = {'backend': extractor.matcher.backend, 'timeouts': extractor.matcher.timeouts}
+    if document_store:
+        result['store'] = document_store.stats()
+    result['tracing'] = dict(tracer.stats)
+    if memory_stats:
+        result['memory'] = {'mode': memory_probe.mode, 'stages': memory_stats.metrics()}
+    return jsonify(result)
+
 @app.route('/export/json', methods=['POST'])
 def export_json():
     data = request.json
@@ -549,6 +1536,7 @@ if __name__ == '__main__':
         try:
             from waitress import serve
             print(f"Starting production server on port {port}")
+            start_sandbox()
             serve(app, host='0.0.0.0', port=port)
         except ImportError:
             logger.error("Waitress not available for production deployment!")
@@ -557,4 +1545,5 @@ if __name__ == '__main__':
         # Development mode: Use Flask dev server with debug
         logger.info(f"Starting development server on port {port}")
         logger.info("Debug mode enabled - code changes will auto-reload")
+        start_sandbox()
         app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+PDFs out of zip archives, read member by member in memory.
+
+A zip's directory sits at its end, so the archive itself must be seekable:
+an in-memory buffer or the spool file of a large upload. Its members are
+never unpacked to disk. Each PDF member is decompressed a chunk at a time
+into a buffer that the extractor reads directly, and only when the caller
+asks for the next one, so at most one member per extraction in flight is
+held in memory.
+
+Limits guard against zip bombs, checked against the sizes the directory
+declares before a member is opened and again against the bytes actually
+decompressed:
+
+* `max_member_bytes` per PDF; a larger member is reported and skipped;
+* `max_total_bytes` across all members; reading stops once it is used up;
+* `max_members` PDFs per archive; further members are not read.
+
+Nested archives are not expanded, and members that are not PDFs, are
+encrypted or use an unsupported compression method are reported as skipped.
+
+Usage:
+    python archive.py bundle.zip --output results.ndjson
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+PDF_MAGIC = b'%PDF'
+ZIP_MAGIC = b'PK\x03\x04'
+
+class InvalidArchive(Exception):
+    """The upload is not a readable zip archive"""
+
+class ArchiveMember:
+    """One entry of an archive: a PDF ready to extract, or why it was skipped.
+
+    `source` is a BytesIO of the decompressed PDF when `error` is None.
+    """
+
+    def __init__(self, name, size=0, source=None, sha256=None, error=None):
+        self.name = name
+        self.size = size
+        self.source = source
+        self.sha256 = sha256
+        self.error = error
+
+class ArchiveReader:
+    """Iterates the PDF members of a zip archive within size limits"""
+
+    def __init__(self, source, max_member_bytes, max_total_bytes, max_members=500, chunk_size=CHUNK_SIZE):
+        try:
+            self.zip = zipfile.ZipFile(source)
+        except (zipfile.BadZipFile, OSError) as e:
+            raise InvalidArchive(f'Invalid zip archive: {e}')
+        self.max_member_bytes = max_member_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_members = max_members
+        self.chunk_size = chunk_size
+        self.stats = {'members': 0, 'pdfs': 0, 'skipped': 0, 'bytes': 0, 'truncated': None}
+        self.candidates = 0
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __iter__(self):
+        """Yield an ArchiveMember per file entry, in archive order, until a limit stops reading"""
+        for info in self.zip.infolist():
+            if info.is_dir():
+                continue
+            self.stats['members'] += 1
+            member = self._read(info)
+            if member is None:
+                return
+            if member.error:
+                self.stats['skipped'] += 1
+            else:
+                self.stats['pdfs'] += 1
+            yield member
+
+    def _read(self, info):
+        """The member for one entry, or None once an archive-wide limit is reached"""
+        name = info.filename
+        if not name.lower().endswith('.pdf') or name.startswith('__MACOSX/'):
+            return ArchiveMember(name, info.file_size, error='not a PDF')
+        self.candidates += 1
+        if self.max_members and self.candidates > self.max_members:
+            self.stats['truncated'] = f'more than {self.max_members} PDF members'
+            return None
+        if self.max_member_bytes and info.file_size > self.max_member_bytes:
+            return ArchiveMember(name, info.file_size,
+                                 error=f'member exceeds {self.max_member_bytes} bytes uncompressed')
+        if self.max_total_bytes and self.stats['bytes'] + info.file_size > self.max_total_bytes:
+            self.stats['truncated'] = f'archive exceeds {self.max_total_bytes} bytes uncompressed'
+            return None
+
+        # Declared sizes may lie; count what decompression actually produces
+        buffer = io.BytesIO()
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with self.zip.open(info) as member:
+                while True:
+                    chunk = member.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if self.max_member_bytes and size > self.max_member_bytes:
+                        return ArchiveMember(name, size, error=f'member exceeds {self.max_member_bytes} '
+                                                               f'bytes uncompressed')
+                    if self.max_total_bytes and self.stats['bytes'] + size > self.max_total_bytes:
+                        self.stats['truncated'] = f'archive exceeds {self.max_total_bytes} bytes uncompressed'
+                        return None
+                    if size == len(chunk) and not chunk.startswith(PDF_MAGIC):
+                        return ArchiveMember(name, info.file_size, error='not a valid PDF')
+                    digest.update(chunk)
+                    buffer.write(chunk)
+        except (RuntimeError, NotImplementedError, zipfile.BadZipFile, EOFError, ValueError) as e:
+            # Encrypted entries, unsupported compression and corrupt data
+            return ArchiveMember(name, size, error=f'unreadable member: {e}')
+        finally:
+            self.stats['bytes'] += size
+        if not size:
+            return ArchiveMember(name, 0, error='not a valid PDF')
+        buffer.seek(0)
+        return ArchiveMember(name, size, source=buffer, sha256=digest.hexdigest())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('archive', help='zip archive of PDFs')
+    parser.add_argument('--output', help='write one JSON line per member to this file instead of stdout')
+    parser.add_argument('--fields', help='comma-separated fields to extract (default: all)')
+    parser.add_argument('--max-member-mb', type=float, help='default: ARCHIVE_MEMBER_MAX_MB')
+    parser.add_argument('--max-total-mb', type=float, help='default: ARCHIVE_TOTAL_MAX_MB')
+    parser.add_argument('--max-members', type=int, help='default: ARCHIVE_MAX_MEMBERS')
+    args = parser.parse_args()
+
+    # Members go through the same budget, pre-flight and sandbox path as /upload/archive
+    from app import app, extractor, stream_archive
+    try:
+        extractor.select_fields(args.fields)
+    except ValueError as e:
+        parser.error(f'invalid --fields: {e}')
+    max_member_bytes = (int(args.max_member_mb * 1024 * 1024) if args.max_member_mb is not None
+                        else app.config['ARCHIVE_MEMBER_MAX_BYTES'])
+    max_total_bytes = (int(args.max_total_mb * 1024 * 1024) if args.max_total_mb is not None
+                       else app.config['ARCHIVE_TOTAL_MAX_BYTES'])
+    max_members = args.max_members if args.max_members is not None else app.config['ARCHIVE_MAX_MEMBERS']
+    values = {'fields': args.fields or '', 'include_text': '0', 'store': '0'}
+    try:
+        reader = ArchiveReader(args.archive, max_member_bytes=max_member_bytes,
+                               max_total_bytes=max_total_bytes, max_members=max_members)
+    except InvalidArchive as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    last = {}
+    try:
+        for line in stream_archive(reader, None, values):
+            output.write(line)
+            output.flush()
+            last = json.loads(line)
+    finally:
+        if args.output:
+            output.close()
+    if 'summary' not in last:
+        print(last.get('error', 'Archive processing failed'), file=sys.stderr)
+        return 1
+    summary = last['summary']
+    print(f"{summary['succeeded']} PDFs extracted, {summary['failed']} failed, {summary['skipped']} members skipped"
+          + (f", stopped: {summary['truncated']}" if summary['truncated'] else ''), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
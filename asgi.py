@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for production deployment
+
+Request bodies are received and responses are sent on the asyncio event
+loop, so slow uploaders and downloaders only cost a coroutine each. The
+Flask app itself still runs in a thread pool once the whole body has
+arrived (kept in memory, or spooled to a temporary file past
+UPLOAD_SPOOL_MB), so every existing route works unchanged.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app as flask_app, start_sandbox
+
+class AsgiAdapter:
+    """Serve a WSGI app over ASGI with async body I/O and threaded handlers"""
+
+    def __init__(self, wsgi_app, threads=16, spool_bytes=8 * 1024 * 1024, max_body=None, on_startup=None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi-wsgi')
+        self.spool_bytes = spool_bytes
+        self.max_body = max_body
+        self.on_startup = on_startup
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Before the executor has started any handler threads
+                if self.on_startup is not None:
+                    self.on_startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        try:
+            size = 0
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                chunk = message.get('body', b'')
+                size += len(chunk)
+                if self.max_body and size > self.max_body:
+                    await self._send_too_large(send)
+                    return
+                if chunk:
+                    body.write(chunk)
+                more_body = message.get('more_body', False)
+            body.seek(0)
+
+            environ = build_environ(scope, body, size)
+            loop = asyncio.get_running_loop()
+            # The app and its body iterator may run on different executor
+            # threads; one context keeps context variables set by the app,
+            # such as Flask's streamed request context, visible to each step
+            context = contextvars.copy_context()
+            status, headers, chunks, iterable = await loop.run_in_executor(
+                self.executor, context.run, self._start_wsgi, environ)
+
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            try:
+                iterator = iter(chunks)
+                while True:
+                    chunk = await loop.run_in_executor(self.executor, context.run, next, iterator, None)
+                    if chunk is None:
+                        break
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            finally:
+                if hasattr(iterable, 'close'):
+                    await loop.run_in_executor(self.executor, context.run, iterable.close)
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            body.close()
+
+    def _start_wsgi(self, environ):
+        """Call the WSGI app in a worker thread.
+
+        Returns status, headers, the body chunks and the app's own iterable,
+        which must be closed once the body is sent. Chunks passed to write()
+        come before the iterable's.
+        """
+        response = {}
+        written = []
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+            return written.append
+
+        iterable = self.wsgi_app(environ, start_response)
+        chunks = itertools.chain(written, iterable) if written else iterable
+        return response['status'], response['headers'], chunks, iterable
+
+    async def _send_too_large(self, send):
+        limit_mb = self.max_body // (1024 * 1024)
+        payload = json.dumps({'error': f'File size exceeds {limit_mb}MB limit.'}).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': 413, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode('latin-1')),
+            (b'connection', b'close')
+        ]})
+        await send({'type': 'http.response.body', 'body': payload})
+
+def build_environ(scope, body, content_length):
+    """Translate an ASGI HTTP scope into a WSGI environ (PEP 3333)"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(content_length),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            continue
+        else:
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+app = AsgiAdapter(
+    flask_app,
+    threads=int(os.environ.get('ASGI_THREADS', 16)),
+    spool_bytes=flask_app.config['UPLOAD_SPOOL_BYTES'],
+    # The routes enforce their own limits; this only caps the largest of them
+    max_body=max(flask_app.config['MAX_CONTENT_LENGTH'], flask_app.config['ARCHIVE_MAX_BYTES']),
+    on_startup=start_sandbox
+)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
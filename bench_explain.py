@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of name extraction decision traces.
+
+Extracts the text of a long synthetic document once, then times the name
+scan over it (repeated --copies times to reduce noise) with no trace, and
+with a DecisionTrace recording every line. Runs are interleaved and the
+minimum of each is compared. Prints the time per line in both modes and
+exits non-zero if recording adds more than --max-overhead percent.
+
+Usage:
+    python bench_explain.py --pages 300 --copies 10 --repeat 15
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from app import PDFDataExtractor
+from explain import DecisionTrace
+from generate_test_pdfs import create_long_document
+
+def time_scan(extractor, segments, explain=None):
+    start = time.perf_counter()
+    names = sum(1 for _ in extractor.iter_names(segments, explain=explain))
+    return time.perf_counter() - start, names
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--copies', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--max-overhead', type=float, default=50.0, help='percent, with a trace recording')
+    args = parser.parse_args()
+
+    extractor = PDFDataExtractor()
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = create_long_document(os.path.join(work_dir, 'long.pdf'), pages=args.pages)
+        text = extractor.extract_text_from_pdf(path) * args.copies
+    segments = [(0, text)]
+    lines = text.count('\n')
+
+    timings = {'off': [], 'recording': []}
+    for _ in range(args.repeat):
+        elapsed, names = time_scan(extractor, segments)
+        timings['off'].append(elapsed)
+        trace = DecisionTrace()
+        elapsed, traced_names = time_scan(extractor, segments, trace)
+        timings['recording'].append(elapsed)
+        assert traced_names == names, "a trace changed the names found"
+
+    off, recording = min(timings['off']), min(timings['recording'])
+    overhead = (recording - off) / off * 100
+    print(f"{lines:,} lines, {names:,} names, {trace.recorded:,} decisions recorded "
+          f"({len(trace.lines):,} kept)")
+    print(f"no trace:  {off * 1000:>8.1f} ms ({off / lines * 1e9:,.0f} ns per line)")
+    print(f"recording: {recording * 1000:>8.1f} ms ({recording / lines * 1e9:,.0f} ns per line), "
+          f"overhead {overhead:+.1f}%")
+    if overhead > args.max_overhead:
+        print(f"FAIL: recording adds more than {args.max_overhead}%")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: peak memory per page of text extraction and field scans.
+
+Extracts each document of a synthetic corpus (the example PDFs plus long
+generated documents) in a fresh forked process, with memory accounting
+around extract_text_from_pdf and the field scans as in the app, and prints
+each stage's peak bytes in total and per page. The long documents also give
+the marginal cost of one more page, which is what container sizing needs
+for large uploads.
+
+Exits non-zero if the marginal cost of a page exceeds --max-marginal-kb
+(memory that grows with the document, such as parsed pages kept alive until
+the PDF closes), if any document's peak per page, in either stage, exceeds
+--max-kb-per-page, or if it exceeds the same document's figure in a --baseline
+file (written with --save-baseline) by more than --tolerance percent.
+tracemalloc, the default mode, counts Python allocations only and repeats
+to within a few percent, so it is the mode to gate on; rss includes the
+interpreter's own overhead and varies more between runs.
+
+Usage:
+    python bench_memory.py --pages 30 120 --save-baseline memory_baseline.json
+    python bench_memory.py --pages 30 120 --baseline memory_baseline.json
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import app as app_module
+from memory import MODES, MemoryProbe
+from generate_test_pdfs import create_long_document
+
+STAGES = ('text', 'fields')
+
+def measure_document(path, mode):
+    """Peak bytes per stage and pages extracted; runs in a fresh worker"""
+    app_module.memory_probe = MemoryProbe(mode)
+    _, _, budget = app_module.run_extraction(path, app_module.ExtractionBudget())
+    return budget.memory
+
+def measure(path, mode):
+    with multiprocessing.get_context('fork').Pool(1) as pool:
+        return pool.apply(measure_document, (path, mode))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pdf-dir', default='test_pdfs')
+    parser.add_argument('--pages', type=int, nargs='*', default=[30, 120],
+                        help='page counts of the synthetic long documents')
+    parser.add_argument('--mode', choices=MODES, default='tracemalloc')
+    parser.add_argument('--max-kb-per-page', type=float, default=4096)
+    parser.add_argument('--max-marginal-kb', type=float, default=64)
+    parser.add_argument('--baseline', help='JSON file of per-page peaks to compare against')
+    parser.add_argument('--save-baseline', help='write this run\'s per-page peaks to a JSON file')
+    parser.add_argument('--tolerance', type=float, default=15.0, help='percent')
+    args = parser.parse_args()
+
+    # Caches and templates carry state between documents; measure cold extractions
+    app_module.page_cache = None
+    app_module.template_store = None
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus = sorted(glob.glob(os.path.join(args.pdf_dir, '*.pdf')))
+        for pages in args.pages:
+            corpus.append(create_long_document(os.path.join(work_dir, f'long_{pages}.pdf'), pages=pages))
+
+        print(f"Mode: {args.mode}")
+        print(f"{'document':<32} {'pages':>5} {'text KB':>9} {'fields KB':>9} "
+              f"{'text KB/page':>12} {'fields KB/page':>14}")
+        for path in corpus:
+            memory = measure(path, args.mode)
+            pages = max(memory['pages'], 1)
+            name = os.path.basename(path)
+            results[name] = {'pages': memory['pages'],
+                             **{stage: memory[stage] for stage in STAGES},
+                             **{f'{stage}_per_page': memory[stage] // pages for stage in STAGES}}
+            print(f"{name:<32} {memory['pages']:>5} {memory['text'] / 1024:>9.0f} {memory['fields'] / 1024:>9.0f} "
+                  f"{memory['text'] / pages / 1024:>12.1f} {memory['fields'] / pages / 1024:>14.1f}")
+
+    failures = []
+    long_runs = sorted((result['pages'], result) for name, result in results.items() if name.startswith('long_'))
+    if len(long_runs) >= 2:
+        (p1, r1), (p2, r2) = long_runs[0], long_runs[-1]
+        marginal = {stage: (r2[stage] - r1[stage]) / (p2 - p1) / 1024 for stage in STAGES}
+        print(f"\nMarginal cost per page ({p1} to {p2} pages): "
+              + ', '.join(f"{stage} {kb:.1f}KB" for stage, kb in marginal.items()))
+        for stage, kb in marginal.items():
+            if kb > args.max_marginal_kb:
+                failures.append(f"{stage}: each page adds {kb:.1f}KB, more than {args.max_marginal_kb:.0f}KB")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump({'mode': args.mode, 'documents': results}, file, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    limit = args.max_kb_per_page * 1024
+    for name, result in results.items():
+        for stage in STAGES:
+            if result[f'{stage}_per_page'] > limit:
+                failures.append(f"{name} {stage}: {result[f'{stage}_per_page'] / 1024:.1f}KB per page "
+                                f"exceeds {args.max_kb_per_page:.0f}KB")
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline['mode'] != args.mode:
+            print(f"FAIL: baseline was measured with {baseline['mode']}, not {args.mode}")
+            return 1
+        for name, result in results.items():
+            before = baseline['documents'].get(name)
+            if before is None or before['pages'] != result['pages']:
+                continue
+            for stage in STAGES:
+                allowed = before[f'{stage}_per_page'] * (1 + args.tolerance / 100)
+                if result[f'{stage}_per_page'] > allowed:
+                    failures.append(f"{name} {stage}: {result[f'{stage}_per_page'] / 1024:.1f}KB per page, "
+                                    f"baseline {before[f'{stage}_per_page'] / 1024:.1f}KB "
+                                    f"(+{args.tolerance:.0f}% allowed)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
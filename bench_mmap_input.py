@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory-mapped vs regular reads of on-disk PDFs.
+
+Generates long text documents, plus documents whose pages each carry a
+--image-kb image of noise like a scan, then starts --workers forked processes that each
+extract every file, as example and batch workers on one host would. Each
+run is done once reading files normally and once through mmap, with the
+pre-flight pass only (PyPDF2, mostly raw reads) and with full pdfplumber
+extraction. Reports throughput and, per worker, peak RSS plus the
+anonymous (private) and file-backed (shared page cache) parts of RSS at
+the end of the run. Exits non-zero if the two modes extract different text.
+
+Usage:
+    python bench_mmap_input.py --pages 50 200 --image-pages 40 --image-kb 1024 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from app import PDFDataExtractor
+from preflight import inspect_pdf
+from generate_test_pdfs import create_long_document
+
+def create_image_document(filename, pages, image_kb):
+    """Document whose pages each carry a line of text over an incompressible image"""
+    side = max(1, int((image_kb * 1024 / 3) ** 0.5))
+    pdf = canvas.Canvas(filename, pagesize=letter)
+    for page in range(1, pages + 1):
+        image = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+        pdf.drawImage(ImageReader(image), 36, 100, width=540, height=540)
+        pdf.drawString(72, 720, f"Scanned page {page}: contact{page}@example.com (555) 200-{page:04d}")
+        pdf.showPage()
+    pdf.save()
+    return filename
+
+def memory_kb():
+    """(peak RSS, RssAnon, RssFile) of this process in KB"""
+    values = {}
+    with open('/proc/self/status') as status:
+        for line in status:
+            key, _, value = line.partition(':')
+            if key in ('VmHWM', 'RssAnon', 'RssFile'):
+                values[key] = int(value.split()[0])
+    return values.get('VmHWM', 0), values.get('RssAnon', 0), values.get('RssFile', 0)
+
+def work(paths, mode, mapped, repeat):
+    extractor = PDFDataExtractor(mmap_input=mapped)
+    output = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        output = []
+        for path in paths:
+            if mode == 'preflight':
+                output.append(inspect_pdf(path, mapped=mapped).page_count)
+            else:
+                output.append(extractor.extract_text_from_pdf(path))
+    return time.perf_counter() - start, memory_kb(), output
+
+def run(paths, mode, mapped, workers, repeat):
+    ctx = multiprocessing.get_context('fork')
+    with ctx.Pool(workers, maxtasksperchild=1) as pool:
+        start = time.perf_counter()
+        results = pool.starmap(work, [(paths, mode, mapped, repeat)] * workers)
+        elapsed = time.perf_counter() - start
+    return elapsed, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pages', type=int, nargs='*', default=[50, 200])
+    parser.add_argument('--image-pages', type=int, default=20)
+    parser.add_argument('--image-kb', type=int, default=1024)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3, help='passes over the files per worker')
+    args = parser.parse_args()
+    if not os.path.exists('/proc/self/status'):
+        print("SKIP: needs /proc for RSS")
+        return 0
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = [create_long_document(os.path.join(work_dir, f'long_{pages}.pdf'), pages=pages)
+                 for pages in args.pages]
+        if args.image_pages:
+            paths.append(create_image_document(os.path.join(work_dir, 'scanned.pdf'),
+                                               args.image_pages, args.image_kb))
+        page_count = sum(args.pages) + args.image_pages
+        total_pages = page_count * args.repeat * args.workers
+        total_mb = sum(os.path.getsize(path) for path in paths) * args.repeat * args.workers / (1 << 20)
+
+        print(f"CPUs: {os.cpu_count()}, workers: {args.workers}, files: {len(paths)} "
+              f"({page_count} pages, {total_mb / args.repeat / args.workers:.1f} MB)")
+        print(f"{'mode':<10} {'input':<6} {'s':>7} {'pages/s':>8} {'MB/s':>7} "
+              f"{'peak RSS':>9} {'anon':>8} {'file':>8}  (MB per worker)")
+        mismatches = 0
+        for mode in ('preflight', 'extract'):
+            expected = None
+            for mapped in (False, True):
+                elapsed, results = run(paths, mode, mapped, args.workers, args.repeat)
+                peak = max(memory[0] for _, memory, _ in results) / 1024
+                anon = max(memory[1] for _, memory, _ in results) / 1024
+                file_backed = max(memory[2] for _, memory, _ in results) / 1024
+                output = results[0][2]
+                expected = output if expected is None else expected
+                mismatches += output != expected
+                print(f"{mode:<10} {'mmap' if mapped else 'read':<6} {elapsed:>7.2f} "
+                      f"{total_pages / elapsed:>8.1f} {total_mb / elapsed:>7.1f} "
+                      f"{peak:>9.1f} {anon:>8.1f} {file_backed:>8.1f}"
+                      + ('' if output == expected else '  MISMATCH'))
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
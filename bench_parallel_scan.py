@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial vs parallel field scanning on very long documents.
+
+Extracts a long synthetic document once, then repeats its pages (with the
+city renamed per copy so values stay distinct) until the text has the
+requested number of pages. Times extract_results serially and with a
+ParallelScanner at each worker count, with and without the page prefilter,
+and checks that every run returns the same matches.
+
+Usage:
+    python bench_parallel_scan.py --pages 500 3000 --workers 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from app import PDFDataExtractor
+from prefilter import PageIndex
+from parallel_scan import ParallelScanner
+from generate_test_pdfs import create_long_document
+
+def build_text(source, pages, prefilter):
+    index = PageIndex(prefilter=prefilter)
+    text = ''
+    for page_number in range(1, pages + 1):
+        page = source.pages[(page_number - 1) % len(source.pages)]
+        copy = (page_number - 1) // len(source.pages)
+        start = len(text)
+        text += page.text.replace('Springfield', f'Springfield{copy}')
+        index.add(page_number, text[start:])
+    return text, index
+
+def time_scan(extractor, text, index, scanner):
+    start = time.perf_counter()
+    results = extractor.extract_results(text, page_index=index, scanner=scanner)
+    return time.perf_counter() - start, results.to_provenance()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pages', type=int, nargs='*', default=[500, 3000])
+    parser.add_argument('--workers', type=int, nargs='*', default=[2, 4])
+    parser.add_argument('--window-chars', type=int, default=100000)
+    args = parser.parse_args()
+
+    extractor = PDFDataExtractor()
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = PageIndex()
+        extractor.extract_text_from_pdf(create_long_document(os.path.join(work_dir, 'long.pdf'), pages=60),
+                                        page_index=source)
+
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'pages':>6} {'chars':>10} {'prefilter':>9} {'workers':>7} {'ms':>9} {'speedup':>7} {'same':>5}")
+    mismatches = 0
+    for pages in args.pages:
+        for prefilter in (False, True):
+            text, index = build_text(source, pages, prefilter)
+            serial, expected = time_scan(extractor, text, index, None)
+            print(f"{pages:>6} {len(text):>10,} {str(prefilter):>9} {'serial':>7} {serial * 1000:>9.1f}")
+            for workers in args.workers:
+                scanner = ParallelScanner(extractor, workers=workers, window_chars=args.window_chars, min_chars=0)
+                try:
+                    time_scan(extractor, text, index, scanner)  # start the pool
+                    elapsed, found = time_scan(extractor, text, index, scanner)
+                finally:
+                    scanner.shutdown()
+                same = found == expected
+                mismatches += not same
+                print(f"{pages:>6} {len(text):>10,} {str(prefilter):>9} {workers:>7} {elapsed * 1000:>9.1f} "
+                      f"{serial / elapsed:>6.2f}x {str(same):>5}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: field scans with and without the per-page prefilter.
+
+Builds a mixed corpus (the example PDFs plus long documents where every
+third page is contact-free boilerplate), extracts each document's text once
+while filling a PageIndex, then times extract_structured_data over the full
+text and over the prefiltered pages. Prints skip rates per field and the
+time saved, next to what building the index costs.
+
+Usage:
+    python bench_prefilter.py --pages 60 300 --repeat 20
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+from app import PDFDataExtractor
+from prefilter import PageIndex
+from generate_test_pdfs import create_long_document
+
+def time_scan(extractor, text, page_index, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        data = extractor.extract_structured_data(text, page_index=page_index)
+    return (time.perf_counter() - start) / repeat, data
+
+def time_index(page_index, repeat):
+    """Time rebuilding the index from the same page texts"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rebuilt = PageIndex()
+        for page in page_index.pages:
+            rebuilt.add(page.page_number, page.text)
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pdf-dir', default='test_pdfs')
+    parser.add_argument('--pages', type=int, nargs='*', default=[60, 300],
+                        help='page counts of the synthetic long documents')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    extractor = PDFDataExtractor()
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus = sorted(glob.glob(os.path.join(args.pdf_dir, '*.pdf')))
+        for pages in args.pages:
+            corpus.append(create_long_document(os.path.join(work_dir, f'long_{pages}.pdf'), pages=pages))
+
+        totals = {'pages': 0, 'full': 0.0, 'prefiltered': 0.0, 'index': 0.0, 'skipped': {}}
+        print(f"{'document':<32} {'pages':>5} {'full ms':>8} {'filtered ms':>11} {'index ms':>8} "
+              f"{'skipped (n/e/p/a)':>18}")
+        for path in corpus:
+            page_index = PageIndex()
+            text = extractor.extract_text_from_pdf(path, page_index=page_index)
+            full, _ = time_scan(extractor, text, None, args.repeat)
+            filtered, _ = time_scan(extractor, text, page_index, args.repeat)
+            index = time_index(page_index, args.repeat)
+
+            stats = page_index.stats()
+            skipped = '/'.join(str(stats[field]['skipped']) for field in extractor.FIELDS)
+            print(f"{os.path.basename(path):<32} {len(page_index.pages):>5} {full * 1000:>8.2f} "
+                  f"{filtered * 1000:>11.2f} {index * 1000:>8.2f} {skipped:>18}")
+
+            totals['pages'] += len(page_index.pages)
+            totals['full'] += full
+            totals['prefiltered'] += filtered
+            totals['index'] += index
+            for field, values in stats.items():
+                totals['skipped'][field] = totals['skipped'].get(field, 0) + values['skipped']
+
+    print()
+    print(f"Corpus: {len(corpus)} documents, {totals['pages']} pages")
+    for field, skipped in totals['skipped'].items():
+        print(f"  {field:<10} skipped {skipped:>5} pages ({skipped / totals['pages']:.1%})")
+    saved = totals['full'] - totals['prefiltered']
+    print(f"Field scan time: {totals['full'] * 1000:.1f}ms full, {totals['prefiltered'] * 1000:.1f}ms "
+          f"prefiltered, saved {saved * 1000:.1f}ms ({saved / totals['full']:.1%})")
+    print(f"Index build time: {totals['index'] * 1000:.1f}ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
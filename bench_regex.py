@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: field pattern scans on adversarial text, re vs the regex backend.
+
+Each input is built to make the original patterns backtrack: long runs of
+numbers and spaces for the address patterns, local-part runs without a
+usable domain for the email patterns, and so on. Every field pattern is run
+over each input at growing sizes, once with the standard library engine and
+once with the rewritten patterns on the regex backend. Prints scan time,
+time per KB and the growth exponent between sizes (1.0 is linear, 2.0
+quadratic), and exits non-zero if the regex backend grows faster than
+--max-exponent on any input.
+
+The re engine is only run up to --re-max-chars, since it is quadratic.
+
+Usage:
+    python bench_regex.py --sizes 2000 8000 32000 128000 512000
+"""
+
+import argparse
+import math
+import re
+import sys
+import time
+
+from app import PDFDataExtractor
+from matcher import PatternMatcher
+
+ADVERSARIAL = {
+    'numbers_spaces': lambda n: '1 ' * (n // 2),
+    'numbers_words': lambda n: '12 ab, ' * (n // 7),
+    'long_number': lambda n: '1' * n,
+    'spaced_number': lambda n: '1' + ' ' * (n - 2) + 'a',
+    'dotted_local': lambda n: 'a.' * (n // 2) + '@',
+    'local_run': lambda n: 'a' * (n - 3) + '@b.',
+    'at_signs': lambda n: 'a@' * (n // 2),
+    'digit_groups': lambda n: '555 ' * (n // 4),
+}
+
+def scan_time(matcher, patterns, text):
+    start = time.perf_counter()
+    for pattern in patterns:
+        for _ in matcher.finditer(pattern, text, re.IGNORECASE | re.MULTILINE):
+            pass
+    return time.perf_counter() - start
+
+def exponent(sizes, times):
+    """Growth exponent between the two largest sizes that took measurable time"""
+    points = [(n, t) for n, t in zip(sizes, times) if t is not None and t > 0.0005]
+    if len(points) < 2:
+        return None
+    (n1, t1), (n2, t2) = points[-2], points[-1]
+    return math.log(t2 / t1) / math.log(n2 / n1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='*', default=[2000, 8000, 32000, 128000])
+    parser.add_argument('--re-max-chars', type=int, default=8000)
+    parser.add_argument('--max-exponent', type=float, default=1.3)
+    args = parser.parse_args()
+
+    patterns = [pattern for patterns in PDFDataExtractor().patterns.values() for pattern in patterns]
+    engines = {'re': PatternMatcher(backend='re'), 'regex': PatternMatcher(backend='regex', timeout=None)}
+
+    print(f"{'input':<16} {'engine':<6} " + ''.join(f"{n:>11,}" for n in args.sizes) +
+          f" {'us/KB':>8} {'growth':>7}")
+    failures = []
+    for name, build in ADVERSARIAL.items():
+        for engine, matcher in engines.items():
+            times = []
+            for n in args.sizes:
+                if engine == 're' and n > args.re_max_chars:
+                    times.append(None)
+                    continue
+                times.append(scan_time(matcher, patterns, build(n)))
+
+            measured = [(n, t) for n, t in zip(args.sizes, times) if t is not None]
+            per_kb = measured[-1][1] / (measured[-1][0] / 1000) * 1e6
+            growth = exponent(args.sizes, times)
+            cells = ''.join(f"{'-':>11}" if t is None else f"{t * 1000:>9.1f}ms" for t in times)
+            growth_text = '-' if growth is None else f"{growth:.2f}"
+            print(f"{name:<16} {engine:<6} {cells} {per_kb:>8.1f} {growth_text:>7}")
+            if engine == 'regex' and growth is not None and growth > args.max_exponent:
+                failures.append(name)
+
+    print()
+    if failures:
+        print(f"FAIL: regex backend grows faster than n^{args.max_exponent} on: {', '.join(failures)}")
+        return 1
+    print(f"regex backend scan time grows at most n^{args.max_exponent} on every input")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
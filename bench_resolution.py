@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark: contact resolution time and accuracy up to a million entities.
+
+Generates mentions of synthetic people the way resumes and business cards
+show them: names with and without middle initials or suffixes, emails in
+varying case, phone numbers in several formats with and without a country
+code, and street suffixes spelled out or abbreviated. Common first and last
+names collide across people, and some mentions carry a company switchboard
+number shared by many people. Each mention is one record in its own
+document.
+
+For each entity count the blocking resolver is timed and scored against
+the true people with pairwise precision and recall. Below
+--naive-max-entities the same merge rule is also run over every pair of
+records for comparison. Prints time, entities per second and the growth
+exponent between sizes, and exits non-zero if resolution grows faster than
+--max-exponent.
+
+Usage:
+    python bench_resolution.py --entities 10000 100000 1000000
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections import Counter
+
+from resolution import ContactResolver, address_key, email_key, name_key, phone_key
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'William', 'Barbara', 'Carla', 'Derek', 'Elena', 'Frank', 'Grace', 'Henry']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Walker',
+              'Turner', 'Nguyen', 'Foster', 'Murphy', 'Reyes', 'Coleman', 'Price', 'Patel', 'Kim']
+STREETS = [('Oak', 'Street', 'St'), ('Pine', 'Avenue', 'Ave'), ('Maple', 'Drive', 'Dr'),
+           ('Cedar', 'Lane', 'Ln'), ('Elm', 'Road', 'Rd'), ('Lake', 'Boulevard', 'Blvd')]
+SWITCHBOARDS = ['(555) 010-0000', '(555) 010-1000', '(555) 010-2000']
+
+def person(rng, i):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        'first': first, 'last': last, 'initial': rng.choice('ABCDEFGHJKLMNPRSTW'),
+        'email': f'{first}.{last}{i}@example{i % 97}.com',
+        'phone': f'{200 + i // 10000000 % 800:03d}{i // 10000 % 1000:03d}{i % 10000:04d}',
+        'number': rng.randint(1, 9999), 'street': rng.choice(STREETS),
+    }
+
+def mention(rng, who):
+    fields = {}
+    style = rng.random()
+    name = f"{who['first']} {who['last']}"
+    if style < 0.2:
+        name = f"{who['first']} {who['initial']}. {who['last']}"
+    elif style < 0.3:
+        name = f"{who['first']} {who['last']} Jr"
+    fields['names'] = [name]
+    if rng.random() < 0.7:
+        email = who['email']
+        fields['emails'] = [email.upper() if rng.random() < 0.2 else email.lower() if rng.random() < 0.5 else email]
+    phones = []
+    if rng.random() < 0.7:
+        digits = who['phone']
+        phones.append(rng.choice([f'({digits[:3]}) {digits[3:6]}-{digits[6:]}', f'{digits[:3]}.{digits[3:6]}.{digits[6:]}',
+                                  f'+1 {digits[:3]} {digits[3:6]} {digits[6:]}', f'+1-{digits[:3]}-{digits[3:6]}-{digits[6:]}']))
+    if rng.random() < 0.05:
+        phones.append(rng.choice(SWITCHBOARDS))
+    fields['phones'] = phones
+    if rng.random() < 0.5 or not (fields.get('emails') or phones):
+        street, long_suffix, short_suffix = who['street']
+        suffix = long_suffix if rng.random() < 0.5 else short_suffix
+        fields['addresses'] = [f"{who['number']} {street} {suffix}, Springfield, IL 62701"]
+    return fields
+
+def generate(entities, seed=1):
+    """Records with about `entities` values in total, and the person behind each"""
+    rng = random.Random(seed)
+    people = [person(rng, i) for i in range(max(1, entities // 12))]
+    records, truth = [], []
+    total = 0
+    while total < entities:
+        who = rng.randrange(len(people))
+        fields = mention(rng, people[who])
+        records.append(fields)
+        truth.append(who)
+        total += sum(len(values) for values in fields.values())
+    return records, truth
+
+def pairwise_scores(clusters, truth):
+    """Pairwise precision and recall of predicted clusters against the true people"""
+    pairs = lambda n: n * (n - 1) // 2
+    both = Counter(zip(clusters, truth))
+    correct = sum(pairs(n) for n in both.values())
+    predicted = sum(pairs(n) for n in Counter(clusters).values())
+    actual = sum(pairs(n) for n in Counter(truth).values())
+    return correct / predicted if predicted else 1.0, correct / actual if actual else 1.0
+
+def resolve_blocking(records):
+    resolver = ContactResolver()
+    for i, fields in enumerate(records):
+        resolver.add_record(i, fields)
+    contacts = resolver.resolve()
+    clusters = [0] * len(records)
+    for number, contact in enumerate(contacts):
+        for document_id in contact['documents']:
+            clusters[document_id] = number
+    return clusters, resolver.stats
+
+def resolve_naive(records, max_key_names=3):
+    """The same merge rule, checked for every pair of records"""
+    parent = list(range(len(records)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    keys = []
+    names = []
+    addresses = []
+    key_names = {}
+    for fields in records:
+        record_keys = {email_key(value) for value in fields.get('emails', ())}
+        record_keys.update(key for key in map(phone_key, fields.get('phones', ())) if key)
+        record_names = {key for key in map(name_key, fields.get('names', ())) if key}
+        for key in record_keys:
+            key_names.setdefault(key, set()).update(record_names)
+        keys.append(record_keys)
+        names.append(record_names)
+        addresses.append({key for key in map(address_key, fields.get('addresses', ())) if key})
+    shared = {key for key, key_name_set in key_names.items() if len(key_name_set) > max_key_names}
+    for i in range(len(records)):
+        for j in range(i):
+            if (keys[i] & keys[j]) - shared or (names[i] & names[j] and addresses[i] & addresses[j]):
+                parent[find(i)] = find(j)
+    return [find(i) for i in range(len(records))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--entities', type=int, nargs='*', default=[10000, 100000, 1000000])
+    parser.add_argument('--naive-max-entities', type=int, default=10000)
+    parser.add_argument('--max-exponent', type=float, default=1.25)
+    args = parser.parse_args()
+
+    print(f"{'entities':>9} {'records':>8} {'method':<8} {'s':>8} {'entities/s':>11} "
+          f"{'contacts':>9} {'precision':>9} {'recall':>7}")
+    timings = []
+    for entities in args.entities:
+        records, truth = generate(entities)
+        start = time.perf_counter()
+        clusters, stats = resolve_blocking(records)
+        elapsed = time.perf_counter() - start
+        timings.append((stats['entities'], elapsed))
+        precision, recall = pairwise_scores(clusters, truth)
+        print(f"{stats['entities']:>9,} {len(records):>8,} {'blocking':<8} {elapsed:>8.2f} "
+              f"{stats['entities'] / elapsed:>11,.0f} {stats['contacts']:>9,} {precision:>9.4f} {recall:>7.4f}")
+        if entities <= args.naive_max_entities:
+            start = time.perf_counter()
+            naive = resolve_naive(records)
+            naive_elapsed = time.perf_counter() - start
+            precision, recall = pairwise_scores(naive, truth)
+            print(f"{stats['entities']:>9,} {len(records):>8,} {'pairwise':<8} {naive_elapsed:>8.2f} "
+                  f"{stats['entities'] / naive_elapsed:>11,.0f} {len(set(naive)):>9,} "
+                  f"{precision:>9.4f} {recall:>7.4f}")
+
+    print()
+    if len(timings) >= 2:
+        (n1, t1), (n2, t2) = timings[-2], timings[-1]
+        growth = math.log(t2 / t1) / math.log(n2 / n1)
+        print(f"Growth exponent between the two largest sizes: {growth:.2f}")
+        if growth > args.max_exponent:
+            print(f"FAIL: resolution grows faster than n^{args.max_exponent}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
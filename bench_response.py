@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /upload response size on the wire and serialization time.
+
+Uploads a long synthetic document (many contacts, so every field list and
+the provenance are large) through the app's test client with each response
+shape: the default, without text, with the full text, one field only, and
+with provenance. Each shape is fetched with identity, gzip and deflate
+encoding. Prints the bytes on the wire and the server-side time spent in
+the 'serialize' and 'compress' spans of the request's trace, best of
+--repeat runs.
+
+JSON is compact as in production unless --pretty is given, which measures
+the indented output of development mode. Exits non-zero if a compressed
+response does not decode to the identity response or is not smaller.
+
+Usage:
+    python bench_response.py --pages 400 --repeat 5
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import zlib
+
+import app as app_module
+from generate_test_pdfs import create_long_document
+
+SHAPES = [
+    ('default', ''),
+    ('include_text=0', 'include_text=0'),
+    ('text_limit=0', 'text_limit=0'),
+    ('fields=emails', 'fields=emails&include_text=0'),
+    ('provenance=1', 'provenance=1'),
+    ('provenance, no text', 'provenance=1&include_text=0'),
+]
+DECODE = {'identity': lambda data: data, 'gzip': gzip.decompress, 'deflate': zlib.decompress}
+
+def upload(client, content, query, encoding):
+    r = client.post(f'/upload?store=0&{query}', data={'file': (content, 'long.pdf')},
+                    content_type='multipart/form-data', headers={'Accept-Encoding': encoding})
+    assert r.status_code == 200, r.status_code
+    trace = app_module.trace_buffer.query(limit=1, trace_id=r.headers['X-Request-ID'])[0]
+    spans = {span['name']: span['duration_us'] for span in trace['spans'] if span['name'] in ('serialize', 'compress')}
+    return r.data, spans
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pages', type=int, default=400)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--pretty', action='store_true', help='indented JSON as in development mode')
+    args = parser.parse_args()
+
+    app_module.app.config['DEBUG'] = args.pretty
+    app_module.app.config['EXTRACTION_MAX_PAGES'] = max(app_module.app.config['EXTRACTION_MAX_PAGES'], args.pages)
+    app_module.tracer.sample_rate = 1.0
+    client = app_module.app.test_client()
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = create_long_document(os.path.join(work_dir, 'long.pdf'), pages=args.pages)
+        with open(path, 'rb') as file:
+            pdf = file.read()
+
+    failures = []
+    print(f"{args.pages}-page document, {'indented' if args.pretty else 'compact'} JSON")
+    print(f"{'shape':<22} {'encoding':<9} {'bytes':>10} {'ratio':>6} {'serialize ms':>12} {'compress ms':>11}")
+    for label, query in SHAPES:
+        identity = None
+        for encoding in ('identity', 'gzip', 'deflate'):
+            best = None
+            for _ in range(args.repeat):
+                data, spans = upload(client, io.BytesIO(pdf), query, encoding)
+                total = spans.get('serialize', 0) + spans.get('compress', 0)
+                if best is None or total < best[2]:
+                    best = (data, spans, total)
+            data, spans, _ = best
+            # processing_time differs between requests; compare the rest
+            decoded = json.loads(DECODE[encoding](data))
+            decoded.pop('processing_time')
+            if identity is None:
+                identity, identity_bytes = decoded, len(data)
+            else:
+                if decoded != identity:
+                    failures.append(f"{label} {encoding}: does not decode to the identity response")
+                if len(data) >= identity_bytes:
+                    failures.append(f"{label} {encoding}: {len(data)} bytes, no smaller than identity")
+            print(f"{label:<22} {encoding:<9} {len(data):>10,} {len(data) / identity_bytes:>6.2f} "
+                  f"{spans.get('serialize', 0) / 1000:>12.2f} {spans.get('compress', 0) / 1000:>11.2f}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: moving extraction output between processes, pickled vs shared memory.
+
+A forked child builds a document text of each size with a match every 50
+characters, as a sandbox worker would, then sends (text, ResultSet) to the
+parent once pickled through a pipe and once through shm_transport. Times
+run from just before the child packs the result to just after the parent
+has rebuilt it, and the bytes that cross the pipe are counted. Exits
+non-zero if the rebuilt results differ.
+
+Usage:
+    python bench_shm_transport.py --sizes-mb 1 10 100 --repeat 3
+"""
+
+import argparse
+import multiprocessing
+import pickle
+import sys
+import time
+
+from results import ResultSet
+from shm_transport import pack_result, unpack_result
+
+FIELDS = ['names', 'emails', 'phone_numbers', 'addresses']
+LINE = 'Contact {i:08d}: user{i}@example.com, call 555-{j:03d}-{k:04d} today.\n'
+
+def build(size):
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        line = LINE.format(i=i, j=i % 1000, k=i % 10000)
+        lines.append(line)
+        total += len(line)
+        i += 1
+    text = ''.join(lines)[:size]
+    results = ResultSet(text, FIELDS, pages=[(0, 1)])
+    for start in range(0, len(text) - 50, 50):
+        results.add(FIELDS[start // 50 % len(FIELDS)], f'value{start // 50 % 5000}', start, start + 20)
+    return text, results
+
+def child(conn, size, mode, repeat):
+    text, results = build(size)
+    for _ in range(repeat):
+        conn.recv()
+        start = time.perf_counter()
+        packet = pack_result(text, results, None if mode == 'pickle' else 0)
+        data = pickle.dumps((packet, start), protocol=pickle.HIGHEST_PROTOCOL)
+        conn.send_bytes(data)
+    conn.close()
+
+def measure(size, mode, repeat):
+    ctx = multiprocessing.get_context('fork')
+    parent_conn, child_conn = ctx.Pipe()
+    process = ctx.Process(target=child, args=(child_conn, size, mode, repeat))
+    process.start()
+    times = []
+    wire = 0
+    received = None
+    for _ in range(repeat):
+        parent_conn.send(None)
+        data = parent_conn.recv_bytes()
+        packet, start = pickle.loads(data)
+        received = unpack_result(packet, ResultSet)
+        times.append(time.perf_counter() - start)
+        wire = len(data)
+    process.join()
+    return min(times), wire, received
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes-mb', type=float, nargs='*', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'matches':>10} {'mode':>7} {'ms':>9} {'MB/s':>8} {'pipe bytes':>12} {'speedup':>7}")
+    mismatches = 0
+    for size_mb in args.sizes_mb:
+        size = int(size_mb * (1 << 20))
+        measured = {}
+        for mode in ('pickle', 'shared'):
+            measured[mode] = measure(size, mode, args.repeat)
+        expected_text, expected = measured['pickle'][2]
+        for mode, (elapsed, wire, (text, results)) in measured.items():
+            same = text == expected_text and results.to_provenance() == expected.to_provenance()
+            mismatches += not same
+            speedup = measured['pickle'][0] / elapsed
+            print(f"{size_mb:>6g}MB {len(results):>10,} {mode:>7} {elapsed * 1000:>9.1f} "
+                  f"{size / elapsed / (1 << 20):>8.0f} {wire:>12,} {speedup:>6.2f}x"
+                  + ('' if same else '  MISMATCH'))
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Load test: many idle or slow clients against a locally started server.
+
+Starts the app under the ASGI entry point (uvicorn asgi:app) or the WSGI one
+(waitress wsgi:app), opens N connections that trickle a /upload/stream
+request a few bytes at a time, and samples the server's RSS while they are
+held open. A normal /examples request is timed alongside to show the server
+stays responsive.
+
+Usage:
+    python bench_slow_clients.py --server asgi --connections 2000 --duration 30
+    python bench_slow_clients.py --server wsgi --connections 2000 --duration 30
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from loadtest import free_port, rss_mb, raise_fd_limit, start_server
+
+async def wait_ready(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return True
+        except OSError:
+            await asyncio.sleep(0.2)
+    return False
+
+async def slow_client(port, stop, stats, interval):
+    """Send headers, then trickle the body until `stop` is set"""
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        stats['connect_errors'] += 1
+        return
+    stats['open'] += 1
+    try:
+        body_length = 10 * 1024 * 1024
+        writer.write((f"POST /upload/stream?filename=slow.pdf HTTP/1.1\r\n"
+                      f"Host: 127.0.0.1\r\nContent-Type: application/pdf\r\n"
+                      f"Content-Length: {body_length}\r\n\r\n%PDF").encode())
+        await writer.drain()
+        while not stop.is_set():
+            await asyncio.sleep(interval)
+            writer.write(b'0' * 16)
+            await writer.drain()
+    except OSError:
+        stats['dropped'] += 1
+    finally:
+        stats['open'] -= 1
+        writer.close()
+
+async def probe(port):
+    """Time one GET /examples request; return seconds or None on failure"""
+    start = time.time()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), 10)
+        writer.write(b"GET /examples HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        status = await asyncio.wait_for(reader.readline(), 10)
+        await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        return time.time() - start if b' 200 ' in status else None
+    except (OSError, asyncio.TimeoutError):
+        return None
+
+async def run(args):
+    port = free_port()
+    server = start_server(args.server, port)
+    try:
+        if not await wait_ready(port):
+            print("Server did not start")
+            return 1
+        await asyncio.sleep(1)
+        baseline = rss_mb(server.pid)
+
+        stop = asyncio.Event()
+        stats = {'open': 0, 'connect_errors': 0, 'dropped': 0}
+        clients = []
+        for i in range(args.connections):
+            clients.append(asyncio.create_task(slow_client(port, stop, stats, args.interval)))
+            if i % 200 == 199:
+                await asyncio.sleep(0.1)
+
+        print(f"Server: {args.server}, connections: {args.connections}, baseline RSS: {baseline:.1f}MB")
+        print(f"{'t(s)':>6} {'open':>6} {'RSS MB':>8} {'probe ms':>9}")
+        samples = []
+        start = time.time()
+        while time.time() - start < args.duration:
+            await asyncio.sleep(args.sample_every)
+            latency = await probe(port)
+            rss = rss_mb(server.pid)
+            samples.append(rss)
+            shown = f"{latency * 1000:.0f}" if latency is not None else 'fail'
+            print(f"{time.time() - start:6.1f} {stats['open']:6d} {rss:8.1f} {shown:>9}")
+
+        stop.set()
+        await asyncio.gather(*clients, return_exceptions=True)
+
+        print()
+        print(f"Connect errors: {stats['connect_errors']}, dropped: {stats['dropped']}")
+        if samples:
+            print(f"RSS baseline {baseline:.1f}MB, min {min(samples):.1f}MB, "
+                  f"max {max(samples):.1f}MB, last {samples[-1]:.1f}MB")
+        return 0
+    finally:
+        server.terminate()
+        server.wait(10)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--server', choices=['asgi', 'wsgi'], default='asgi')
+    parser.add_argument('--connections', type=int, default=2000)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between body trickles')
+    parser.add_argument('--sample-every', type=float, default=2.0)
+    args = parser.parse_args()
+
+    raise_fd_limit(args.connections * 2 + 100)
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
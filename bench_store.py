@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: document store writes and /search query latency.
+
+Extracts a long synthetic document once, then stores --documents copies of
+it with every email, phone number and city made distinct per copy, so the
+entity index holds tens of entities per document. Then it times entity
+lookups (exact email, phone digits, name prefix) and full-text page queries,
+for a term in one document and for terms on every third page of every
+document, against the filled store. Prints store throughput and p50/p99 latency per
+query kind, and exits non-zero if any p99 exceeds --max-ms.
+
+Usage:
+    python bench_store.py --documents 1000 5000 --queries 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app import PDFDataExtractor
+from prefilter import PageIndex
+from store import DocumentStore
+from generate_test_pdfs import create_long_document
+
+def document_copy(extractor, source, copy):
+    index = PageIndex()
+    text = ''
+    for page_number, page in enumerate(source.pages, 1):
+        start = len(text)
+        text += (page.text.replace('@example.com', f'@example{copy}.com')
+                 .replace('(555)', f'({100 + copy % 900})').replace('Springfield', f'Springfield{copy}'))
+        index.add(page_number, text[start:])
+    return extractor.extract_results(text, page_index=index)
+
+def percentile(times, fraction):
+    times = sorted(times)
+    return times[min(len(times) - 1, int(len(times) * fraction))] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--documents', type=int, nargs='*', default=[1000])
+    parser.add_argument('--pages', type=int, default=30)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--max-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    extractor = PDFDataExtractor()
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = PageIndex()
+        extractor.extract_text_from_pdf(create_long_document(os.path.join(work_dir, 'long.pdf'), pages=args.pages),
+                                        page_index=source)
+        store = DocumentStore(os.path.join(work_dir, 'documents.db'))
+        stored = []
+        failures = []
+        print(f"{'documents':>9} {'entities':>9} {'store/s':>8} {'db MB':>7} {'query':<12} {'p50 ms':>7} {'p99 ms':>7}")
+        for target in args.documents:
+            added = 0
+            count = 0
+            while len(stored) < target:
+                results = document_copy(extractor, source, len(stored))
+                store_start = time.perf_counter()
+                store.save(f'copy_{len(stored)}.pdf', results)
+                added += time.perf_counter() - store_start
+                stored.append(results)
+                count += 1
+            entities = sum(len(results) for results in stored)
+            db_mb = os.path.getsize(store.path) / (1 << 20)
+            rate = count / added if added else 0
+
+            queries = {
+                'email': lambda results: (results['emails'][0], ['emails'], False),
+                'phone': lambda results: (results['phones'][0], ['phones'], False),
+                'name_prefix': lambda results: (results['names'][0].split()[0], ['names'], False),
+                'text': lambda results: (results['addresses'][0].split(',')[1], None, True),
+                'common_text': lambda results: ('general terms', None, True),
+            }
+            for kind, build in queries.items():
+                times = []
+                for _ in range(args.queries):
+                    query, fields, text_search = build(random.choice(stored))
+                    query_start = time.perf_counter()
+                    found = store.search_text(query) if text_search else store.search_entities(query, fields)
+                    times.append(time.perf_counter() - query_start)
+                    assert found, f"no results for {kind} {query!r}"
+                p50, p99 = percentile(times, 0.5), percentile(times, 0.99)
+                if p99 > args.max_ms:
+                    failures.append(f"{kind}@{target}")
+                print(f"{target:>9,} {entities:>9,} {rate:>8.0f} {db_mb:>7.1f} {kind:<12} {p50:>7.2f} {p99:>7.2f}")
+
+    print()
+    if failures:
+        print(f"FAIL: p99 over {args.max_ms}ms for {', '.join(failures)}")
+        return 1
+    print(f"Every query kind answered within {args.max_ms}ms at p99")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
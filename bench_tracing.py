@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tracing overhead per span and on whole extractions.
+
+Times a span outside any trace (the path unsampled requests take), a span
+recorded into a trace, and exporting a trace to the ring buffer and to a
+JSONL file. Then extracts a long synthetic document repeatedly with no
+trace open and inside a sampled trace, and reports the added time. Exits
+non-zero if tracing adds more than --max-overhead percent to extraction.
+
+Usage:
+    python bench_tracing.py --pages 60 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import app as app_module
+from tracing import JsonlSink, RingBufferSink, Tracer, span
+from generate_test_pdfs import create_long_document
+
+def per_call(function, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - start) / count
+
+def noop_span():
+    with span('field', field='emails'):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--max-overhead', type=float, default=3.0, help='percent')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        jsonl = JsonlSink(os.path.join(work_dir, 'traces.jsonl'))
+        tracer = Tracer([RingBufferSink(100), jsonl])
+
+        unsampled = per_call(noop_span, args.calls)
+        trace = tracer.start('bench', 'bench')
+        recorded = per_call(noop_span, args.calls // 10)
+        tracer.finish(trace)
+
+        def export(spans):
+            trace = tracer.start('bench', 'bench')
+            for page in range(spans):
+                with span('pdf.page', page=page, chars=900):
+                    pass
+            tracer.finish(trace)
+        before = os.path.getsize(jsonl.path)
+        export_time = per_call(lambda: export(100), 200)
+        line_bytes = (os.path.getsize(jsonl.path) - before) / 200
+
+        print(f"span outside a trace:   {unsampled * 1e9:>8.0f} ns")
+        print(f"span recorded:          {recorded * 1e9:>8.0f} ns")
+        print(f"100-span trace, export: {export_time * 1e6:>8.0f} us (ring buffer + JSONL, "
+              f"{line_bytes:.0f} bytes per line)")
+
+        path = create_long_document(os.path.join(work_dir, 'long.pdf'), pages=args.pages)
+        app_module.run_extraction(path)  # warm imports and caches
+        timings = {'off': [], 'traced': []}
+        spans = 0
+        for _ in range(args.repeat):
+            for mode in timings:
+                start = time.perf_counter()
+                trace = tracer.start('bench', 'POST /upload') if mode == 'traced' else None
+                app_module.run_extraction(path)
+                if trace is not None:
+                    spans = len(tracer.finish(trace)['spans'])
+                timings[mode].append(time.perf_counter() - start)
+
+    off, traced = min(timings['off']), min(timings['traced'])
+    overhead = (traced - off) / off * 100
+    print(f"extraction, {args.pages} pages: off {off * 1000:.1f} ms, traced {traced * 1000:.1f} ms "
+          f"({spans} spans), overhead {overhead:+.2f}%")
+    if overhead > args.max_overhead:
+        print(f"FAIL: tracing adds more than {args.max_overhead}%")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+gzip and deflate content encoding for responses.
+
+The encoding is negotiated from the request's Accept-Encoding, honouring
+q-values and preferring gzip on a tie. Buffered bodies are compressed in
+one go. A streamed body, such as the NDJSON lines of an archive upload,
+is compressed chunk by chunk with a sync flush after each, so every line
+reaches the client as soon as it is produced rather than when the
+compressor's window fills.
+
+'deflate' is the zlib format (RFC 1950), which is what HTTP means by it.
+"""
+
+import zlib
+
+ENCODINGS = ('gzip', 'deflate')
+# zlib window bits: 16 + 15 writes a gzip container, 15 a zlib one
+WBITS = {'gzip': 31, 'deflate': 15}
+
+def negotiate(accept_encodings):
+    """The encoding to use for a werkzeug Accept-Encoding header, or None"""
+    return accept_encodings.best_match(ENCODINGS)
+
+def compress(data, encoding, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
+    return compressor.compress(data) + compressor.flush()
+
+def compress_stream(chunks, encoding, level=6):
+    """Compress an iterable of chunks, flushing after each one; closes `chunks` when done"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
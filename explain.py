@@ -0,0 +1,65 @@
+"""
+Decision traces for name extraction.
+
+Names are found with line heuristics rather than a pattern, so a missed or
+spurious name is hard to explain from the result alone. Passing a
+DecisionTrace to the extractor (`explain=`) records, for every non-blank
+line it scans, the rule that decided the line and whether it produced a
+name. The most recent `max_lines` decisions are kept in a ring buffer;
+counts per rule cover every line, including those that have dropped out.
+
+With no trace the extractor only checks `explain is not None` once per
+line, which is lost in timing noise. Recording every line adds about 10%
+to the name scan (see bench_explain.py).
+
+Rules, in the order the extractor applies them:
+
+* too_short - fewer than three characters;
+* exclusions - two or more section words such as 'email' or 'experience';
+* email_line - capitalized words before an email address;
+* table_row - the first two words of a table row with an email. Its
+  patterns need an '@', so email_line decides those lines first and this
+  rule does not fire today;
+* capitalized_words - two to four leading capitalized words on a short line.
+"""
+
+from collections import deque
+
+RULES = ('too_short', 'exclusions', 'email_line', 'table_row', 'capitalized_words')
+MAX_LINE_CHARS = 200
+
+class DecisionTrace:
+    """The latest line decisions of one extraction, plus counts per rule"""
+
+    def __init__(self, max_lines=1000):
+        self.lines = deque(maxlen=max_lines)
+        self.counts = {rule: {'accepted': 0, 'rejected': 0} for rule in RULES}
+        self.recorded = 0
+
+    def record(self, offset, line, rule, name=None, reason=None):
+        """Record how `rule` decided the line at document offset `offset`"""
+        self.lines.append((offset, line, rule, name, reason))
+        self.counts[rule]['accepted' if name else 'rejected'] += 1
+        self.recorded += 1
+
+    def clear(self):
+        self.lines.clear()
+        for counts in self.counts.values():
+            counts['accepted'] = counts['rejected'] = 0
+        self.recorded = 0
+
+    def to_dict(self, results=None):
+        """JSON-ready trace; with a ResultSet each line also gets its page number"""
+        lines = []
+        for offset, line, rule, name, reason in self.lines:
+            entry = {'offset': offset, 'line': line[:MAX_LINE_CHARS], 'rule': rule,
+                     'decision': 'accepted' if name else 'rejected'}
+            if results is not None:
+                entry['page'] = results.page_at(offset) or None
+            if name:
+                entry['name'] = name
+            if reason:
+                entry['reason'] = reason
+            lines.append(entry)
+        return {'lines': lines, 'rules': self.counts, 'recorded': self.recorded,
+                'dropped': self.recorded - len(self.lines)}
@@ -5,7 +5,7 @@ Creates various document types with multiple instances of names, emails, phones,
 """
 
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
@@ -366,6 +366,89 @@ def create_mixed_format_document():
     doc.build(story)
     return filename
 
+def create_long_document(filename="long_document.pdf", pages=50):
+    """Create a synthetic multi-page document for budget and performance tests.
+
+    Every third page is boilerplate prose with no contact details; the other
+    pages each carry one contact (name, email, phone and address).
+    """
+    doc = SimpleDocTemplate(filename, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    first_names = ['Alice', 'Brian', 'Carla', 'Derek', 'Elena', 'Frank', 'Grace', 'Henry']
+    last_names = ['Walker', 'Turner', 'Nguyen', 'Foster', 'Murphy', 'Reyes', 'Coleman', 'Price']
+    streets = ['Oak Street', 'Pine Avenue', 'Maple Drive', 'Cedar Lane', 'Elm Road']
+    
+    for page in range(1, pages + 1):
+        if page % 3 == 0:
+            story.append(Paragraph("GENERAL TERMS", styles['Heading2']))
+            boilerplate = """
+            These terms apply to every engagement described in this document and remain
+            in effect until replaced by a later agreement between the parties involved.
+            Nothing here creates an obligation beyond what is described in writing.
+            """
+            story.append(Paragraph(boilerplate, styles['Normal']))
+        else:
+            first = first_names[page % len(first_names)]
+            last = last_names[(page // len(first_names)) % len(last_names)]
+            contact = f"""
+            {first} {last}<br/>
+            Email: {first.lower()}.{last.lower()}{page}@example.com<br/>
+            Phone: (555) {200 + page % 800:03d}-{page % 10000:04d}<br/>
+            Address: {100 + page} {streets[page % len(streets)]}, Springfield, IL 62701<br/>
+            """
+            story.append(Paragraph(f"CONTACT SHEET {page}", styles['Heading2']))
+            story.append(Paragraph(contact, styles['Normal']))
+        if page < pages:
+            story.append(PageBreak())
+    
+    doc.build(story)
+    return filename
+
+def create_vendor_invoice(filename="vendor_invoice.pdf", customer=("Alice", "Walker"), number=1001,
+                          email_in_notes=False):
+    """Create an invoice in one fixed vendor layout for template tests.
+
+    Every invoice has the same labels in the same places; only the values
+    change. With `email_in_notes` the customer email moves from its labelled
+    line into the notes at the bottom of the page.
+    """
+    doc = SimpleDocTemplate(filename, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    first, last = customer
+    email = f"{first.lower()}.{last.lower()}@example.com"
+    
+    story.append(Paragraph("ACME SUPPLY INVOICE", styles['Heading1']))
+    header = f"""
+    Invoice Number: {number}<br/>
+    Customer:<br/>
+    {first} {last}<br/>
+    Email: {'' if email_in_notes else email}<br/>
+    Phone: (555) {300 + number % 600:03d}-{number % 10000:04d}<br/>
+    """
+    story.append(Paragraph(header, styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    terms = """
+    payment is due within thirty days of the invoice date. late payments are subject
+    to a monthly service charge. goods remain the property of the seller until paid
+    in full. claims for damaged or missing goods must be made within five days of
+    delivery. returns require prior authorization and are subject to a restocking
+    charge. prices do not include shipping unless stated otherwise.
+    """
+    for _ in range(4):
+        story.append(Paragraph(terms, styles['Normal']))
+        story.append(Spacer(1, 10))
+    
+    notes = f"please write to {email} with questions" if email_in_notes else "thank you for your business"
+    story.append(Paragraph(f"Notes: {notes}", styles['Normal']))
+    
+    doc.build(story)
+    return filename
+
 def main():
     """Generate all test PDF files"""
     print("Generating test PDF files...")
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+HTTP load-testing harness for /upload latency and throughput.
+
+Replays the PDFs in test_pdfs (plus synthetic multi-page documents) against
+a locally started server at one or more concurrency levels, either closed
+loop (each client sends its next request as soon as the last one returns)
+or open loop at a fixed Poisson arrival rate. Reports latency percentiles,
+throughput, error rate and server RSS over time, and saves a JSON report
+that can be compared with earlier runs.
+
+Usage:
+    python loadtest.py --server wsgi --concurrency 10,50,200 --duration 20
+    python loadtest.py --server prefork --workers 4 --rate 40 --output reports/prefork.json
+    python loadtest.py --url http://127.0.0.1:5000 --concurrency 10
+    python loadtest.py --compare reports/before.json reports/after.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def rss_mb(pid):
+    """Resident set size of a process in MB, read from /proc"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return 0.0
+
+def tree_rss_mb(pid):
+    """RSS of a process plus its direct children (prefork workers)"""
+    total = rss_mb(pid)
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            total += sum(rss_mb(int(child)) for child in f.read().split())
+    except FileNotFoundError:
+        pass
+    return total
+
+def raise_fd_limit(wanted):
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = hard if hard != resource.RLIM_INFINITY else wanted
+    if soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+def start_server(kind, port, workers=2, extra_env=None):
+    """Start the app locally as 'wsgi' (waitress), 'asgi' (uvicorn) or 'prefork'"""
+    env = dict(os.environ, FLASK_ENV='production')
+    env.pop('PORT', None)
+    env.update(extra_env or {})
+    if kind == 'asgi':
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1',
+               '--port', str(port), '--log-level', 'warning', '--backlog', '4096']
+    elif kind == 'prefork':
+        env.update(PORT=str(port), WEB_WORKERS=str(workers))
+        cmd = [sys.executable, 'run_prod.py']
+    else:
+        cmd = [sys.executable, '-m', 'waitress', '--host=127.0.0.1', f'--port={port}', 'wsgi:app']
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_ready(url, timeout=30):
+    import requests
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{url}/examples', timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def build_corpus(pdf_dir='test_pdfs', synthetic_pages=(), work_dir=None):
+    """Load (name, bytes) pairs from `pdf_dir` plus generated multi-page documents"""
+    corpus = []
+    if pdf_dir and os.path.isdir(pdf_dir):
+        for filename in sorted(os.listdir(pdf_dir)):
+            if filename.lower().endswith('.pdf'):
+                with open(os.path.join(pdf_dir, filename), 'rb') as f:
+                    corpus.append((filename, f.read()))
+    if synthetic_pages:
+        from generate_test_pdfs import create_long_document
+        for pages in synthetic_pages:
+            path = create_long_document(os.path.join(work_dir, f'synthetic_{pages}p.pdf'), pages=pages)
+            with open(path, 'rb') as f:
+                corpus.append((os.path.basename(path), f.read()))
+    return corpus
+
+class RssSampler(threading.Thread):
+    """Samples server RSS every `interval` seconds in the background"""
+
+    def __init__(self, pid, interval=1.0):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._start_time = time.time()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append((round(time.time() - self._start_time, 2), round(tree_rss_mb(self.pid), 1)))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+def run_level(url, corpus, concurrency, duration, rate=None, seed=0):
+    """Drive /upload at one concurrency level and return its statistics"""
+    import requests
+
+    local = threading.local()
+    lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    errors = 0
+    rng = random.Random(seed)
+
+    def send(scheduled):
+        nonlocal errors
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        with lock:
+            name, content = rng.choice(corpus)
+        try:
+            r = local.session.post(f'{url}/upload', files={'file': (name, content, 'application/pdf')},
+                                   timeout=120)
+            status = r.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        # Latency runs from the scheduled start so queueing in the client counts too
+        elapsed = time.time() - scheduled
+        with lock:
+            latencies.append(elapsed)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status != 200:
+                errors += 1
+
+    start = time.time()
+    end = start + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if rate:
+            # Open loop: Poisson arrivals, at most `concurrency` in flight
+            next_arrival = start
+            while next_arrival < end:
+                delay = next_arrival - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(send, next_arrival)
+                next_arrival += rng.expovariate(rate)
+        else:
+            # Closed loop: each client loops until the duration is up
+            def client():
+                while time.time() < end:
+                    send(time.time())
+            for _ in range(concurrency):
+                pool.submit(client)
+    wall = time.time() - start
+
+    ordered = sorted(latencies)
+    return {
+        'concurrency': concurrency,
+        'rate': rate,
+        'requests': len(ordered),
+        'errors': errors,
+        'error_rate': round(errors / len(ordered), 4) if ordered else 0.0,
+        'throughput_rps': round(len(ordered) / wall, 2) if wall else 0.0,
+        'latency_ms': {
+            'mean': round(sum(ordered) / len(ordered) * 1000, 1) if ordered else None,
+            'p50': round(percentile(ordered, 50) * 1000, 1) if ordered else None,
+            'p90': round(percentile(ordered, 90) * 1000, 1) if ordered else None,
+            'p99': round(percentile(ordered, 99) * 1000, 1) if ordered else None,
+            'max': round(ordered[-1] * 1000, 1) if ordered else None
+        },
+        'statuses': statuses
+    }
+
+def print_level(result):
+    latency = result['latency_ms']
+    print(f"{result['concurrency']:>6} {result['requests']:>8} {result['throughput_rps']:>8.1f} "
+          f"{result['error_rate'] * 100:>6.1f}% {latency['p50'] or 0:>8.1f} {latency['p90'] or 0:>8.1f} "
+          f"{latency['p99'] or 0:>8.1f} {latency['max'] or 0:>8.1f}")
+
+def compare_reports(paths):
+    """Print p50/p99/throughput for each concurrency level across saved reports"""
+    reports = []
+    for path in paths:
+        with open(path) as f:
+            reports.append(json.load(f))
+
+    print(f"{'report':<32} {'conc':>5} {'rps':>8} {'p50 ms':>8} {'p99 ms':>8} {'err%':>6} {'RSS max':>8}")
+    baseline = {}
+    for path, report in zip(paths, reports):
+        rss_max = max((rss for _, rss in report.get('rss_mb', [])), default=0)
+        for level in report['levels']:
+            key = (level['concurrency'], level['rate'])
+            line = (f"{os.path.basename(path)[:32]:<32} {level['concurrency']:>5} {level['throughput_rps']:>8.1f} "
+                    f"{level['latency_ms']['p50'] or 0:>8.1f} {level['latency_ms']['p99'] or 0:>8.1f} "
+                    f"{level['error_rate'] * 100:>5.1f}% {rss_max:>8.1f}")
+            if key in baseline:
+                base = baseline[key]
+                if base['latency_ms']['p99']:
+                    change = (level['latency_ms']['p99'] / base['latency_ms']['p99'] - 1) * 100
+                    line += f"  p99 {change:+.0f}%"
+                if base['throughput_rps']:
+                    change = (level['throughput_rps'] / base['throughput_rps'] - 1) * 100
+                    line += f"  rps {change:+.0f}%"
+            else:
+                baseline[key] = level
+            print(line)
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--server', choices=['wsgi', 'asgi', 'prefork'], default='wsgi')
+    parser.add_argument('--workers', type=int, default=2, help='prefork worker processes')
+    parser.add_argument('--url', help='test an already running server instead of starting one')
+    parser.add_argument('--concurrency', default='10,50,200',
+                        help='comma-separated client concurrency levels')
+    parser.add_argument('--duration', type=float, default=20, help='seconds per level')
+    parser.add_argument('--rate', type=float, help='open-loop arrival rate in requests/second')
+    parser.add_argument('--corpus', default='test_pdfs')
+    parser.add_argument('--synthetic', default='10,50',
+                        help='page counts of synthetic documents to add (empty for none)')
+    parser.add_argument('--output', help='where to save the JSON report')
+    parser.add_argument('--compare', nargs='+', metavar='REPORT', help='compare saved reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_reports(args.compare)
+        return 0
+
+    levels = [int(level) for level in args.concurrency.split(',') if level]
+    synthetic = [int(pages) for pages in args.synthetic.split(',') if pages]
+    raise_fd_limit(max(levels) * 4 + 100)
+
+    server = None
+    sampler = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus = build_corpus(args.corpus, synthetic, work_dir)
+        print(f"Corpus: {len(corpus)} documents, {sum(len(c) for _, c in corpus) // 1024}KB")
+
+        url = args.url
+        try:
+            if not url:
+                port = free_port()
+                server = start_server(args.server, port, workers=args.workers)
+                url = f'http://127.0.0.1:{port}'
+                sampler = RssSampler(server.pid)
+                sampler.start()
+            if not wait_ready(url):
+                print(f"Server at {url} is not responding")
+                return 1
+
+            print(f"{'conc':>6} {'requests':>8} {'rps':>8} {'errors':>7} {'p50 ms':>8} "
+                  f"{'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+            results = []
+            for concurrency in levels:
+                result = run_level(url, corpus, concurrency, args.duration, rate=args.rate)
+                print_level(result)
+                results.append(result)
+        finally:
+            if sampler:
+                sampler.stop()
+            if server:
+                server.terminate()
+                server.wait(30)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': current_commit(),
+        'server': 'external' if args.url else args.server,
+        'workers': args.workers if args.server == 'prefork' else None,
+        'duration': args.duration,
+        'corpus': [name for name, _ in corpus],
+        'levels': results,
+        'rss_mb': sampler.samples if sampler else []
+    }
+    if report['rss_mb']:
+        peak = max(rss for _, rss in report['rss_mb'])
+        print(f"Server RSS: start {report['rss_mb'][0][1]}MB, peak {peak}MB, end {report['rss_mb'][-1][1]}MB")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+r"""
+Regex backend for field patterns: linear-time rewrites and timeouts.
+
+Field patterns are run with the `regex` package, which supports possessive
+quantifiers, atomic groups, \K and a per-call timeout. Each extractor pattern
+has a rewrite in SAFE_PATTERNS that finds the same matches:
+
+* quantifiers whose next token can never match what they consume are made
+  possessive, so a failed match does not retry every shorter split;
+* `\s+[class]+` where the class includes whitespace becomes `\s[class]+`,
+  which matches the same strings without trying each split of the spaces;
+* a run of local-part or address characters is only tried from its first
+  possible start. Every later start in the run would fail or match in the
+  same place, and trying each of them is what makes re quadratic there.
+
+With these rewrites scan time grows linearly with text size (see
+bench_regex.py). The timeout applies to each search for the next match, so
+a long document with many matches is scanned in full. A search that still
+exceeds it ends the scan of that pattern over that text, keeping the
+matches already found, and the caller is told so it can mark its result
+partial.
+
+Without the `regex` package, or with backend='re', patterns run unchanged
+on the standard library engine without timeouts.
+"""
+
+import logging
+import re
+import threading
+
+try:
+    import regex
+except ImportError:  # pragma: no cover - regex is in requirements.txt
+    regex = None
+
+logger = logging.getLogger(__name__)
+
+STREET_SUFFIXES = r'(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Place|Pl|Way|Circle|Cir)'
+
+# Character runs a local part or a number-led address cannot leave
+LOCAL_PART = r'[A-Za-z0-9._%+-]'
+ADDRESS_TEXT = r'[A-Za-z0-9\s,.-]'
+
+# Extractor pattern -> equivalent that scans in linear time on the regex backend
+SAFE_PATTERNS = {
+    # Email: only the first word boundary of a local part can start a match
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b':
+        r'(?:\G|(?<!' + LOCAL_PART + r'))(?>' + LOCAL_PART + r'*?\b)\K' +
+        LOCAL_PART + r'++@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    r'[A-Za-z0-9._%+-]+\s*@\s*[A-Za-z0-9.-]+\s*\.\s*[A-Z|a-z]{2,}':
+        r'(?:\G|(?<!' + LOCAL_PART + r'))' +
+        LOCAL_PART + r'++\s*+@\s*+[A-Za-z0-9.-]+\s*\.\s*+[A-Z|a-z]{2,}',
+    # Phone: bounded lengths already
+    r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}':
+        r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
+    r'\+?\d{1,3}[-.\s]?\d{3,4}[-.\s]?\d{3,4}[-.\s]?\d{3,4}':
+        r'\+?\d{1,3}[-.\s]?\d{3,4}[-.\s]?\d{3,4}[-.\s]?\d{3,4}',
+    r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b':
+        r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b',
+    r'\(\d{3}\)\s*\d{3}[-.\s]?\d{4}':
+        r'\(\d{3}\)\s*+\d{3}[-.\s]?\d{4}',
+    r'\+\d{1,3}\s?\d{3,4}\s?\d{3,4}\s?\d{3,4}':
+        r'\+\d{1,3}\s?\d{3,4}\s?\d{3,4}\s?\d{3,4}',
+    # Address: the free text can run on over many numbers, so only the first
+    # number in a run that could start a match is tried. Numbers with
+    # non-ASCII digits end the run, so they are tried on their own.
+    r'\d+\s+[A-Za-z0-9\s,.-]+' + STREET_SUFFIXES + r'(?:\s+[A-Za-z0-9\s,.-]*)?':
+        r'(?:\G|(?<!' + ADDRESS_TEXT + r')|(?<!\d)(?=\d*?[^\D0-9]))' +
+        r'(?>(?:[A-Za-z\s,.-]++|[0-9]++(?!\d|\s' + ADDRESS_TEXT + r'))*+)\K' +
+        r'\d++\s' + ADDRESS_TEXT + r'+' + STREET_SUFFIXES + r'(?:\s' + ADDRESS_TEXT + r'*+)?',
+    r'\d+\s+[A-Za-z\s]+' + STREET_SUFFIXES:
+        r'(?<!\d)\d++\s[A-Za-z\s]+' + STREET_SUFFIXES,
+    r'P\.?O\.?\s+Box\s+\d+':
+        r'P\.?O\.?\s++Box\s++\d++',
+    r'\d+\s+[A-Za-z\s]+,\s*[A-Za-z\s]+,\s*[A-Z]{2}\s+\d{5}':
+        r'(?<!\d)\d++\s[A-Za-z\s]++,[A-Za-z\s]++,\s*+[A-Z]{2}\s++\d{5}',
+}
+
+class PatternMatcher:
+    """Compiles and runs field patterns on the chosen engine"""
+
+    def __init__(self, backend='regex', timeout=1.0):
+        if backend == 'regex' and regex is None:
+            logger.warning("regex package not installed, using the re module without timeouts")
+            backend = 're'
+        self.backend = backend
+        self.timeout = timeout or None
+        self.compiled = {}
+        self.timeouts = 0
+        self.lock = threading.Lock()
+
+    def compile(self, pattern, flags=0):
+        key = (pattern, flags)
+        compiled = self.compiled.get(key)
+        if compiled is None:
+            if self.backend == 'regex':
+                regex_flags = ((regex.IGNORECASE if flags & re.IGNORECASE else 0) |
+                               (regex.MULTILINE if flags & re.MULTILINE else 0))
+                compiled = regex.compile(SAFE_PATTERNS.get(pattern, pattern), regex_flags)
+            else:
+                compiled = re.compile(pattern, flags)
+            self.compiled[key] = compiled
+        return compiled
+
+    def finditer(self, pattern, text, flags=0, on_timeout=None):
+        """Yield matches of `pattern` in `text`, stopping early on a timeout.
+
+        `on_timeout` is called when a search times out.
+        """
+        compiled = self.compile(pattern, flags)
+        if self.backend != 'regex':
+            yield from compiled.finditer(text)
+            return
+        pos = 0
+        while pos <= len(text):
+            try:
+                found = compiled.search(text, pos, timeout=self.timeout)
+            except TimeoutError:
+                with self.lock:
+                    self.timeouts += 1
+                logger.warning(f"Pattern timed out after {self.timeout}s at {pos} of {len(text)} chars: "
+                               f"{pattern[:40]}")
+                if on_timeout is not None:
+                    on_timeout()
+                return
+            if found is None:
+                return
+            yield found
+            # Like finditer, an empty match moves the next search on by one
+            pos = found.end() if found.end() > found.start() else found.end() + 1
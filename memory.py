@@ -0,0 +1,103 @@
+"""
+Peak memory accounting for extraction stages.
+
+A MemoryProbe measures how far memory rose above its starting level while a
+stage ran, in one of two modes:
+
+* 'tracemalloc' counts Python allocations. pdfminer and the field scans are
+  pure Python, so this covers nearly all extraction memory and attributes it
+  exactly, but tracing every allocation slows extraction noticeably;
+* 'rss' resets the kernel's peak resident set size through
+  /proc/self/clear_refs before the stage and reads VmHWM after it. It costs
+  two small /proc reads and a write, and includes memory outside Python. Where
+  the peak cannot be reset, the stage's peak is only known when it sets a new
+  high for the process, and otherwise the growth in RSS is reported as a
+  lower bound.
+
+Both are process-wide. They are exact when one extraction runs at a time per
+process, as in sandbox workers or a single-threaded prefork worker; with
+concurrent extractions in one process a stage's peak includes theirs.
+
+MemoryStats aggregates reported stages in the serving process, including
+the peak per extracted page, which is what container sizing needs.
+"""
+
+import os
+import re
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+CLEAR_REFS = '/proc/self/clear_refs'
+STATUS = '/proc/self/status'
+MODES = ('tracemalloc', 'rss')
+
+def _status_kb(*keys):
+    with open(STATUS) as status:
+        text = status.read()
+    return [int(re.search(key + r':\s+(\d+)', text).group(1)) for key in keys]
+
+class MemoryProbe:
+    """Measures the peak memory of extraction stages in this process"""
+
+    def __init__(self, mode='rss'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown memory accounting mode: {mode}. Choose from: {', '.join(MODES)}")
+        if mode == 'rss' and not os.path.exists(STATUS):
+            raise ValueError("RSS accounting needs /proc")
+        self.mode = mode
+        self.can_reset = mode == 'rss' and os.access(CLEAR_REFS, os.W_OK)
+        if mode == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, report):
+        """Record the stage's peak bytes above its start in report[name]"""
+        if self.mode == 'tracemalloc':
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            try:
+                yield
+            finally:
+                report[name] = max(0, tracemalloc.get_traced_memory()[1] - start)
+            return
+
+        if self.can_reset:
+            try:
+                with open(CLEAR_REFS, 'w') as clear_refs:
+                    clear_refs.write('5')
+            except OSError:
+                self.can_reset = False
+        start_rss, start_peak = _status_kb('VmRSS', 'VmHWM')
+        try:
+            yield
+        finally:
+            rss, peak = _status_kb('VmRSS', 'VmHWM')
+            if not self.can_reset and peak <= start_peak:
+                peak = rss
+            report[name] = max(0, peak - start_rss) * 1024
+
+class MemoryStats:
+    """Per-stage peaks reported by extractions, overall and per page"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+
+    def record(self, report, pages):
+        with self.lock:
+            for name, peak in report.items():
+                stage = self.stages.setdefault(name, {'count': 0, 'max_bytes': 0, 'total_bytes': 0,
+                                                      'max_bytes_per_page': 0})
+                stage['count'] += 1
+                stage['max_bytes'] = max(stage['max_bytes'], peak)
+                stage['total_bytes'] += peak
+                if pages:
+                    stage['max_bytes_per_page'] = max(stage['max_bytes_per_page'], peak // pages)
+
+    def metrics(self):
+        with self.lock:
+            return {name: {'count': stage['count'], 'max_bytes': stage['max_bytes'],
+                           'mean_bytes': stage['total_bytes'] // stage['count'],
+                           'max_bytes_per_page': stage['max_bytes_per_page']}
+                    for name, stage in self.stages.items()}
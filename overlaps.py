@@ -0,0 +1,90 @@
+"""
+Overlap resolution for matches of one field found by several patterns.
+
+The phone and address patterns overlap heavily: the same number is matched
+with and without its country code, and a street line is matched on its own
+and again as part of a full postal address. All patterns of a field are run
+over a piece of text first. The matches are then taken best first and each is
+kept only if it does not overlap one already kept, so every region of the
+text gives at most one value. Better means from a preferred pattern first,
+then longer, then earlier in the text, then from an earlier pattern, which
+makes the outcome independent of the order matches were found in.
+
+Matches are validated lazily in that order. One that overlaps a kept match is
+dropped without being validated, and a span found by several patterns is
+validated once. A match that fails validation does not block the shorter
+matches around it.
+
+Candidates are grouped into regions of transitively overlapping matches as
+the patterns find them (see overlap_regions), and each region is resolved
+on its own, which gives the same values as resolving a whole text at once.
+A caller that only needs the first few values stops scanning soon after
+them.
+"""
+
+import heapq
+from bisect import bisect_right
+
+class IntervalIndex:
+    """Disjoint half-open intervals, sorted by start"""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps(self, start, end):
+        i = bisect_right(self.starts, start)
+        if i and self.ends[i - 1] > start:
+            return True
+        return i < len(self.starts) and self.starts[i] < end
+
+    def add(self, start, end):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+def overlap_regions(streams):
+    """Group candidates into lists that overlap each other, in text order
+
+    `streams` are iterables of candidate tuples (see resolve_overlaps), each
+    in order of start, such as the matches of one pattern. They are merged
+    lazily: a region is yielded as soon as every stream has moved past its
+    end, so at most one candidate per stream is read ahead.
+    """
+    region = []
+    region_end = 0
+    for candidate in heapq.merge(*streams, key=lambda c: c[2]):
+        if region and candidate[2] >= region_end:
+            yield region
+            region = []
+        region.append(candidate)
+        region_end = max(region_end, candidate[3])
+    if region:
+        yield region
+
+def resolve_overlaps(candidates, validate, exclusive=True):
+    """Validated (value, start, end) for the best candidate of each region, in text order
+
+    `candidates` are (preference, pattern index, start, end, raw text) tuples,
+    where a lower preference wins. `validate` maps raw text to a value or None.
+    With exclusive=False overlapping matches are all kept, but each span is
+    still validated and returned once.
+    """
+    ranked = sorted(candidates, key=lambda c: (c[0], c[2] - c[3], c[2], c[1]))
+    index = IntervalIndex()
+    validated = set()
+    kept = []
+    for _, _, start, end, raw in ranked:
+        if (start, end) in validated or (exclusive and index.overlaps(start, end)):
+            continue
+        validated.add((start, end))
+        value = validate(raw)
+        if value:
+            kept.append((start, end, value))
+            if exclusive:
+                index.add(start, end)
+    kept.sort()
+    return [(value, start, end) for start, end, value in kept]
@@ -0,0 +1,123 @@
+"""
+Content-keyed cache of page text and field matches.
+
+A page's key is a SHA-256 over its geometry, its content streams and its
+resources (fonts, encodings, form XObjects, ...) resolved recursively. Object
+numbers are not part of the key, so the same page repeated within a document,
+reused in another document or carried over into an appended version of one
+gets the same key. Image data is left out since it cannot change the text.
+
+Field matches are memoized per page, by a digest of the page's text, so a
+page reused in any run of pages keeps its matches. Only the few lines
+around each page break are rescanned, for matches that cross it.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+from pdfminer.psparser import PSLiteral
+
+logger = logging.getLogger(__name__)
+
+# Dictionary entries that link outside the page or cannot affect its text
+SKIPPED_KEYS = {'Parent', 'Annots', 'Thumb', 'Metadata', 'PieceInfo', 'StructParents', 'B'}
+MAX_DEPTH = 12
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+def _update(digest, obj, memo, depth=0):
+    """Feed a canonical form of a PDF object into `digest`"""
+    if isinstance(obj, PDFObjRef):
+        if obj.objid not in memo:
+            if depth > MAX_DEPTH:
+                digest.update(b'R')
+                return
+            memo[obj.objid] = b'cycle'
+            sub = hashlib.sha256()
+            _update(sub, resolve1(obj), memo, depth + 1)
+            memo[obj.objid] = sub.digest()
+        digest.update(memo[obj.objid])
+    elif isinstance(obj, PDFStream):
+        digest.update(b'S')
+        _update(digest, obj.attrs, memo, depth + 1)
+        subtype = resolve1(obj.attrs.get('Subtype'))
+        if getattr(subtype, 'name', None) != 'Image':
+            digest.update(obj.get_data())
+    elif isinstance(obj, dict):
+        digest.update(b'D')
+        for key in sorted(obj):
+            if key not in SKIPPED_KEYS:
+                digest.update(str(key).encode() + b'=')
+                _update(digest, obj[key], memo, depth + 1)
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'L%d' % len(obj))
+        for item in obj:
+            _update(digest, item, memo, depth + 1)
+    elif isinstance(obj, PSLiteral):
+        digest.update(b'/' + str(obj.name).encode())
+    elif isinstance(obj, bytes):
+        digest.update(b'B%d:' % len(obj) + obj)
+    else:
+        digest.update(repr(obj).encode())
+
+class PageCache:
+    """Page text keyed by page content, and field matches keyed by scanned text"""
+
+    def __init__(self, max_pages=5000, max_segments=5000):
+        self.texts = LRUCache(max_pages)
+        self.matches = LRUCache(max_segments)
+
+    def page_key(self, page, memo):
+        """Content key of a pdfplumber page, or None if it cannot be hashed.
+
+        `memo` maps object numbers to digests within one document, so shared
+        resources such as fonts are hashed once per document.
+        """
+        try:
+            page_obj = page.page_obj
+            digest = hashlib.sha256(repr((page.bbox, page_obj.rotate)).encode())
+            _update(digest, page_obj.attrs.get('Contents'), memo)
+            _update(digest, page_obj.resources, memo)
+            return digest.hexdigest()
+        except Exception as e:
+            logger.debug(f"Could not hash page {getattr(page, 'page_number', '?')}: {e}")
+            return None
+
+    @staticmethod
+    def text_key(field, text):
+        return field, hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def stats(self):
+        return {'pages': self.texts.stats(), 'matches': self.matches.stats()}
@@ -0,0 +1,182 @@
+"""
+Parallel field scanning over windows of long documents.
+
+Field scans are pure CPU work over one string, so on long documents they
+are split across a pool of forked worker processes. Each run of text is cut
+into windows at page breaks where possible, otherwise at line breaks. A
+window's core is the text it owns; the window itself runs OVERLAP_CHARS
+further, to the end of a line, so matches that start near the end of the
+core are seen whole. A window only keeps matches that start inside its
+core, and a match that overlaps one kept from an earlier window is dropped
+as the tail of an entity that crosses the boundary.
+
+Names are found line by line and windows end on line breaks, so names
+come out exactly as in a serial scan. Pattern matches can only differ where
+one runs on for more than OVERLAP_CHARS past a window, which the validators
+reject anyway.
+
+Workers are forked so they inherit the extractor. Inside a daemonic process,
+such as a sandbox worker, and for text shorter than `min_chars`, scanning
+stays in the calling process.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from overlaps import IntervalIndex
+from shm_transport import SharedTexts, read_text
+
+logger = logging.getLogger(__name__)
+
+OVERLAP_CHARS = 2000
+
+_extractor = None
+
+def _init_worker(extractor):
+    global _extractor
+    _extractor = extractor
+
+def _scan_windows(field, texts):
+    """Matches of one field in each window, with offsets into the window, and pattern timeouts.
+
+    Windows are strings or SharedTexts descriptors.
+    """
+    timeouts = []
+    scanned = [list(_extractor.iter_field(field, [(0, text if isinstance(text, str) else read_text(text))],
+                                          lambda: timeouts.append(field)))
+               for text in texts]
+    return scanned, len(timeouts)
+
+class ParallelScanner:
+    """Scans runs of document text for a field across worker processes"""
+
+    def __init__(self, extractor, workers=4, window_chars=100000, min_chars=200000, shm_min_bytes=None):
+        self.extractor = extractor
+        self.workers = max(1, int(workers))
+        self.window_chars = window_chars
+        self.min_chars = min_chars
+        self.shm_min_bytes = shm_min_bytes
+        self.pool = None
+        self.lock = threading.Lock()
+        self.stats = {'scans': 0, 'windows': 0, 'shared': 0, 'failures': 0}
+
+        if 'fork' in multiprocessing.get_all_start_methods():
+            self._ctx = multiprocessing.get_context('fork')
+        else:
+            self._ctx = multiprocessing.get_context()
+
+    def windows(self, text, breaks=()):
+        """(start, core end, end) offsets of the windows covering `text`.
+
+        Cores tile the text. `breaks` are offsets where a page starts; a core
+        ends at the last one in its second half, else at the last line break.
+        """
+        windows = []
+        start = 0
+        breaks = sorted(breaks)
+        while start < len(text):
+            core_end = len(text)
+            if len(text) - start > self.window_chars:
+                target = start + self.window_chars
+                core_end = max((offset for offset in breaks
+                                if start + self.window_chars // 2 <= offset <= target), default=None)
+                if core_end is None:
+                    core_end = text.rfind('\n', start, target) + 1 or target
+            end = min(len(text), core_end + OVERLAP_CHARS)
+            if end < len(text):
+                end = text.find('\n', end) + 1 or len(text)
+            windows.append((start, core_end, end))
+            start = core_end
+        return windows
+
+    def should_split(self, texts):
+        return (sum(len(text) for text in texts) >= self.min_chars and
+                not multiprocessing.current_process().daemon)
+
+    def _get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._ctx,
+                                                initializer=_init_worker, initargs=(self.extractor,))
+            return self.pool
+
+    def scan(self, field, texts, breaks=None, on_timeout=None):
+        """Matches of `field` in each text, as lists of (value, start, end)
+
+        `breaks` optionally gives the page start offsets within each text.
+        Windows go to workers as shared memory descriptors when the texts
+        reach `shm_min_bytes`. Falls back to scanning in this process if
+        the pool breaks. `on_timeout` is called once if a pattern search
+        timed out in any window.
+        """
+        breaks = breaks or [()] * len(texts)
+        jobs = [(i, window) for i, text in enumerate(texts) for window in self.windows(text, breaks[i])]
+        shared = None
+        if self.shm_min_bytes is not None and sum(len(text) for text in texts) >= self.shm_min_bytes:
+            try:
+                shared = SharedTexts(texts)
+            except OSError as e:
+                logger.warning(f"Sending scan windows inline: {e}")
+        # Short texts, such as runs of pages left by the prefilter, are
+        # batched so each task carries about a window's worth of text
+        batches = [[]]
+        size = 0
+        for i, (start, _, end) in jobs:
+            if size >= self.window_chars:
+                batches.append([])
+                size = 0
+            batches[-1].append(shared.ref(i, start, end) if shared else texts[i][start:end])
+            size += end - start
+        with self.lock:
+            self.stats['scans'] += 1
+            self.stats['windows'] += len(jobs)
+            self.stats['shared'] += shared is not None
+
+        timeouts = []
+        try:
+            pool = self._get_pool()
+            scanned = []
+            for batch, batch_timeouts in pool.map(_scan_windows, [field] * len(batches), batches):
+                scanned.extend(batch)
+                timeouts += [field] * batch_timeouts
+        except BrokenProcessPool as e:
+            logger.warning(f"Parallel scan failed, scanning serially: {e}")
+            with self.lock:
+                self.stats['failures'] += 1
+                self.pool = None
+            timeouts = []
+            scanned = [list(self.extractor.iter_field(field, [(0, texts[i][start:end])],
+                                                      lambda: timeouts.append(field)))
+                       for i, (start, _, end) in jobs]
+        finally:
+            if shared:
+                shared.close()
+        if timeouts and on_timeout is not None:
+            on_timeout()
+
+        merged = [[] for _ in texts]
+        index = None
+        last = None
+        for (i, (start, core_end, _)), matches in zip(jobs, scanned):
+            if i != last:
+                index, last = IntervalIndex(), i
+            kept = []
+            for value, match_start, match_end in matches:
+                match_start += start
+                match_end += start
+                if match_start < core_end and not index.overlaps(match_start, match_end):
+                    kept.append((value, match_start, match_end))
+            for _, match_start, match_end in kept:
+                if not index.overlaps(match_start, match_end):
+                    index.add(match_start, match_end)
+            merged[i].extend(kept)
+        return merged
+
+    def shutdown(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,112 @@
+"""
+Per-page feature index used to skip field scans on pages that cannot match.
+
+While text is extracted, each page gets a handful of cheap features: the '@'
+count, whether it has a '.', digit count and runs of three or more digits,
+and how many lines start with two capitalized tokens. Every field has a minimum
+requirement over those features (an email needs an '@', a phone at least
+ten digits, and so on). Field scanners then run only over the runs of
+consecutive pages that meet it.
+
+Matches are looked for within those runs, so a match that would continue
+across a page break into a page that cannot hold the field is not found.
+The index also records where each page starts in the document text, which
+is how matches are mapped back to page numbers.
+"""
+
+import re
+
+DIGIT_RUN_PATTERN = re.compile(r'\d+')
+NON_WORD_PATTERN = re.compile(r'[^\w]')
+
+def _capitalized(token):
+    """Same test the name extractor applies to each word of a name"""
+    word = NON_WORD_PATTERN.sub('', token)
+    return len(word) > 1 and word[0].isupper() and word[1:].islower() and word.isalpha()
+
+class PageFeatures:
+    """Cheap features of one page's extracted text"""
+
+    __slots__ = ('page_number', 'start', 'text', 'at_count', 'has_dot', 'digit_count',
+                 'digit_runs', 'capitalized_lines')
+
+    def __init__(self, page_number, text, start=0):
+        self.page_number = page_number
+        self.start = start
+        self.text = text
+        self.at_count = text.count('@')
+        self.has_dot = '.' in text
+        runs = DIGIT_RUN_PATTERN.findall(text)
+        self.digit_count = sum(len(run) for run in runs)
+        self.digit_runs = sum(1 for run in runs if len(run) >= 3)
+        # Names are always the first words of a line
+        self.capitalized_lines = 0
+        for line in text.split('\n'):
+            tokens = line.split(None, 2)
+            if len(tokens) >= 2 and _capitalized(tokens[0]) and _capitalized(tokens[1]):
+                self.capitalized_lines += 1
+
+    def can_contain(self, field):
+        """Whether this page could hold a value of the given output field"""
+        if field == 'names':
+            return self.capitalized_lines > 0
+        if field == 'emails':
+            return self.at_count > 0 and self.has_dot
+        if field == 'phones':
+            # Every phone pattern needs ten digits, three of them in a row
+            return self.digit_count >= 10 and self.digit_runs > 0
+        if field == 'addresses':
+            # Street numbers, PO boxes and ZIP codes all need a digit
+            return self.digit_count > 0
+        return True
+
+class PageIndex:
+    """Features of every page of one document, in text order
+
+    With `prefilter` off the index only tracks page offsets and every field
+    is scanned over the whole text.
+    """
+
+    def __init__(self, prefilter=True):
+        self.prefilter = prefilter
+        self.pages = []
+        self.skipped = {}
+        self.length = 0
+
+    def add(self, page_number, text):
+        """Record the text a page contributed to the document text"""
+        self.pages.append(PageFeatures(page_number, text, self.length))
+        self.length += len(text)
+
+    def page_starts(self):
+        """(start offset, page number) for every page, in text order"""
+        return [(page.start, page.page_number) for page in self.pages]
+
+    def segments(self, field):
+        """(start offset, text) of each run of consecutive pages that can contain `field`"""
+        segments = []
+        run = []
+        skipped = 0
+        for page in self.pages:
+            if not self.prefilter or page.can_contain(field):
+                run.append(page)
+            else:
+                skipped += 1
+                if run:
+                    segments.append((run[0].start, ''.join(run_page.text for run_page in run)))
+                    run = []
+        if run:
+            segments.append((run[0].start, ''.join(run_page.text for run_page in run)))
+        self.skipped[field] = skipped
+        return segments
+
+    def stats(self):
+        """Pages skipped per field for the fields scanned so far"""
+        return {
+            field: {
+                'pages': len(self.pages),
+                'skipped': skipped,
+                'skip_rate': round(skipped / len(self.pages), 3) if self.pages else 0.0
+            }
+            for field, skipped in self.skipped.items()
+        }
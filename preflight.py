@@ -0,0 +1,192 @@
+"""
+Cheap pre-flight inspection of PDF files before full text extraction.
+
+PyPDF2 only needs the trailer, the cross-reference table and the page tree
+to report the page count and encryption status, and each page's content
+stream can be scanned for text-showing operators without any layout
+analysis. That is enough to reject documents we cannot extract, skip pages
+that carry no text, and estimate what a full pdfplumber pass will cost.
+
+Files on disk can be opened memory-mapped: parser reads then come straight
+from the OS page cache instead of through a per-process read buffer, and
+workers reading the same file share its pages.
+"""
+
+import logging
+import mmap
+import os
+import re
+from contextlib import contextmanager, nullcontext
+
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+# A string operand followed by one of the text-showing operators Tj, TJ, ' or "
+TEXT_SHOW_PATTERN = re.compile(rb'[)\]>]\s*(?:Tj|TJ|\'|")')
+
+# Cost model in "page units": one plain text page is roughly 1.0
+PAGE_BASE_COST = 1.0
+COST_PER_CONTENT_KB = 0.05
+NON_TEXT_PAGE_COST = 0.1
+
+def open_binary(source, mapped=False):
+    """Open a path for reading, or rewind an already open binary file object.
+
+    Used as a context manager; file objects passed in are left open. With
+    `mapped`, a path is opened as a read-only mmap, which parsers read like
+    a file.
+    """
+    if hasattr(source, 'read'):
+        source.seek(0)
+        return nullcontext(source)
+    if mapped:
+        return _map_file(source)
+    return open(source, 'rb')
+
+@contextmanager
+def _map_file(path):
+    with open(path, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            yield file
+            return
+        try:
+            yield data
+        finally:
+            try:
+                data.close()
+            except BufferError:
+                # A parser still holds a view; the mapping goes with it
+                pass
+
+def source_size(source):
+    """Size in bytes of a path or seekable binary file object"""
+    if hasattr(source, 'read'):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+        return size
+    return os.path.getsize(source)
+
+class PreflightReport:
+    """What pre-flight learned about a PDF without extracting its text"""
+
+    def __init__(self, file_size=0):
+        self.file_size = file_size
+        self.page_count = 0
+        self.encrypted = False
+        self.needs_password = False
+        self.text_pages = []
+        self.content_bytes = 0
+        self.estimated_cost = 0.0
+        self.error = None
+
+    @property
+    def text_page_numbers(self):
+        """1-based numbers of the pages that draw text"""
+        return [number for number, has_text in enumerate(self.text_pages, 1) if has_text]
+
+    @property
+    def image_only(self):
+        """True when every inspected page lacks text operators"""
+        return bool(self.text_pages) and not any(self.text_pages)
+
+    def to_dict(self):
+        return {
+            'file_size': self.file_size,
+            'page_count': self.page_count,
+            'encrypted': self.encrypted,
+            'needs_password': self.needs_password,
+            'text_pages': len(self.text_page_numbers),
+            'image_only': self.image_only,
+            'estimated_cost': round(self.estimated_cost, 2),
+            'error': self.error
+        }
+
+def _stream_data(obj):
+    obj = obj.get_object()
+    if isinstance(obj, PyPDF2.generic.ArrayObject):
+        return b''.join(_stream_data(part) for part in obj)
+    return obj.get_data()
+
+def _form_xobjects(resources):
+    """Yield Form XObjects referenced from a resource dictionary"""
+    if not resources:
+        return
+    xobjects = resources.get_object().get('/XObject')
+    if not xobjects:
+        return
+    for xobject in xobjects.get_object().values():
+        xobject = xobject.get_object()
+        if xobject.get('/Subtype') == '/Form':
+            yield xobject
+
+def _draws_text(data, resources, depth=0):
+    if TEXT_SHOW_PATTERN.search(data):
+        return True
+    # Text may live in Form XObjects painted from the page
+    if depth < 2:
+        for form in _form_xobjects(resources):
+            if _draws_text(form.get_data(), form.get('/Resources'), depth + 1):
+                return True
+    return False
+
+def inspect_pdf(pdf_path, max_pages=None, mapped=False):
+    """Inspect a PDF (path or binary file object) and return a PreflightReport.
+
+    Per-page content is only scanned when the page count is within
+    `max_pages`; parse failures are recorded in `report.error` rather than
+    raised, since pdfplumber may still cope with files PyPDF2 rejects.
+    `mapped` opens a path through mmap.
+    """
+    report = PreflightReport(source_size(pdf_path))
+
+    try:
+        with open_binary(pdf_path, mapped=mapped) as file:
+            reader = PyPDF2.PdfReader(file, strict=False)
+
+            report.encrypted = reader.is_encrypted
+            if report.encrypted:
+                # Files with only an owner password open with an empty user password
+                try:
+                    report.needs_password = not reader.decrypt('')
+                except Exception:
+                    report.needs_password = True
+                if report.needs_password:
+                    return report
+
+            # /Count on the root of the page tree avoids walking it
+            report.page_count = int(reader.trailer['/Root']['/Pages']['/Count'])
+            if max_pages and report.page_count > max_pages:
+                return report
+
+            for page in reader.pages:
+                contents = page.get('/Contents')
+                data = _stream_data(contents) if contents is not None else b''
+                has_text = _draws_text(data, page.get('/Resources'))
+                report.text_pages.append(has_text)
+                report.content_bytes += len(data)
+                if has_text:
+                    report.estimated_cost += PAGE_BASE_COST + len(data) / 1024 * COST_PER_CONTENT_KB
+                else:
+                    report.estimated_cost += NON_TEXT_PAGE_COST
+    except Exception as e:
+        report.error = f"{type(e).__name__}: {e}"
+        logger.info(f"Pre-flight could not inspect {pdf_path}: {report.error}")
+
+    return report
+
+def route_document(report, max_pages=None, fast_cost=None, reject_image_only=True):
+    """Decide what to do with a document: ('reject', message), ('fast', None) or ('queue', None)"""
+    if report.needs_password:
+        return 'reject', 'PDF is password protected.'
+    if max_pages and report.page_count > max_pages:
+        return 'reject', f'PDF has {report.page_count} pages; the limit is {max_pages}.'
+    if reject_image_only and report.image_only:
+        return 'reject', 'PDF contains no extractable text (it may be a scanned image).'
+    if report.error is None and fast_cost and report.estimated_cost <= fast_cost:
+        return 'fast', None
+    return 'queue', None
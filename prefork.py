@@ -0,0 +1,237 @@
+"""
+Pre-forking process supervisor for the production server.
+
+The parent binds the listening socket and imports the app (and with it the
+PDFDataExtractor and all of pdfplumber/pdfminer) once, then forks worker
+processes that share that memory copy-on-write and all accept from the same
+socket, each running its own waitress server. The parent restarts workers
+that exit and handles signals:
+
+    SIGTERM / SIGINT   stop workers gracefully, then exit
+    SIGHUP             graceful reload: re-exec the parent so new code is
+                       loaded, keeping the listening socket and the old
+                       workers, then replace the workers one at a time,
+                       starting each new one before stopping an old one
+    SIGTTIN / SIGTTOU  add / remove one worker
+
+`post_fork`, if given, is called in each worker before its server starts
+any threads, for setup that must not be shared between workers, such as
+forking the extraction sandbox.
+
+A worker told to stop closes its copy of the listening socket, finishes
+the requests it has already accepted for up to `graceful_timeout` seconds,
+then exits; new connections go to the other workers or wait in the backlog.
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Set on re-exec so the new parent reuses the already-bound socket and
+# replaces the workers it inherits
+LISTEN_FD_ENV = 'PREFORK_LISTEN_FD'
+WORKERS_ENV = 'PREFORK_WORKERS'
+
+# Seconds past graceful_timeout before a worker that has not exited is killed
+EXIT_GRACE = 5
+# Seconds a stopping worker waits for the first request on a new connection
+IDLE_GRACE = 1
+
+class PreforkServer:
+    """Supervise `workers` forked waitress processes serving `app`"""
+
+    def __init__(self, app, host='0.0.0.0', port=5000, workers=2, threads=4,
+                 graceful_timeout=30, backlog=1024, post_fork=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, int(workers))
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.post_fork = post_fork
+
+        self.sock = None
+        self.children = {}
+        self._stopping = False
+        self._reloading = False
+
+    def _listen(self):
+        inherited = os.environ.pop(LISTEN_FD_ENV, None)
+        if inherited:
+            sock = socket.socket(fileno=int(inherited))
+            logger.warning(f"Reusing inherited listening socket on fd {inherited}")
+            return sock
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        return sock
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.time()
+            return pid
+
+        # Worker process
+        exit_code = 0
+        try:
+            for sig in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+                signal.signal(sig, signal.SIG_IGN)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            stop = []
+            signal.signal(signal.SIGTERM, lambda signum, frame: stop.append(time.time()))
+
+            if self.post_fork is not None:
+                self.post_fork()
+            from waitress import create_server
+            server = create_server(self.app, sockets=[self.sock], threads=self.threads,
+                                   ident='pdf-data-extractor')
+            _serve(server, stop, self.graceful_timeout)
+        except BaseException:
+            logger.exception("Worker crashed")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _stop_children(self, pids):
+        """SIGTERM the given workers and SIGKILL any still alive after the timeout"""
+        for pid in pids:
+            _signal(pid, signal.SIGTERM)
+        deadline = time.time() + self.graceful_timeout + EXIT_GRACE
+        remaining = set(pids)
+        while remaining and time.time() < deadline:
+            self._reap(remaining)
+            time.sleep(0.1)
+        for pid in remaining:
+            _signal(pid, signal.SIGKILL)
+        if remaining:
+            self._reap(remaining, block=True)
+
+    def _reap(self, waiting=None, block=False):
+        """Collect exited workers; return how many exited"""
+        exited = 0
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started = self.children.pop(pid, None)
+            if waiting is not None:
+                waiting.discard(pid)
+            exited += 1
+            if not self._stopping and started is not None:
+                logger.warning(f"Worker {pid} exited with status {status}")
+                # Back off if workers die right after starting
+                if time.time() - started < 1:
+                    time.sleep(1)
+            if block and waiting is not None and not waiting:
+                break
+        return exited
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self._reloading = True
+        self._stopping = True
+
+    def _handle_more(self, signum, frame):
+        self.workers += 1
+
+    def _handle_fewer(self, signum, frame):
+        self.workers = max(1, self.workers - 1)
+
+    def _replace_inherited(self, pids):
+        """After a reload, swap the previous workers for new ones one at a time"""
+        for pid in pids:
+            self.children[pid] = time.time()
+        for pid in pids:
+            if self._stopping:
+                break
+            if pid in self.children:
+                self._spawn()
+                self._stop_children([pid])
+        if pids:
+            logger.warning(f"Reload replaced {len(pids)} workers")
+
+    def run(self):
+        """Bind, fork the workers and supervise them until told to stop"""
+        inherited = [int(pid) for pid in os.environ.pop(WORKERS_ENV, '').split(',') if pid]
+        self.sock = self._listen()
+
+        # Keep the preloaded objects out of the garbage collector's reach so
+        # collections in the workers do not touch (and copy) shared pages
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        signal.signal(signal.SIGTTIN, self._handle_more)
+        signal.signal(signal.SIGTTOU, self._handle_fewer)
+
+        print(f"   Prefork master {os.getpid()} on http://{self.host}:{self.sock.getsockname()[1]} "
+              f"with {self.workers} workers x {self.threads} threads")
+
+        self._replace_inherited(inherited)
+        while not self._stopping:
+            self._reap()
+            while len(self.children) < self.workers and not self._stopping:
+                self._spawn()
+            if len(self.children) > self.workers:
+                oldest = min(self.children, key=self.children.get)
+                self._stop_children([oldest])
+            time.sleep(0.5)
+
+        if self._reloading:
+            # The workers keep serving; exec keeps the pid, so they stay our children
+            logger.warning("Reloading: re-executing the master process")
+            self.sock.set_inheritable(True)
+            os.environ[LISTEN_FD_ENV] = str(self.sock.fileno())
+            os.environ[WORKERS_ENV] = ','.join(str(pid) for pid in self.children)
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+
+        self._stop_children(list(self.children))
+        self.sock.close()
+
+def _serve(server, stop, graceful_timeout):
+    """Run a waitress server until `stop` gets the time of a SIGTERM, then drain it.
+
+    Responses are written by the server loop, so it keeps running while
+    accepted requests finish. Connections are closed once idle; one that has
+    not sent anything yet gets IDLE_GRACE seconds for its request to arrive.
+    """
+    from waitress import wasyncore
+    adj = server.adj
+    while not stop:
+        wasyncore.loop(timeout=adj.asyncore_loop_timeout, map=server._map, use_poll=adj.asyncore_use_poll, count=1)
+
+    # Only this process's copy of the listening socket is closed
+    wasyncore.dispatcher.close(server)
+    deadline = stop[0] + graceful_timeout
+    while server.active_channels and time.time() < deadline:
+        now = time.time()
+        for channel in list(server.active_channels.values()):
+            if (not channel.requests and channel.request is None and
+                    (channel.last_activity > channel.creation_time or now - channel.creation_time > IDLE_GRACE)):
+                channel.close_when_flushed = True
+        wasyncore.loop(timeout=0.1, map=server._map, use_poll=adj.asyncore_use_poll, count=1)
+    if server.active_channels:
+        logger.warning(f"Worker {os.getpid()} stopping with {len(server.active_channels)} connections open")
+    server.task_dispatcher.shutdown(timeout=max(0, deadline - time.time()))
+
+def _signal(pid, sig):
+    try:
+        os.kill(pid, sig)
+    except ProcessLookupError:
+        pass
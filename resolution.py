@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Cross-document contact resolution with blocking keys.
+
+The same person turns up in many documents with a different phone format,
+email casing or middle initial each time. Each document's matches are first
+grouped into records: a record starts at each name, collects the emails,
+phones and addresses that follow it on the same page, and a document with
+a single name is one record. Records are then merged across documents
+without comparing every pair:
+
+* strong keys, a normalized email or the last ten digits of a phone number,
+  merge every record that carries them. A key seen with more than
+  `max_key_names` different names, such as a company switchboard or an
+  info@ address, identifies an organisation rather than a person and
+  merges nothing;
+* a name key, the sorted name tokens without initials, titles or suffixes,
+  is too common to merge on alone, so it is paired with each of the
+  record's address keys (house number and street word). Records sharing a
+  name and an address merge, and two different John Smiths stay apart.
+
+Records are only ever grouped by equal keys, never compared pair by pair,
+so resolution time grows linearly with the number of entities (see
+bench_resolution.py). Merges are kept in a union-find forest and each
+resulting cluster becomes one contact.
+
+Usage:
+    python resolution.py --store data/documents.db --output contacts.json
+    python resolution.py test_pdfs/*.pdf
+"""
+
+import argparse
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+
+from store import normalize
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'dr', 'mr', 'mrs', 'ms', 'prof', 'phd', 'md'}
+NAME_TOKEN_PATTERN = re.compile(r'[a-z]+')
+ADDRESS_KEY_PATTERN = re.compile(r'(\d+)\s+([a-z]+)')
+MIN_PHONE_DIGITS = 7
+
+def email_key(value):
+    return 'e:' + normalize('emails', value)
+
+def phone_key(value):
+    digits = normalize('phones', value)
+    return 'p:' + digits[-10:] if len(digits) >= MIN_PHONE_DIGITS else None
+
+def name_key(value):
+    tokens = sorted(token for token in NAME_TOKEN_PATTERN.findall(value.casefold())
+                    if len(token) > 1 and token not in NAME_SUFFIXES)
+    return 'n:' + ' '.join(tokens) if tokens else None
+
+def address_key(value):
+    match = ADDRESS_KEY_PATTERN.search(normalize('addresses', value))
+    return match.group(1) + ' ' + match.group(2) if match else None
+
+class ContactResolver:
+    """Collects records from documents and merges them into contacts"""
+
+    FIELDS = ('names', 'emails', 'phones', 'addresses')
+
+    def __init__(self, max_key_names=3):
+        self.max_key_names = max_key_names
+        self.records = []
+        self.stats = {'records': 0, 'entities': 0, 'shared_keys': 0, 'contacts': 0}
+
+    def add_document(self, document_id, results):
+        """Add a ResultSet, or a {'names': [...], ...} dict from extract_structured_data"""
+        if hasattr(results, 'matches'):
+            self.add_matches(document_id, results.matches())
+        else:
+            self.add_values(document_id, results)
+
+    def add_values(self, document_id, data):
+        """Add values without positions; they are one record if there is at most one name"""
+        names = data.get('names', [])
+        if len(names) <= 1:
+            self.add_record(document_id, {field: data.get(field, []) for field in self.FIELDS})
+            return
+        # Which email belongs to which name is unknown, so each value stands alone
+        for field in self.FIELDS:
+            for value in data.get(field, []):
+                self.add_record(document_id, {field: [value]})
+
+    def add_matches(self, document_id, matches):
+        """Add (field, value, page, start, end) matches, grouped into records by position"""
+        matches = sorted(matches, key=lambda match: match[3])
+        if sum(1 for match in matches if match[0] == 'names') <= 1:
+            record = defaultdict(list)
+            for field, value, *_ in matches:
+                record[field].append(value)
+            self.add_record(document_id, record)
+            return
+        record, page = defaultdict(list), None
+        for field, value, match_page, *_ in matches:
+            if record and (field == 'names' or match_page != page):
+                self.add_record(document_id, record)
+                record = defaultdict(list)
+            record[field].append(value)
+            page = match_page
+        if record:
+            self.add_record(document_id, record)
+
+    def add_record(self, document_id, fields):
+        values = {field: list(dict.fromkeys(fields.get(field, ()))) for field in self.FIELDS}
+        if any(values.values()):
+            self.records.append((document_id, values))
+            self.stats['records'] += 1
+            self.stats['entities'] += sum(len(field_values) for field_values in values.values())
+
+    def resolve(self):
+        """Contacts, largest first, as dicts of field values and document ids"""
+        parent = list(range(len(self.records)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            i, j = find(i), find(j)
+            if i != j:
+                parent[max(i, j)] = min(i, j)
+
+        strong = defaultdict(list)
+        key_names = defaultdict(set)
+        name_addresses = {}
+        # (key, value) per email and phone, reused for the contacts' distinct values
+        keyed = []
+        for i, (_, values) in enumerate(self.records):
+            names = {key for key in map(name_key, values['names']) if key}
+            record_keyed = ([(email_key(value), value) for value in values['emails']] +
+                            [(phone_key(value) or value, value) for value in values['phones']])
+            keyed.append(record_keyed)
+            keys = {key for key, value in record_keyed if key != value}
+            for key in keys:
+                strong[key].append(i)
+                key_names[key].update(names)
+            for address in {key for key in map(address_key, values['addresses']) if key}:
+                for name in names:
+                    union(name_addresses.setdefault((name, address), i), i)
+
+        for key, members in strong.items():
+            if len(key_names[key]) > self.max_key_names:
+                self.stats['shared_keys'] += 1
+                continue
+            for i in members[1:]:
+                union(members[0], i)
+
+        clusters = defaultdict(list)
+        for i in range(len(self.records)):
+            clusters[find(i)].append(i)
+        contacts = [self._contact(members, keyed) for members in clusters.values()]
+        contacts.sort(key=lambda contact: (-len(contact['documents']), contact['name'] or ''))
+        self.stats['contacts'] = len(contacts)
+        return contacts
+
+    def _contact(self, members, keyed):
+        """Canonical contact for a cluster: most frequent name, distinct values by key"""
+        names = Counter()
+        contact_keyed = {}
+        addresses = {}
+        documents = []
+        for i in members:
+            document_id, record = self.records[i]
+            documents.append(document_id)
+            names.update(record['names'])
+            for key, value in keyed[i]:
+                contact_keyed.setdefault(key, value)
+            for value in record['addresses']:
+                addresses.setdefault(normalize('addresses', value), value)
+        return {
+            'name': names.most_common(1)[0][0] if names else None,
+            'names': list(names),
+            'emails': [value for key, value in contact_keyed.items() if key.startswith('e:')],
+            'phones': [value for key, value in contact_keyed.items() if not key.startswith('e:')],
+            'addresses': list(addresses.values()),
+            'documents': list(dict.fromkeys(documents)),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('pdfs', nargs='*', help='PDF files to extract and resolve')
+    parser.add_argument('--store', help='resolve the documents in a DOCUMENT_STORE database')
+    parser.add_argument('--output', help='write contacts as JSON to this file instead of stdout')
+    args = parser.parse_args()
+    if not args.pdfs and not args.store:
+        parser.error('give PDF files or --store')
+
+    resolver = ContactResolver()
+    if args.store:
+        from store import DocumentStore
+        for document_id, matches in DocumentStore(args.store).iter_documents():
+            resolver.add_matches(document_id, matches)
+    if args.pdfs:
+        from app import run_extraction
+        for path in args.pdfs:
+            _, results, _ = run_extraction(path)
+            resolver.add_document(path, results)
+
+    contacts = resolver.resolve()
+    output = json.dumps({'contacts': contacts, 'stats': resolver.stats}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+        print(f"{len(contacts)} contacts from {resolver.stats['records']} records written to {args.output}")
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
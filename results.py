@@ -0,0 +1,125 @@
+"""
+Compact extraction results with page and offset provenance.
+
+A ResultSet keeps every match as one row across parallel integer arrays:
+field code, value id, page number and the [start, end) character span into
+the document text. The text itself is shared, not copied, and each distinct
+value is stored once however often it occurs. `to_dict` gives the usual
+{'names': [...], ...} shape and `to_provenance` adds where every value was
+found, so a client can highlight matches without searching again.
+"""
+
+from array import array
+from bisect import bisect_right
+
+class ResultSet:
+    """Matches for one document, in the order the extractors found them"""
+
+    __slots__ = ('text', 'fields', '_page_starts', '_page_numbers', '_values', '_value_ids',
+                 '_distinct', '_field', '_value', '_page', '_start', '_end')
+
+    def __init__(self, text, fields, pages=None):
+        """`fields` are output keys in order; `pages` lists (start offset, page number)"""
+        self.text = text
+        self.fields = list(fields)
+        pages = list(pages or ())
+        self._page_starts = array('q', (start for start, _ in pages))
+        self._page_numbers = array('l', (number for _, number in pages))
+        self._values = []
+        self._value_ids = {}
+        self._distinct = [array('l') for _ in self.fields]
+        self._field = array('B')
+        self._value = array('l')
+        self._page = array('l')
+        self._start = array('q')
+        self._end = array('q')
+
+    # Integer arrays that hold every page and match; see export_state
+    ARRAYS = ('_page_starts', '_page_numbers', '_field', '_value', '_page', '_start', '_end')
+
+    def export_state(self):
+        """(fields, values, arrays) to rebuild the set around the same text.
+
+        `arrays` maps names to the integer arrays behind the matches, so a
+        transport can move them as raw buffers.
+        """
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays.update((f'_distinct{code}', distinct) for code, distinct in enumerate(self._distinct))
+        return self.fields, self._values, arrays
+
+    @classmethod
+    def from_state(cls, text, fields, values, arrays):
+        """Inverse of export_state"""
+        results = cls(text, fields)
+        for name in cls.ARRAYS:
+            setattr(results, name, arrays[name])
+        results._distinct = [arrays[f'_distinct{code}'] for code in range(len(results.fields))]
+        results._values = list(values)
+        results._value_ids = {(code, results._values[value_id]): value_id
+                              for code, distinct in enumerate(results._distinct) for value_id in distinct}
+        return results
+
+    def add(self, field, value, start, end):
+        """Record one match; returns True if the value is new for the field"""
+        code = self.fields.index(field)
+        key = (code, value)
+        value_id = self._value_ids.get(key)
+        is_new = value_id is None
+        if is_new:
+            value_id = len(self._values)
+            self._values.append(value)
+            self._value_ids[key] = value_id
+            self._distinct[code].append(value_id)
+        self._field.append(code)
+        self._value.append(value_id)
+        self._page.append(self.page_at(start))
+        self._start.append(start)
+        self._end.append(end)
+        return is_new
+
+    def page_at(self, offset):
+        """Page number holding a text offset, or 0 when pages are unknown"""
+        i = bisect_right(self._page_starts, offset) - 1
+        return self._page_numbers[i] if i >= 0 else 0
+
+    def page_spans(self):
+        """(page number, start, end) of each page's text; one unnumbered span without pages"""
+        if not self._page_starts:
+            return [(None, 0, len(self.text))]
+        ends = list(self._page_starts[1:]) + [len(self.text)]
+        return list(zip(self._page_numbers, self._page_starts, ends))
+
+    def count(self, field):
+        """Number of distinct values found for a field"""
+        return len(self._distinct[self.fields.index(field)])
+
+    def __len__(self):
+        return len(self._value)
+
+    def __getitem__(self, field):
+        return [self._values[value_id] for value_id in self._distinct[self.fields.index(field)]]
+
+    def matches(self):
+        """Every match as (field, value, page, start, end)"""
+        for code, value_id, page, start, end in zip(self._field, self._value, self._page,
+                                                    self._start, self._end):
+            yield self.fields[code], self._values[value_id], page or None, start, end
+
+    def to_dict(self):
+        """Distinct values per field, e.g. {'emails': ['a@b.com'], ...}"""
+        values = self._values
+        return {field: [values[value_id] for value_id in distinct]
+                for field, distinct in zip(self.fields, self._distinct)}
+
+    def to_provenance(self):
+        """Distinct values per field, each with the page and span of every occurrence.
+
+        Spans are [start, end) offsets into the full extracted text.
+        """
+        occurrences = {}
+        for value_id, page, start, end in zip(self._value, self._page, self._start, self._end):
+            occurrences.setdefault(value_id, []).append({'page': page or None, 'start': start, 'end': end})
+        values = self._values
+        return {field: [{'value': values[value_id], 'occurrences': occurrences[value_id]}
+                        for value_id in distinct]
+                for field, distinct in zip(self.fields, self._distinct)}
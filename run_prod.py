@@ -2,12 +2,16 @@
 """
 Production server runner
 Sets environment to production mode and starts the server
+
+Set WEB_WORKERS above 1 to run in prefork mode: the app is loaded once and
+WEB_WORKERS processes share it copy-on-write and serve the same socket
+(see prefork.py). Send SIGHUP to the master for a graceful reload.
 """
 
 import os
 os.environ['FLASK_ENV'] = 'production'
 
-from app import app
+from app import app, start_sandbox
 
 if __name__ == '__main__':
     print("🏭 Starting in PRODUCTION mode")
@@ -16,14 +20,30 @@ if __name__ == '__main__':
     print("   - Minimal logging")
     print("   - Production optimized")
     print()
-    
+
     port = int(os.environ.get('PORT', 5000))
-    
+    workers = int(os.environ.get('WEB_WORKERS', 1))
+    threads = int(os.environ.get('WEB_THREADS', 4))
+
     try:
         from waitress import serve
-        print(f"   Server running on http://0.0.0.0:{port}")
-        serve(app, host='0.0.0.0', port=port)
     except ImportError:
         print("   ERROR: Waitress not installed!")
         print("   Run: pip install waitress")
         app.run(host='0.0.0.0', port=port, debug=False)
+    else:
+        if workers > 1 and hasattr(os, 'fork'):
+            from prefork import PreforkServer
+            PreforkServer(
+                app,
+                host='0.0.0.0',
+                port=port,
+                workers=workers,
+                threads=threads,
+                graceful_timeout=float(os.environ.get('GRACEFUL_TIMEOUT', 30)),
+                post_fork=start_sandbox
+            ).run()
+        else:
+            print(f"   Server running on http://0.0.0.0:{port}")
+            start_sandbox()
+            serve(app, host='0.0.0.0', port=port, threads=threads)
@@ -0,0 +1,253 @@
+"""
+Supervised child processes for running PDF extraction in isolation.
+
+pdfplumber and PyPDF2 can hang or exhaust memory on malformed files. The
+sandbox runs extraction in a small pool of forked worker processes, each
+with an address-space rlimit and a per-task CPU limit, and kills a worker
+outright when it does not answer within the wall-clock timeout. Failures
+are reported to the caller as a SandboxError with a short `reason`, and the
+failed worker is replaced so the pool keeps its size. Shared memory a failed
+task handed off but never delivered is unlinked (see shm_transport.py).
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+
+from shm_transport import handoff_prefix, set_handoff_prefix, unlink_handoffs
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds an idle worker waits between checks that its parent is alive
+PARENT_CHECK_INTERVAL = 1
+
+class SandboxError(Exception):
+    """Extraction failed inside the sandbox.
+
+    `reason` is one of: timeout, memory_limit, cpu_limit, killed, crashed,
+    exception.
+    """
+
+    def __init__(self, reason, detail=''):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+        self.detail = detail
+
+def _set_memory_limit(memory_bytes):
+    """Cap the address space of the current process"""
+    if resource is None or not memory_bytes:
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+def _set_cpu_limit(cpu_seconds):
+    """Allow the current process `cpu_seconds` more CPU time before SIGXCPU"""
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + int(cpu_seconds)
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _worker_main(conn, target, memory_bytes, cpu_seconds):
+    """Child loop: receive (args, kwargs, handoff prefix), run target, send back the outcome"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _set_memory_limit(memory_bytes)
+    parent = os.getppid()
+
+    while True:
+        try:
+            # Forked siblings hold copies of the parent's pipe end, so a
+            # parent that dies may never close it; exit once orphaned
+            while not conn.poll(PARENT_CHECK_INTERVAL):
+                if os.getppid() != parent:
+                    return
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        args, kwargs, prefix = task
+        set_handoff_prefix(prefix)
+        _set_cpu_limit(cpu_seconds)
+        try:
+            outcome = ('ok', target(*args, **kwargs))
+        except MemoryError:
+            outcome = ('error', 'memory_limit', 'address space limit reached')
+        except Exception as e:
+            outcome = ('error', 'exception', f"{type(e).__name__}: {e}")
+
+        try:
+            conn.send(outcome)
+        except MemoryError:
+            conn.send(('error', 'memory_limit', 'result too large to send'))
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.tasks = 0
+
+class ExtractionSandbox:
+    """Pool of supervised worker processes that run `target` in isolation.
+
+    `target` is inherited by the workers through fork, so it does not need to
+    be importable by name; its arguments and return value must be picklable.
+    Call `start` at startup, before the process has other threads; otherwise
+    the workers are started on the first call to `run`.
+    """
+
+    def __init__(self, target, workers=2, memory_mb=1024, cpu_seconds=60,
+                 timeout=90, max_tasks_per_worker=200):
+        self.target = target
+        self.workers = max(1, int(workers))
+        self.memory_bytes = int(memory_mb * 1024 * 1024) if memory_mb else None
+        self.cpu_seconds = cpu_seconds
+        self.timeout = timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+
+        if 'fork' in multiprocessing.get_all_start_methods():
+            self._ctx = multiprocessing.get_context('fork')
+        else:
+            self._ctx = multiprocessing.get_context()
+
+        self._idle = queue.Queue()
+        self._all = set()
+        self._lock = threading.Lock()
+        self._started = False
+        self._tasks = itertools.count(1)
+        self.stats = {'tasks': 0, 'failures': 0, 'recycled': 0}
+
+    def _spawn(self):
+        # Forks are serialized so no child inherits another worker's pipe end
+        with self._lock:
+            parent_conn, child_conn = self._ctx.Pipe()
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(child_conn, self.target, self.memory_bytes, self.cpu_seconds),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            worker = _Worker(process, parent_conn)
+            self._all.add(worker)
+        return worker
+
+    def _retire(self, worker):
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(5)
+        worker.conn.close()
+        with self._lock:
+            self._all.discard(worker)
+
+    def _replace(self, worker):
+        self._retire(worker)
+        self.stats['recycled'] += 1
+        self._idle.put(self._spawn())
+
+    def start(self):
+        """Fork the workers if they are not running yet.
+
+        A child forked while other threads hold locks (logging, the
+        allocator, a pdfminer cache) inherits those locks held and can
+        deadlock, so servers call this before starting their threads.
+        """
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        if threading.active_count() > 1:
+            logger.warning(f"Starting the extraction sandbox from a process with "
+                           f"{threading.active_count()} threads")
+        for _ in range(self.workers):
+            self._idle.put(self._spawn())
+        logger.info(f"Extraction sandbox started with {self.workers} workers")
+
+    def _death_reason(self, worker):
+        worker.process.join(1)
+        code = worker.process.exitcode
+        if code == -getattr(signal, 'SIGXCPU', -1):
+            return 'cpu_limit', 'CPU time limit exceeded'
+        if code == -signal.SIGKILL:
+            return 'killed', 'worker was killed (possibly out of memory)'
+        return 'crashed', f'worker exited with code {code}'
+
+    def _acquire(self):
+        """Take an idle worker, replacing any that died while idle"""
+        while True:
+            worker = self._idle.get()
+            if worker.process.is_alive():
+                return worker
+            self._replace(worker)
+
+    def run(self, *args, **kwargs):
+        """Run target(*args, **kwargs) in a worker and return its result.
+
+        Raises SandboxError when the worker times out, hits a resource limit,
+        dies, or the target raises.
+        """
+        self.start()
+        worker = self._acquire()
+        keep = False
+        delivered = False
+        prefix = handoff_prefix(next(self._tasks))
+        self.stats['tasks'] += 1
+
+        try:
+            try:
+                worker.conn.send((args, kwargs, prefix))
+                if not worker.conn.poll(self.timeout):
+                    raise SandboxError('timeout', f'no result after {self.timeout}s')
+                outcome = worker.conn.recv()
+            except (EOFError, OSError):
+                raise SandboxError(*self._death_reason(worker))
+
+            worker.tasks += 1
+            if outcome[0] == 'ok':
+                keep = worker.tasks < self.max_tasks_per_worker
+                delivered = True
+                return outcome[1]
+
+            # A worker that ran out of memory may be left in a bad state
+            keep = outcome[1] != 'memory_limit'
+            raise SandboxError(outcome[1], outcome[2])
+        except SandboxError as e:
+            self.stats['failures'] += 1
+            logger.warning(f"Sandboxed extraction failed: {e}")
+            raise
+        finally:
+            if keep:
+                self._idle.put(worker)
+            else:
+                self._replace(worker)
+            # The worker is done or dead, so it cannot create blocks after this
+            if not delivered:
+                unlink_handoffs(prefix)
+
+    def shutdown(self):
+        """Stop all workers"""
+        with self._lock:
+            workers = list(self._all)
+            self._started = False
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            self._retire(worker)
+        while not self._idle.empty():
+            self._idle.get_nowait()
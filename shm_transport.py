@@ -0,0 +1,210 @@
+"""
+Shared-memory transport for text and match spans between processes.
+
+Extraction output coming back from sandbox workers, and text going out to
+parallel scan workers, would otherwise be pickled through a pipe: encoded,
+copied through the kernel in small chunks and rebuilt on the other side.
+Above `min_bytes` the sender instead writes the text and the ResultSet's
+integer arrays back to back into one multiprocessing.shared_memory block,
+and only a small descriptor (block name, offsets, distinct values) goes
+over the pipe. The receiver decodes the text and copies the arrays straight
+out of the block, then closes it.
+
+Text is stored at a fixed width, like Python's own compact strings: one
+byte per character when every character is below U+0100 (latin-1), two
+below U+10000 (UTF-16) and four otherwise (UTF-32). A character range maps
+directly to a byte range, so a reader can decode just the slice it needs,
+and one accented letter no longer quadruples the block. Lone surrogates,
+which pdfminer can produce, pass through unchanged; text containing them is
+stored as UTF-32 so a high and a low one are not read back as a pair.
+
+Whoever receives a block unlinks it. The creating process stops tracking
+a block it hands off, and readers that never unlink attach untracked, so
+the resource tracker neither warns about nor removes a block that is still
+in use. A process running a task for another one names its handoff blocks
+with a prefix the other process chose (see set_handoff_prefix), so if the
+handle never arrives, because the task timed out or its worker died, the
+other process can still find and unlink them. A block is only created when
+/dev/shm has room for it; otherwise, or below `min_bytes`, the payload is
+sent inline and pickled as before.
+"""
+
+import itertools
+import logging
+import os
+import re
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+
+logger = logging.getLogger(__name__)
+
+ALIGNMENT = 8
+SHM_DIR = '/dev/shm'
+
+# Name prefix for handoff blocks of the current task, and their sequence
+_handoff_prefix = None
+_handoff_ids = itertools.count()
+
+CODECS = {1: 'latin-1', 2: 'utf-16-le', 4: 'utf-32-le'}
+SURROGATES = re.compile('[\ud800-\udfff]')
+
+def text_width(text):
+    """Bytes per character needed to store `text` at a fixed width"""
+    if not text or text.isascii():
+        return 1
+    widest = ord(max(text))
+    if widest < 0x100:
+        return 1
+    if widest < 0x10000 and not SURROGATES.search(text):
+        return 2
+    return 4
+
+def encode_text(text, width=None):
+    """(bytes, width) with `width` bytes per character"""
+    width = width or text_width(text)
+    return text.encode(CODECS[width], 'surrogatepass'), width
+
+def decode_text(buffer, width):
+    return str(buffer, CODECS[width], 'surrogatepass')
+
+def handoff_prefix(task):
+    """Name prefix for the handoff blocks of task number `task` of this process"""
+    return f'pdfx_{os.getpid()}_{task}_'
+
+def set_handoff_prefix(prefix):
+    """Name the handoff blocks this process creates from now on `prefix` + a number"""
+    global _handoff_prefix
+    _handoff_prefix = prefix
+
+def unlink_handoffs(prefix):
+    """Unlink any handoff blocks left under `prefix` by a task whose result never arrived"""
+    if not os.path.isdir(SHM_DIR):
+        return
+    for name in os.listdir(SHM_DIR):
+        if name.startswith(prefix):
+            try:
+                os.unlink(os.path.join(SHM_DIR, name))
+            except FileNotFoundError:
+                continue
+            logger.warning(f"Unlinked orphaned shared memory block {name}")
+
+def _aligned(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+def create_block(size, handoff=False):
+    """New shared memory block of `size` bytes.
+
+    Raises OSError when shared memory is short of space. With `handoff` the
+    block is untracked here, since another process will unlink it.
+    """
+    if os.path.isdir(SHM_DIR):
+        stats = os.statvfs(SHM_DIR)
+        if stats.f_bavail * stats.f_frsize < size:
+            raise OSError(f"not enough shared memory for {size} bytes")
+    name = f'{_handoff_prefix}{next(_handoff_ids)}' if handoff and _handoff_prefix else None
+    block = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+    if handoff:
+        resource_tracker.unregister(block._name, 'shared_memory')
+    return block
+
+def attach_block(name, track=True):
+    """Map an existing block; readers that never unlink it pass track=False"""
+    if track:
+        return shared_memory.SharedMemory(name=name)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers with the tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+def close_block(block, unlink=False):
+    block.close()
+    if unlink:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+def pack_result(text, results, min_bytes=4 << 20):
+    """Picklable handle for (text, results), through shared memory when large"""
+    fields, values, arrays = results.export_state()
+    size = len(text) + sum(len(data) * data.itemsize for data in arrays.values())
+    if min_bytes is None or size < min_bytes:
+        return ('inline', text, results)
+
+    encoded, width = encode_text(text)
+    layout = {}
+    offset = _aligned(len(encoded))
+    for key, data in arrays.items():
+        nbytes = len(data) * data.itemsize
+        layout[key] = (data.typecode, offset, nbytes)
+        offset += _aligned(nbytes)
+    try:
+        block = create_block(offset, handoff=True)
+    except OSError as e:
+        logger.warning(f"Sending {size} bytes inline: {e}")
+        return ('inline', text, results)
+
+    try:
+        block.buf[:len(encoded)] = encoded
+        del encoded
+        for key, (_, start, nbytes) in layout.items():
+            block.buf[start:start + nbytes] = memoryview(arrays[key]).cast('B')
+    except BaseException:
+        close_block(block, unlink=True)
+        raise
+    block.close()
+    return ('shared', block.name, (len(text), width), fields, values, layout)
+
+def unpack_result(packet, result_type):
+    """(text, results) from a pack_result handle; frees its shared memory"""
+    if packet[0] == 'inline':
+        return packet[1], packet[2]
+
+    _, name, (length, width), fields, values, layout = packet
+    block = attach_block(name)
+    try:
+        text = decode_text(block.buf[:length * width], width)
+        arrays = {}
+        for key, (typecode, start, nbytes) in layout.items():
+            arrays[key] = array(typecode)
+            arrays[key].frombytes(block.buf[start:start + nbytes])
+    finally:
+        close_block(block, unlink=True)
+    return text, result_type.from_state(text, fields, values, arrays)
+
+class SharedTexts:
+    """Texts written once into a block, read by slice from other processes"""
+
+    def __init__(self, texts):
+        self.width = max((text_width(text) for text in texts), default=1)
+        self.offsets = []
+        size = 0
+        for text in texts:
+            self.offsets.append(size)
+            size += len(text) * self.width
+        self.block = create_block(size)
+        for offset, text in zip(self.offsets, texts):
+            data, _ = encode_text(text, self.width)
+            self.block.buf[offset:offset + len(data)] = data
+
+    def ref(self, i, start, end):
+        """Descriptor of characters [start, end) of text i"""
+        return (self.block.name, self.offsets[i] + start * self.width, (end - start) * self.width, self.width)
+
+    def close(self):
+        close_block(self.block, unlink=True)
+
+def read_text(ref):
+    """Text behind a SharedTexts.ref descriptor"""
+    name, offset, nbytes, width = ref
+    block = attach_block(name, track=False)
+    try:
+        return decode_text(block.buf[offset:offset + nbytes], width)
+    finally:
+        block.close()
@@ -0,0 +1,202 @@
+"""
+Persistent SQLite store of processed documents, page text and entities.
+
+Each stored document keeps its metadata in `documents`, the text of every
+page in the FTS5 table `page_text` and every match in `entities` with its
+page and span. Entities carry a normalized value: emails lowercased, phone
+numbers reduced to their digits, names and addresses casefolded with
+whitespace collapsed. An index on (field, normalized, newest document first)
+turns "which document contained this email" into one index range read, in
+the order results are returned. Page text is searched through the
+full-text index. Matches are ranked by bm25 among the RANK_WINDOW most
+recently stored matching pages, which FTS5 reads in rowid order without
+scoring the rest, so a term that appears on most pages still answers in
+milliseconds.
+
+A document whose content hash is already stored, with complete results, is
+not stored again. The database runs in WAL mode, so searches are not
+blocked by writes. Each thread, and each prefork worker, uses its own
+connection, and writers wait on SQLite's busy timeout.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from preflight import open_binary
+
+RANK_WINDOW = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL,
+    sha256 TEXT,
+    created_at REAL NOT NULL,
+    pages INTEGER NOT NULL,
+    chars INTEGER NOT NULL,
+    partial INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(text, document_id UNINDEXED, page UNINDEXED);
+CREATE TABLE IF NOT EXISTS entities (
+    document_id INTEGER NOT NULL REFERENCES documents (id),
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    page INTEGER,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entities_lookup ON entities (field, normalized, document_id DESC);
+CREATE INDEX IF NOT EXISTS entities_document ON entities (document_id);
+"""
+
+def normalize(field, value):
+    """Lookup key for an entity value"""
+    if field == 'emails':
+        return value.strip().lower()
+    if field == 'phones':
+        return re.sub(r'\D', '', value)
+    return ' '.join(value.split()).casefold()
+
+def fts_query(text):
+    """FTS5 query matching every term of `text`, with FTS syntax taken literally"""
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+def file_sha256(source):
+    """Hex SHA-256 of a path or seekable binary file object"""
+    digest = hashlib.sha256()
+    with open_binary(source) as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    if hasattr(source, 'read'):
+        source.seek(0)
+    return digest.hexdigest()
+
+class DocumentStore:
+    """Documents, page text and entities in one SQLite database"""
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Set up with a throwaway connection so none is inherited across fork
+        connection = sqlite3.connect(path, timeout=timeout)
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.row_factory = sqlite3.Row
+            self.local.connection, self.local.pid = connection, os.getpid()
+        return connection
+
+    def find(self, sha256):
+        """Id of a stored document with complete results and this content hash"""
+        row = self._connection().execute(
+            'SELECT id FROM documents WHERE sha256 = ? AND partial = 0 LIMIT 1', (sha256,)).fetchone()
+        return row['id'] if row else None
+
+    def save(self, filename, results, sha256=None, partial=False):
+        """Store a document's pages and entities; returns its id.
+
+        `results` is a ResultSet over the document text.
+        """
+        if sha256 and not partial:
+            existing = self.find(sha256)
+            if existing is not None:
+                return existing
+        connection = self._connection()
+        text = results.text
+        spans = results.page_spans()
+        with connection:
+            document_id = connection.execute(
+                'INSERT INTO documents (filename, sha256, created_at, pages, chars, partial) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (filename, sha256, time.time(), len(spans), len(text), int(partial))).lastrowid
+            connection.executemany(
+                'INSERT INTO page_text (text, document_id, page) VALUES (?, ?, ?)',
+                ((text[start:end], document_id, page) for page, start, end in spans))
+            connection.executemany(
+                'INSERT INTO entities (document_id, field, value, normalized, page, start_offset, end_offset) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((document_id, field, value, normalize(field, value), page, start, end)
+                 for field, value, page, start, end in results.matches()))
+        return document_id
+
+    def search_entities(self, query, fields, limit=20):
+        """Entities of `fields` whose normalized value equals or starts with the query's.
+
+        Exact matches come first, then the most recently stored documents.
+        """
+        connection = self._connection()
+        select = ('SELECT e.document_id, d.filename, e.field, e.value, e.page, e.start_offset, e.end_offset '
+                  'FROM entities e JOIN documents d ON d.id = e.document_id WHERE e.field = ? ')
+        keys = [(field, normalize(field, query)) for field in fields]
+        keys = [(field, key) for field, key in keys if key]
+        rows = []
+        for field, key in keys:
+            rows += connection.execute(select + 'AND e.normalized = ? ORDER BY e.document_id DESC LIMIT ?',
+                                       (field, key, limit - len(rows))).fetchall()
+            if len(rows) >= limit:
+                break
+        for field, key in keys:
+            if len(rows) >= limit:
+                break
+            rows += connection.execute(
+                select + 'AND e.normalized > ? AND e.normalized < ? '
+                'ORDER BY e.normalized, e.document_id DESC LIMIT ?',
+                (field, key, key + '\U0010ffff', limit - len(rows))).fetchall()
+        return [{'document_id': row[0], 'filename': row[1], 'field': row[2], 'value': row[3],
+                 'page': row[4], 'start': row[5], 'end': row[6]} for row in rows]
+
+    def search_text(self, query, limit=20):
+        """Pages whose text matches every term of the query, best first"""
+        match = fts_query(query)
+        if not match:
+            return []
+        connection = self._connection()
+        best = [row[0] for row in connection.execute(
+            'SELECT rowid FROM (SELECT rowid, bm25(page_text) AS score FROM page_text '
+            'WHERE page_text MATCH ? ORDER BY rowid DESC LIMIT ?) ORDER BY score LIMIT ?',
+            (match, RANK_WINDOW, limit))]
+        if not best:
+            return []
+        # Snippets only for the pages returned
+        rows = connection.execute(
+            "SELECT p.rowid, p.document_id, d.filename, p.page, snippet(page_text, 0, '[', ']', '...', 12) "
+            'FROM page_text p JOIN documents d ON d.id = p.document_id '
+            f"WHERE page_text MATCH ? AND p.rowid IN ({', '.join('?' * len(best))})",
+            (match, *best)).fetchall()
+        found = {row[0]: {'document_id': row[1], 'filename': row[2], 'page': row[3], 'snippet': row[4]}
+                 for row in rows}
+        return [found[rowid] for rowid in best]
+
+    def iter_documents(self):
+        """(document id, [(field, value, page, start, end), ...]) for every stored document"""
+        rows = self._connection().execute(
+            'SELECT document_id, field, value, page, start_offset, end_offset FROM entities '
+            'ORDER BY document_id, start_offset')
+        document_id, matches = None, []
+        for row in rows:
+            if row[0] != document_id:
+                if matches:
+                    yield document_id, matches
+                document_id, matches = row[0], []
+            matches.append(tuple(row[1:]))
+        if matches:
+            yield document_id, matches
+
+    def stats(self):
+        return {'documents': self._connection().execute('SELECT COUNT(*) FROM documents').fetchone()[0]}
@@ -0,0 +1,112 @@
+"""
+Chunked ingestion of raw PDF (or zip archive) request bodies.
+
+The body is read from the WSGI input stream a chunk at a time. The SHA-256
+of the content is computed and the PDF header is checked as bytes arrive,
+so a bad upload is refused after its first chunk and an oversized one as
+soon as it crosses the limit. Small bodies stay in memory; once a body
+grows past the spool threshold it is moved to a temporary file.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+PDF_MAGIC = b'%PDF'
+
+class UploadTooLarge(Exception):
+    """The body exceeded the configured size limit"""
+
+class InvalidUpload(Exception):
+    """The body is empty or does not start with the expected header"""
+
+class ReceivedUpload:
+    """A fully received body: in memory or spooled to disk.
+
+    `source` is what the extractor reads: a BytesIO while in memory,
+    otherwise the path of the spool file.
+    """
+
+    def __init__(self, buffer, spool_path, size, sha256):
+        self._buffer = buffer
+        self.spool_path = spool_path
+        self.size = size
+        self.sha256 = sha256
+
+    @property
+    def spooled(self):
+        return self.spool_path is not None
+
+    @property
+    def source(self):
+        return self.spool_path if self.spooled else self._buffer
+
+    def close(self):
+        """Release the buffer and delete the spool file, if any"""
+        if self._buffer is not None:
+            self._buffer.close()
+        if self.spool_path and os.path.exists(self.spool_path):
+            os.remove(self.spool_path)
+
+def receive_pdf_stream(stream, max_bytes, spool_bytes, spool_dir=None, chunk_size=CHUNK_SIZE,
+                       magic=PDF_MAGIC, suffix='.pdf',
+                       invalid_message='Invalid PDF file. File may be corrupted or not a valid PDF.'):
+    """Read a PDF body from `stream` in chunks and return a ReceivedUpload.
+
+    Raises UploadTooLarge past `max_bytes` and InvalidUpload when the body
+    does not start with %PDF. Bodies larger than `spool_bytes` are written
+    to a temporary file in `spool_dir`. Other kinds of body, such as zip
+    archives, pass their own `magic`, spool file `suffix` and message.
+    """
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    spool = None
+    size = 0
+    header = b''
+
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise UploadTooLarge(f'Upload exceeds {max_bytes} bytes')
+
+            if len(header) < len(magic):
+                header += chunk[:len(magic) - len(header)]
+                if len(header) == len(magic) and header != magic:
+                    raise InvalidUpload(invalid_message)
+
+            digest.update(chunk)
+
+            if spool is None and size > spool_bytes:
+                spool = tempfile.NamedTemporaryFile(dir=spool_dir, suffix=suffix, delete=False)
+                spool.write(buffer.getbuffer())
+                buffer.close()
+                buffer = None
+            if spool is not None:
+                spool.write(chunk)
+            else:
+                buffer.write(chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.remove(spool.name)
+        raise
+
+    if header != magic:
+        if spool is not None:
+            spool.close()
+            os.remove(spool.name)
+        raise InvalidUpload(invalid_message)
+
+    if spool is not None:
+        spool.close()
+        return ReceivedUpload(None, spool.name, size, digest.hexdigest())
+
+    buffer.seek(0)
+    return ReceivedUpload(buffer, None, size, digest.hexdigest())
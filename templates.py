@@ -0,0 +1,175 @@
+"""
+Layout templates for documents that recur in the same format.
+
+A document's fingerprint comes from its first page: page size, the set of
+fonts used and the positions of label words (text ending in ':') rounded to
+a grid. The first document with a new fingerprint is extracted full page and
+the lines where entities were found are remembered as regions, per page.
+Later documents with the same fingerprint only have the text inside those
+regions extracted. If a field the template expects then comes back empty,
+the caller falls back to full-page extraction and the regions are learned
+again from that result.
+
+Pages without learned regions are always extracted in full. pdfminer still
+parses every character of a cropped page; cropping saves text assembly and
+field scanning, and keeps text outside the regions out of the results.
+Only words wholly inside a region are kept, so lines next to one are never
+half included.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+
+from pdfplumber.utils import cluster_objects
+
+LABEL_GRID = 10       # points; label positions are compared on this grid
+LINE_TOLERANCE = 3    # pdfplumber's default y_tolerance for grouping lines
+REGION_PADDING = 2    # points added above and below each region
+MAX_LABELS = 40
+
+def fingerprint(page):
+    """Layout fingerprint of a pdfplumber page"""
+    words = page.extract_words()
+    labels = sorted((word['text'], round(word['x0'] / LABEL_GRID), round(word['top'] / LABEL_GRID))
+                    for word in words if word['text'].endswith(':'))[:MAX_LABELS]
+    fonts = sorted({char['fontname'] for char in page.chars})
+    layout = (round(page.width), round(page.height), fonts, labels)
+    return hashlib.sha1(repr(layout).encode()).hexdigest()
+
+def line_boxes(words):
+    """Bounding box of each text line, in the order extract_text emits them"""
+    return [(min(word['x0'] for word in line), min(word['top'] for word in line),
+             max(word['x1'] for word in line), max(word['bottom'] for word in line))
+            for line in cluster_objects(words, itemgetter('doctop'), LINE_TOLERANCE)]
+
+def _merge(boxes):
+    """Merge vertically overlapping boxes, sorted top to bottom"""
+    merged = []
+    for box in sorted(boxes, key=itemgetter(1)):
+        if merged and box[1] <= merged[-1][3]:
+            last = merged[-1]
+            merged[-1] = (min(last[0], box[0]), last[1], max(last[2], box[2]), max(last[3], box[3]))
+        else:
+            merged.append(box)
+    return merged
+
+class TemplateStore:
+    """Learned regions per layout fingerprint, least recently used evicted first"""
+
+    def __init__(self, max_templates=200):
+        self.max_templates = max_templates
+        self.templates = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'matched': 0, 'learned': 0, 'fallbacks': 0}
+
+    def get(self, key):
+        with self.lock:
+            template = self.templates.get(key)
+            if template is not None:
+                self.templates.move_to_end(key)
+                self.stats['matched'] += 1
+            return template
+
+    def put(self, key, template):
+        with self.lock:
+            self.templates[key] = template
+            self.templates.move_to_end(key)
+            while len(self.templates) > self.max_templates:
+                self.templates.popitem(last=False)
+            self.stats['learned'] += 1
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def metrics(self):
+        with self.lock:
+            return dict(self.stats, templates=len(self.templates))
+
+    def session(self):
+        return TemplateSession(self)
+
+class TemplateSession:
+    """Template state for extracting one document"""
+
+    def __init__(self, store):
+        self.store = store
+        self.key = None
+        self.template = None
+        self.pages = {}
+
+    @property
+    def matched(self):
+        return self.template is not None
+
+    def identify(self, page):
+        """Fingerprint the first page and look up its template (once)"""
+        if self.key is None:
+            self.key = fingerprint(page)
+            self.template = self.store.get(self.key)
+
+    def page_text(self, page, page_number):
+        """Text inside the template's regions, or None to extract the full page"""
+        if not self.matched:
+            return None
+        boxes = self.template['regions'].get(page_number)
+        if not boxes:
+            return None
+        texts = []
+        for x0, top, x1, bottom in boxes:
+            box = (max(x0, page.bbox[0]), max(top, page.bbox[1]),
+                   min(x1, page.bbox[2]), min(bottom, page.bbox[3]))
+            text = page.within_bbox(box).extract_text()
+            if text:
+                texts.append(text)
+        return '\n'.join(texts)
+
+    def record(self, page, page_number, page_text):
+        """Remember line positions of a full page so regions can be learned"""
+        if self.matched or self.key is None:
+            return
+        boxes = line_boxes(page.extract_words())
+        # Only pages whose lines line up with the extracted text can be learned
+        if page_text and len(boxes) == page_text.count('\n') + 1:
+            self.pages[page_number] = (boxes, page.bbox)
+
+    def validate(self, results):
+        """Whether every field the template expects was found"""
+        return all(results.count(field) > 0 for field in self.template['fields']
+                   if field in results.fields)
+
+    def fall_back(self):
+        """Drop the template so the document is extracted and learned full page"""
+        self.template = None
+        self.pages = {}
+        self.store.count('fallbacks')
+
+    def learn(self, results, page_index):
+        """Store the lines where `results` were found as this layout's regions"""
+        if self.matched or self.key is None:
+            return
+        indexed_pages = {page.page_number: page for page in page_index.pages}
+        regions = {}
+        fields = set()
+        for field, _, page_number, start, end in results.matches():
+            page = indexed_pages.get(page_number)
+            if page is None or page_number not in self.pages:
+                continue
+            boxes, (x0, top, x1, bottom) = self.pages[page_number]
+            first = page.text.count('\n', 0, start - page.start)
+            last = page.text.count('\n', 0, max(start, end - 1) - page.start)
+            lines = boxes[first:last + 1]
+            if not lines:
+                continue
+            # Full page width: values in other documents may be longer
+            regions.setdefault(page_number, []).append(
+                (x0, min(line[1] for line in lines) - REGION_PADDING,
+                 x1, max(line[3] for line in lines) + REGION_PADDING))
+            fields.add(field)
+        if regions:
+            self.store.put(self.key, {
+                'regions': {number: _merge(boxes) for number, boxes in regions.items()},
+                'fields': sorted(fields)
+            })
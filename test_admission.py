@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test cost-aware admission control and the 429 backpressure on /upload.
+"""
+
+import sys
+import threading
+import time
+sys.path.append('.')
+
+from admission import AdmissionController, AdmissionRejected, work_cost
+
+def test_queue_and_reject():
+    """Work beyond capacity queues; beyond queue depth it is rejected"""
+    controller = AdmissionController(capacity=2, max_queue=1, max_wait=5)
+    controller.acquire(2)
+
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(controller.acquire(1)))
+    waiter.start()
+    while controller.metrics()['queue_depth'] == 0:
+        time.sleep(0.01)
+
+    try:
+        controller.acquire(1)
+        raise AssertionError('third request was not rejected')
+    except AdmissionRejected as e:
+        print(f"   Rejected with Retry-After {e.retry_after}")
+        assert e.retry_after >= 1
+
+    time.sleep(0.1)
+    controller.release(2, 0.1)
+    waiter.join(5)
+
+    metrics = controller.metrics()
+    print(f"   Metrics: {metrics}")
+    assert admitted and admitted[0] >= 0.1
+    assert metrics['in_flight'] == 1
+    assert metrics['queue_depth'] == 0
+    assert metrics['rejected'] == 1
+    assert metrics['wait_seconds_max'] >= 0.1
+
+def test_wait_timeout_and_priority():
+    """Queued work gives up after max_wait; fast-path work skips the queue"""
+    controller = AdmissionController(capacity=3, max_queue=4, max_wait=0.2)
+    controller.acquire(2.5)
+
+    try:
+        controller.acquire(1)
+        raise AssertionError('queued request did not time out')
+    except AdmissionRejected:
+        pass
+    assert controller.metrics()['timed_out'] == 1
+
+    # A cheap job fits next to the running one even with others queued
+    assert controller.acquire(0.5, priority=True) == 0.0
+
+    # A job bigger than capacity still runs once nothing else is in flight
+    controller.release(2.5)
+    controller.release(0.5)
+    assert controller.acquire(10) == 0.0
+
+def test_work_cost():
+    assert work_cost(0) == 1.0
+    assert work_cost(2 * 1024 * 1024, page_cost=3.0) == 5.0
+
+def test_upload_returns_429():
+    """/upload answers 429 with Retry-After when the queue is full"""
+    import app as app_module
+
+    saved = app_module.admission
+    app_module.admission = AdmissionController(capacity=1, max_queue=0)
+    app_module.admission.acquire(1)
+    app_module.app.config['TESTING'] = True
+
+    try:
+        with app_module.app.test_client() as client, open('test_pdfs/sample_resume.pdf', 'rb') as f:
+            r = client.post('/upload', data={'file': (f, 'sample_resume.pdf')},
+                            content_type='multipart/form-data')
+            print(f"   Status: {r.status_code}, Retry-After: {r.headers.get('Retry-After')}")
+            assert r.status_code == 429
+            assert int(r.headers['Retry-After']) >= 1
+
+            metrics = client.get('/metrics').get_json()
+            assert metrics['admission']['rejected'] == 1
+    finally:
+        app_module.admission = saved
+
+if __name__ == "__main__":
+    print("Testing admission control...")
+    test_queue_and_reject()
+    test_wait_timeout_and_priority()
+    test_work_cost()
+    test_upload_returns_429()
+    print("All admission tests passed")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test zip archive uploads and their size limits.
+"""
+
+import os
+import sys
+import io
+import glob
+import json
+import zipfile
+import tempfile
+import subprocess
+sys.path.append('.')
+
+from PyPDF2 import PdfReader, PdfWriter
+
+import app as app_module
+from archive import ArchiveReader, InvalidArchive
+
+PDFS = sorted(glob.glob('test_pdfs/*.pdf'))
+
+def make_archive(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def pdf_members():
+    members = []
+    for path in PDFS:
+        with open(path, 'rb') as file:
+            members.append(('bundle/' + path.split('/')[-1], file.read()))
+    return members
+
+def post_archive(client, body, query=''):
+    r = client.post('/upload/archive' + query, data=body, content_type='application/zip')
+    lines = [json.loads(line) for line in r.get_data(as_text=True).splitlines()] if r.status_code == 200 else []
+    return r, lines
+
+def test_reader_limits():
+    bomb = b'%PDF-1.4\n' + b'\0' * (8 << 20)
+    body = make_archive(pdf_members() + [('notes.txt', b'hello'), ('__MACOSX/._a.pdf', b'x'),
+                                         ('fake.pdf', b'PK not a pdf'), ('bomb.pdf', bomb)])
+    assert len(body) < 64 << 10  # eight megabytes of zeros compress to a few kilobytes
+    with ArchiveReader(io.BytesIO(body), max_member_bytes=1 << 20, max_total_bytes=64 << 20) as reader:
+        members = {member.name: member for member in reader}
+    assert members['notes.txt'].error == 'not a PDF' and members['__MACOSX/._a.pdf'].error == 'not a PDF'
+    assert members['fake.pdf'].error == 'not a valid PDF'
+    assert 'exceeds' in members['bomb.pdf'].error and members['bomb.pdf'].source is None
+    # The bomb's declared size stops it before anything is decompressed
+    assert reader.stats['bytes'] < 1 << 20
+    good = [member for member in members.values() if member.error is None]
+    assert len(good) == len(PDFS) and all(member.source.read(4) == b'%PDF' for member in good)
+
+    # Total and member count limits stop reading
+    with ArchiveReader(io.BytesIO(body), max_member_bytes=0, max_total_bytes=12 << 20) as reader:
+        names = [member.name for member in reader]
+    assert 'bomb.pdf' in names and reader.stats['truncated'] is None
+    with ArchiveReader(io.BytesIO(body), max_member_bytes=0, max_total_bytes=4 << 20) as reader:
+        names = [member.name for member in reader]
+    assert 'bomb.pdf' not in names and 'exceeds' in reader.stats['truncated']
+    with ArchiveReader(io.BytesIO(body), max_member_bytes=1 << 20, max_total_bytes=0, max_members=2) as reader:
+        assert len([member for member in reader if member.name.startswith('bundle/')]) == 2
+    assert 'more than 2' in reader.stats['truncated']
+
+def test_lying_sizes():
+    """A member whose directory entry understates its size is rejected, not read past"""
+    body = make_archive([('big.pdf', b'%PDF-1.4\n' + b'\0' * (4 << 20))])
+    with ArchiveReader(io.BytesIO(body), max_member_bytes=1 << 20, max_total_bytes=0) as reader:
+        reader.zip.infolist()[0].file_size = 1000
+        member = next(iter(reader))
+    assert member.error and member.source is None and member.size <= 1 << 20
+
+    try:
+        ArchiveReader(io.BytesIO(b'PK\x03\x04 truncated'), 1 << 20, 1 << 20)
+        assert False, "invalid archive accepted"
+    except InvalidArchive:
+        pass
+
+def test_upload_archive():
+    client = app_module.app.test_client()
+    r, lines = post_archive(client, make_archive(pdf_members() + [('notes.txt', b'hi')]), '?fields=names,emails')
+    assert r.status_code == 200 and r.mimetype == 'application/x-ndjson'
+    results = [line for line in lines if 'status' in line]
+    assert sorted(line['member'] for line in results) == sorted('bundle/' + p.split('/')[-1] for p in PDFS)
+    assert all(line['status'] == 200 and set(line['data']) == {'names', 'emails'} for line in results)
+    assert {'member': 'notes.txt', 'size': 2, 'skipped': 'not a PDF'} in lines
+    summary = lines[-1]['summary']
+    print(f"summary: {summary}")
+    assert summary['pdfs'] == len(PDFS) and summary['succeeded'] == len(PDFS) and summary['skipped'] == 1
+
+    # The same member extracted on its own gives the same data
+    with open(PDFS[0], 'rb') as file:
+        single = client.post('/upload?fields=names,emails', data={'file': (file, 'a.pdf')},
+                             content_type='multipart/form-data').get_json()
+    first = [line for line in results if line['member'].endswith(PDFS[0].split('/')[-1])][0]
+    assert first['data'] == single['data']
+
+def test_upload_archive_rejections():
+    client = app_module.app.test_client()
+    r, _ = post_archive(client, b'%PDF-1.4 not a zip')
+    assert r.status_code == 400 and 'zip' in r.get_json()['error']
+    r, _ = post_archive(client, b'PK\x03\x04' + b'\0' * 100)
+    assert r.status_code == 400
+
+    saved = app_module.app.config['ARCHIVE_MAX_BYTES']
+    app_module.app.config['ARCHIVE_MAX_BYTES'] = 1024
+    try:
+        r, _ = post_archive(client, make_archive(pdf_members()))
+        assert r.status_code == 413
+    finally:
+        app_module.app.config['ARCHIVE_MAX_BYTES'] = saved
+
+    saved = app_module.app.config['ARCHIVE_MEMBER_MAX_BYTES']
+    app_module.app.config['ARCHIVE_MEMBER_MAX_BYTES'] = 1 << 20
+    try:
+        r, lines = post_archive(client, make_archive([('bomb.pdf', b'%PDF' + b'\0' * (64 << 20))]))
+        assert r.status_code == 200
+        assert 'exceeds' in lines[0]['skipped'] and lines[-1]['summary']['succeeded'] == 0
+    finally:
+        app_module.app.config['ARCHIVE_MEMBER_MAX_BYTES'] = saved
+
+def test_upload_archive_above_form_limit():
+    """Archives between MAX_CONTENT_LENGTH and ARCHIVE_MAX_BYTES are accepted and leave no spool file"""
+    client = app_module.app.test_client()
+    body = make_archive(pdf_members() + [('padding.bin', os.urandom(256 << 10))])
+    upload_dir = app_module.app.config['UPLOAD_FOLDER']
+    before = set(os.listdir(upload_dir))
+    saved = app_module.app.config['MAX_CONTENT_LENGTH'], app_module.app.config['UPLOAD_SPOOL_BYTES']
+    app_module.app.config['MAX_CONTENT_LENGTH'] = 128 << 10
+    app_module.app.config['UPLOAD_SPOOL_BYTES'] = 64 << 10
+    try:
+        assert app_module.app.config['MAX_CONTENT_LENGTH'] < len(body) < app_module.app.config['ARCHIVE_MAX_BYTES']
+        for content_type in ('application/zip', 'application/x-www-form-urlencoded'):
+            r = client.post('/upload/archive?fields=emails', data=body, content_type=content_type)
+            assert r.status_code == 200, r.get_data(as_text=True)
+            lines = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+            assert lines[-1]['summary']['succeeded'] == len(PDFS)
+            assert all(set(line['data']) == {'emails'} for line in lines if 'status' in line)
+    finally:
+        app_module.app.config['MAX_CONTENT_LENGTH'], app_module.app.config['UPLOAD_SPOOL_BYTES'] = saved
+    assert set(os.listdir(upload_dir)) == before
+
+def test_command_line():
+    """archive.py extracts members through the same budget and pre-flight path as the endpoint"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive_path = os.path.join(tmp_dir, 'bundle.zip')
+        output_path = os.path.join(tmp_dir, 'results.ndjson')
+        writer = PdfWriter()
+        writer.add_page(PdfReader(PDFS[0]).pages[0])
+        writer.encrypt('secret')
+        encrypted = io.BytesIO()
+        writer.write(encrypted)
+        with open(archive_path, 'wb') as file:
+            file.write(make_archive(pdf_members()[:1] + [('locked.pdf', encrypted.getvalue()),
+                                                         ('notes.txt', b'hi')]))
+        env = dict(os.environ, EXTRACTION_MAX_CHARS='50')
+        result = subprocess.run([sys.executable, 'archive.py', archive_path, '--fields', 'emails',
+                                 '--output', output_path], env=env, capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr
+        with open(output_path) as file:
+            lines = {line.get('member', 'summary'): line for line in map(json.loads, file)}
+    extracted = lines['bundle/' + PDFS[0].split('/')[-1]]
+    assert extracted['status'] == 200 and extracted['partial'] and extracted['budget_exceeded'] == 'chars'
+    assert 'raw_text' not in extracted and set(extracted['data']) == {'emails'}
+    assert lines['locked.pdf']['status'] == 400 and lines['locked.pdf']['preflight']['encrypted']
+    assert lines['notes.txt']['skipped'] == 'not a PDF'
+    assert lines['summary']['summary']['succeeded'] == 1 and lines['summary']['summary']['failed'] == 1
+
+if __name__ == "__main__":
+    test_reader_limits()
+    test_lying_sizes()
+    test_upload_archive()
+    test_upload_archive_rejections()
+    test_upload_archive_above_form_limit()
+    test_command_line()
+    print("All archive tests passed")
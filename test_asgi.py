@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test the ASGI entry point by driving it directly with scripted ASGI messages.
+"""
+
+import sys
+import io
+import os
+import asyncio
+import json
+import zipfile
+sys.path.append('.')
+
+from werkzeug.datastructures import FileStorage
+from werkzeug.test import encode_multipart
+
+from asgi import app as asgi_app, AsgiAdapter
+from app import app as flask_app
+
+def call(app, method, path, body=b'', headers=(), chunk_size=1024, query=b''):
+    """Send a request through an ASGI app in chunks; return (status, headers, body)"""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b'']
+    messages = [{'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(0)
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+        'path': path, 'root_path': '', 'query_string': query,
+        'headers': [(k.lower().encode(), v.encode()) for k, v in headers],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 50000)
+    }
+    asyncio.run(app(scope, receive, send))
+
+    start = sent[0]
+    response_headers = {k.decode(): v.decode() for k, v in start['headers']}
+    payload = b''.join(m.get('body', b'') for m in sent[1:])
+    return start['status'], response_headers, payload
+
+def test_existing_routes():
+    """/examples, /preview and /export/* behave as under WSGI"""
+    status, _, body = call(asgi_app, 'GET', '/examples')
+    examples = json.loads(body)['examples']
+    print(f"   /examples: {status}, {len(examples)} examples")
+    assert status == 200 and examples
+
+    status, _, body = call(asgi_app, 'GET', '/preview/sample_resume.pdf')
+    assert status == 200
+    assert 'SARAH JOHNSON' in json.loads(body)['preview']
+
+    status, _, body = call(asgi_app, 'GET', '/examples/sample_resume.pdf')
+    assert status == 200 and body.startswith(b'%PDF')
+
+    data = json.dumps({'names': ['Jane Doe'], 'emails': ['jane@example.com']}).encode()
+    status, headers, body = call(asgi_app, 'POST', '/export/csv', data,
+                                 headers=[('Content-Type', 'application/json')])
+    assert status == 200
+    assert headers['content-type'].startswith('text/csv')
+    assert b'Jane Doe,jane@example.com' in body
+
+    status, _, body = call(asgi_app, 'POST', '/export/json', data,
+                           headers=[('Content-Type', 'application/json')])
+    assert status == 200 and json.loads(body)['names'] == ['Jane Doe']
+
+def test_upload_in_chunks():
+    """Multipart and streamed uploads arriving in small chunks are extracted"""
+    with open('test_pdfs/sample_invoice.pdf', 'rb') as f:
+        pdf = f.read()
+
+    upload = FileStorage(io.BytesIO(pdf), filename='invoice.pdf', content_type='application/pdf')
+    boundary, body = encode_multipart({'file': upload})
+    status, _, payload = call(asgi_app, 'POST', '/upload', body, chunk_size=256, headers=[
+        ('Content-Type', f'multipart/form-data; boundary={boundary}'),
+        ('Content-Length', str(len(body)))
+    ])
+    result = json.loads(payload)
+    print(f"   /upload: {status}, {result.get('total_fields_extracted')} fields")
+    assert status == 200
+    assert 'billing@abcservices.com' in result['data']['emails']
+
+    status, _, payload = call(asgi_app, 'POST', '/upload/stream', pdf, chunk_size=300,
+                              query=b'filename=invoice.pdf',
+                              headers=[('Content-Type', 'application/pdf')])
+    assert status == 200
+    assert len(json.loads(payload)['content_sha256']) == 64
+
+def test_body_limit():
+    """Bodies over the limit are refused before reaching Flask"""
+    small = AsgiAdapter(flask_app, threads=1, max_body=2 * 1024 * 1024)
+    status, _, payload = call(small, 'POST', '/upload/stream', b'%PDF' + b'0' * (3 * 1024 * 1024),
+                              chunk_size=64 * 1024, query=b'filename=big.pdf')
+    assert status == 413
+    assert 'error' in json.loads(payload)
+
+def test_archive_above_upload_limit():
+    """Archives larger than MAX_CONTENT_LENGTH reach /upload/archive, which applies its own limit"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.write('test_pdfs/sample_resume.pdf', 'sample_resume.pdf')
+        archive.writestr('padding.bin', os.urandom(flask_app.config['MAX_CONTENT_LENGTH'] + (1 << 20)))
+    body = buffer.getvalue()
+    assert flask_app.config['MAX_CONTENT_LENGTH'] < len(body) < flask_app.config['ARCHIVE_MAX_BYTES']
+
+    status, _, payload = call(asgi_app, 'POST', '/upload/archive', body, headers=[('Content-Type', 'application/zip')],
+                              chunk_size=1 << 20, query=b'fields=emails')
+    assert status == 200
+    lines = [json.loads(line) for line in payload.splitlines()]
+    assert lines[-1]['summary']['succeeded'] == 1 and lines[-1]['summary']['skipped'] == 1
+
+    # /upload/stream still refuses bodies over its own limit
+    status, _, _ = call(asgi_app, 'POST', '/upload/stream', b'%PDF' + body, chunk_size=1 << 20,
+                        query=b'filename=big.pdf')
+    assert status == 413
+
+def test_write_callable_closes_iterable():
+    """Chunks passed to write() come first, and the app's iterable is still closed"""
+    closed = []
+
+    class Body:
+        def __iter__(self):
+            return iter([b' world'])
+
+        def close(self):
+            closed.append(True)
+
+    def wsgi_app(environ, start_response):
+        write = start_response('200 OK', [('Content-Type', 'text/plain')])
+        write(b'hello')
+        return Body()
+
+    status, _, payload = call(AsgiAdapter(wsgi_app, threads=1), 'GET', '/')
+    assert status == 200 and payload == b'hello world'
+    assert closed == [True]
+
+def test_lifespan_startup_hook():
+    """on_startup runs on lifespan startup, before any request is handled"""
+    started = []
+    messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message['type'])
+
+    adapter = AsgiAdapter(lambda environ, start_response: [], threads=1, on_startup=lambda: started.append(True))
+    asyncio.run(adapter({'type': 'lifespan'}, receive, send))
+    assert started == [True]
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+
+if __name__ == "__main__":
+    print("Testing ASGI entry point...")
+    test_existing_routes()
+    test_upload_in_chunks()
+    test_body_limit()
+    test_archive_above_upload_limit()
+    test_write_callable_closes_iterable()
+    test_lifespan_startup_hook()
+    print("All ASGI tests passed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test decision traces for name extraction.
+"""
+
+import sys
+sys.path.append('.')
+
+import app as app_module
+from explain import DecisionTrace
+from sandbox import ExtractionSandbox
+
+def test_ring_buffer():
+    trace = DecisionTrace(max_lines=3)
+    for i in range(5):
+        trace.record(i * 10, f'line {i}', 'capitalized_words', name='Ann Lee' if i == 4 else None,
+                     reason=None if i == 4 else 'fewer than 2 leading capitalized words')
+    exported = trace.to_dict()
+    assert [line['offset'] for line in exported['lines']] == [20, 30, 40]
+    assert exported['recorded'] == 5 and exported['dropped'] == 2
+    assert exported['rules']['capitalized_words'] == {'accepted': 1, 'rejected': 4}
+    assert exported['lines'][-1] == {'offset': 40, 'line': 'line 4', 'rule': 'capitalized_words',
+                                     'decision': 'accepted', 'name': 'Ann Lee'}
+    trace.clear()
+    assert trace.to_dict()['lines'] == [] and trace.recorded == 0
+
+def test_trace_matches_extraction():
+    extractor = app_module.extractor
+    for path in ('test_pdfs/mixed_format_document.pdf', 'test_pdfs/sample_resume.pdf'):
+        text = extractor.extract_text_from_pdf(path)
+        trace = DecisionTrace()
+        names = extractor.extract_names(text, explain=trace)
+        assert names == extractor.extract_names(text)
+        accepted = [line['name'] for line in trace.to_dict()['lines'] if line['decision'] == 'accepted']
+        assert list(dict.fromkeys(accepted)) == names
+        # Every non-blank line is decided once
+        assert trace.recorded == sum(1 for line in text.split('\n') if line.strip())
+        for line in trace.to_dict()['lines']:
+            assert text[line['offset']:].lstrip().startswith(line['line'])
+            assert line['decision'] == 'accepted' or line['reason']
+
+    # Email rows are parsed for names, not skipped
+    text = extractor.extract_text_from_pdf('test_pdfs/mixed_format_document.pdf')
+    trace = DecisionTrace()
+    extractor.extract_names(text, explain=trace)
+    rachel = [line for line in trace.to_dict()['lines'] if line['line'].startswith('Rachel Green')][0]
+    assert rachel['rule'] == 'email_line' and rachel['name'] == 'Rachel Green'
+
+def test_upload_explain():
+    client = app_module.app.test_client()
+    with open('test_pdfs/mixed_format_document.pdf', 'rb') as file:
+        r = client.post('/upload?explain=1', data={'file': (file, 'mixed_format_document.pdf')},
+                        content_type='multipart/form-data')
+    assert r.status_code == 200
+    result = r.get_json()
+    explain = result['explain']['names']
+    print(f"{explain['recorded']} decisions, rules: {explain['rules']}")
+    accepted = [line['name'] for line in explain['lines'] if line['decision'] == 'accepted']
+    assert list(dict.fromkeys(accepted)) == result['data']['names']
+    assert all(line['page'] == 1 for line in explain['lines'])
+
+    with open('test_pdfs/mixed_format_document.pdf', 'rb') as file:
+        r = client.post('/upload', data={'file': (file, 'mixed_format_document.pdf')},
+                        content_type='multipart/form-data')
+    assert 'explain' not in r.get_json()
+
+def test_explain_through_sandbox():
+    sandbox = ExtractionSandbox(app_module.run_extraction_shared, workers=1, timeout=60)
+    try:
+        packet, budget, trace = sandbox.run('test_pdfs/mixed_format_document.pdf', app_module.ExtractionBudget(),
+                                            None, None, None, DecisionTrace())
+        assert trace.counts['email_line']['accepted'] == 6
+        _, _, no_trace = sandbox.run('test_pdfs/mixed_format_document.pdf', app_module.ExtractionBudget())
+        assert no_trace is None
+    finally:
+        sandbox.shutdown()
+
+if __name__ == "__main__":
+    test_ring_buffer()
+    test_trace_matches_extraction()
+    test_upload_explain()
+    test_explain_through_sandbox()
+    print("All explain tests passed")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test per-request extraction budgets and partial results.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append('.')
+
+from app import app, PDFDataExtractor, ExtractionBudget
+from generate_test_pdfs import create_long_document
+
+def test_page_budget():
+    """Stop after the page limit and report the last page read"""
+    extractor = PDFDataExtractor()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = create_long_document(os.path.join(tmp_dir, 'long.pdf'), pages=6)
+
+        budget = ExtractionBudget(max_pages=2)
+        text = extractor.extract_text_from_pdf(pdf_path, budget=budget)
+
+        print(f"Budget exceeded: {budget.exceeded}, last page: {budget.last_page}")
+        assert budget.partial
+        assert budget.exceeded == 'pages'
+        assert budget.last_page == 2
+        assert 'CONTACT SHEET 2' in text
+        assert 'CONTACT SHEET 4' not in text
+
+        # Without a budget every page is read
+        full_text = extractor.extract_text_from_pdf(pdf_path)
+        assert 'CONTACT SHEET 5' in full_text
+
+def test_char_budget():
+    """Clip text at the character limit"""
+    extractor = PDFDataExtractor()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = create_long_document(os.path.join(tmp_dir, 'long.pdf'), pages=6)
+
+        budget = ExtractionBudget(max_chars=100)
+        text = extractor.extract_text_from_pdf(pdf_path, budget=budget)
+
+        print(f"Clipped text length: {len(text)}")
+        assert len(text) == 100
+        assert budget.exceeded == 'chars'
+        assert budget.last_page == 1
+
+        # A document that exactly fills the budget is complete
+        full_text = extractor.extract_text_from_pdf(pdf_path)
+        budget = ExtractionBudget(max_chars=len(full_text))
+        assert extractor.extract_text_from_pdf(pdf_path, budget=budget) == full_text
+        assert not budget.partial and budget.last_page == 6
+
+def test_time_budget():
+    """An exhausted time budget skips the remaining field passes"""
+    extractor = PDFDataExtractor()
+
+    budget = ExtractionBudget(max_seconds=1)
+    budget.start_time -= 5
+    data = extractor.extract_structured_data("Jane Doe jane@example.com", budget=budget)
+
+    assert budget.exceeded == 'time'
+    assert data == {'names': [], 'emails': [], 'phones': [], 'addresses': []}
+
+def test_upload_partial_response():
+    """The /upload endpoint returns what was found, flagged as partial"""
+    app.config['TESTING'] = True
+    saved_pages = app.config['EXTRACTION_MAX_PAGES']
+    app.config['EXTRACTION_MAX_PAGES'] = 1
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = create_long_document(os.path.join(tmp_dir, 'long.pdf'), pages=4)
+
+            with app.test_client() as client, open(pdf_path, 'rb') as f:
+                r = client.post('/upload', data={'file': (f, 'long.pdf')},
+                                content_type='multipart/form-data')
+
+            data = r.get_json()
+            print(f"Status: {r.status_code}, partial: {data.get('partial')}, "
+                  f"last page: {data.get('last_processed_page')}")
+            assert r.status_code == 200
+            assert data['partial'] is True
+            assert data['budget_exceeded'] == 'pages'
+            assert data['last_processed_page'] == 1
+            assert data['data']['emails'] == ['brian.walker1@example.com']
+    finally:
+        app.config['EXTRACTION_MAX_PAGES'] = saved_pages
+
+if __name__ == "__main__":
+    test_page_budget()
+    test_char_budget()
+    test_time_budget()
+    test_upload_partial_response()
+    print("All budget tests passed")
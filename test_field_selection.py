@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test field-selective extraction and per-field match limits.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append('.')
+
+from app import app, PDFDataExtractor
+from generate_test_pdfs import create_long_document
+
+TEXT = """John Smith
+Senior Engineer
+john.smith@example.com
+Phone: (555) 123-4567
+123 Main Street
+
+Jane Doe
+jane.doe@example.com
+Phone: (555) 987-6543
+45 Oak Avenue
+"""
+
+def test_selected_fields_only():
+    """Unrequested extractors are not run and their keys are left out"""
+    extractor = PDFDataExtractor()
+    full = extractor.extract_structured_data(TEXT)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('names extractor should not run')
+    extractor.extract_names = fail
+
+    data = extractor.extract_structured_data(TEXT, fields=['emails', 'phones'])
+    print(f"Selected: {data}")
+    assert list(data) == ['emails', 'phones']
+    assert data['emails'] == full['emails']
+    assert data['phones'] == full['phones']
+
+def test_field_limits():
+    """A limit returns the first N matches of the full result"""
+    extractor = PDFDataExtractor()
+    full = extractor.extract_structured_data(TEXT)
+
+    data = extractor.extract_structured_data(TEXT, limits=1)
+    for field, values in data.items():
+        assert values == full[field][:1], field
+
+    data = extractor.extract_structured_data(TEXT, fields='emails,names', limits='emails:1')
+    assert data['emails'] == full['emails'][:1]
+    assert data['names'] == full['names']
+
+def test_invalid_selection():
+    extractor = PDFDataExtractor()
+    for fields, limits in [('emails,fax', None), (None, 'zero'), (None, 'emails:0'), (None, 'fax:2')]:
+        try:
+            extractor.extract_structured_data(TEXT, fields=fields, limits=limits)
+        except ValueError:
+            continue
+        raise AssertionError(f'accepted fields={fields!r} limits={limits!r}')
+
+def test_upload_field_selection():
+    """The /upload endpoint honours fields and limit parameters"""
+    app.config['TESTING'] = True
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = create_long_document(os.path.join(tmp_dir, 'long.pdf'), pages=4)
+
+        with app.test_client() as client:
+            with open(pdf_path, 'rb') as f:
+                r = client.post('/upload?fields=emails&limit=1', data={'file': (f, 'long.pdf')},
+                                content_type='multipart/form-data')
+            data = r.get_json()
+            print(f"Status: {r.status_code}, data: {data.get('data')}")
+            assert r.status_code == 200
+            assert data['data'] == {'emails': ['brian.walker1@example.com']}
+
+            with open(pdf_path, 'rb') as f:
+                r = client.post('/upload', data={'file': (f, 'long.pdf'), 'fields': 'fax'},
+                                content_type='multipart/form-data')
+            assert r.status_code == 400
+            assert 'fax' in r.get_json()['error']
+
+if __name__ == "__main__":
+    test_selected_fields_only()
+    test_field_limits()
+    test_invalid_selection()
+    test_upload_field_selection()
+    print("All field selection tests passed")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test the load-testing harness against a locally started server.
+"""
+
+import sys
+import json
+import os
+import tempfile
+sys.path.append('.')
+
+from loadtest import (percentile, build_corpus, run_level, start_server, wait_ready,
+                      free_port, compare_reports)
+
+def test_percentile():
+    values = sorted(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+def test_concurrent_uploads():
+    """Concurrent uploads of the same files all succeed"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus = build_corpus('test_pdfs', synthetic_pages=[3], work_dir=work_dir)
+    assert len(corpus) == 6
+
+    port = free_port()
+    server = start_server('wsgi', port)
+    try:
+        url = f'http://127.0.0.1:{port}'
+        assert wait_ready(url)
+        result = run_level(url, corpus, concurrency=6, duration=2)
+        print(f"   {result['requests']} requests, {result['throughput_rps']} rps, "
+              f"p99 {result['latency_ms']['p99']}ms, statuses {result['statuses']}")
+        assert result['requests'] > 0
+        assert result['error_rate'] == 0.0
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    with tempfile.TemporaryDirectory() as report_dir:
+        path = os.path.join(report_dir, 'run.json')
+        with open(path, 'w') as f:
+            json.dump({'levels': [result], 'rss_mb': [[0, 50.0]]}, f)
+        compare_reports([path, path])
+
+if __name__ == "__main__":
+    print("Testing load-testing harness...")
+    test_percentile()
+    test_concurrent_uploads()
+    print("All load-testing harness tests passed")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the regex backend: same matches as re, linear scans and timeouts.
+"""
+
+import sys
+import os
+import re
+import random
+import tempfile
+import time
+sys.path.append('.')
+
+from app import PDFDataExtractor, ExtractionBudget
+from matcher import PatternMatcher, SAFE_PATTERNS
+from page_cache import PageCache
+from generate_test_pdfs import create_long_document
+
+FLAGS = re.IGNORECASE | re.MULTILINE
+
+def test_every_pattern_rewritten():
+    patterns = [pattern for patterns in PDFDataExtractor().patterns.values() for pattern in patterns]
+    assert sorted(patterns) == sorted(SAFE_PATTERNS)
+
+def test_rewrites_match_re():
+    """Random text over pattern-relevant pieces gives the same spans on both engines"""
+    pieces = ['1', '23', ' ', '  ', '\n', 'St', 'Street', 'Main', 'x', ',', '.', '-', '@',
+              'b.com', '_', '%', 'IL', '62701', 'Box', 'P.O.', '(555)', '-1234', '٣', 'Pl']
+    rng = random.Random(7)
+    texts = [''.join(rng.choice(pieces) for _ in range(rng.randint(0, 40))) for _ in range(2000)]
+    safe = PatternMatcher(backend='regex')
+    for pattern in SAFE_PATTERNS:
+        compiled = re.compile(pattern, FLAGS)
+        for text in texts:
+            expected = [found.span() for found in compiled.finditer(text)]
+            assert [found.span() for found in safe.finditer(pattern, text, FLAGS)] == expected, (pattern, text)
+
+def test_same_results_as_re():
+    with_re = PDFDataExtractor(PatternMatcher(backend='re'))
+    with_regex = PDFDataExtractor(PatternMatcher(backend='regex'))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = [os.path.join('test_pdfs', name) for name in sorted(os.listdir('test_pdfs'))]
+        paths.append(create_long_document(os.path.join(tmp_dir, 'long.pdf'), pages=12))
+        for path in paths:
+            text = with_re.extract_text_from_pdf(path)
+            assert (with_regex.extract_results(text).to_provenance() ==
+                    with_re.extract_results(text).to_provenance()), path
+
+def test_adversarial_scan_is_linear():
+    """Runs of numbers and spaces, quadratic on re, scale linearly"""
+    extractor = PDFDataExtractor()
+    def scan(text):
+        start = time.perf_counter()
+        list(extractor.iter_values([(0, text)], 'address'))
+        return time.perf_counter() - start
+
+    small, large = scan('1 ' * 4000), scan('1 ' * 16000)
+    print(f"Address scan: {small * 1000:.1f}ms at 8K chars, {large * 1000:.1f}ms at 32K chars")
+    assert large < 1.0
+    assert large < small * 8
+
+def test_timeout_keeps_scanning():
+    matcher = PatternMatcher(backend='regex', timeout=0.05)
+    timed_out = []
+    assert list(matcher.finditer(r'(a|aa)+(?!a)\d', 'a' * 40, on_timeout=lambda: timed_out.append(1))) == []
+    assert matcher.timeouts == 1 and timed_out == [1]
+    assert [found.group() for found in matcher.finditer(r'a+', 'aa b aaa')] == ['aa', 'aaa']
+
+def test_timeout_applies_per_search():
+    """Many quick searches are not cut off by their total time"""
+    line = 'Contact {i} at user{i}@example.com about policy 44{i} ' + 'lorem ipsum dolor sit amet ' * 7 + '\n'
+    text = ''.join(line.format(i=i) for i in range(4000))
+    pattern = PDFDataExtractor().patterns['email'][0]
+    matcher = PatternMatcher(backend='regex', timeout=0.05)
+    start = time.perf_counter()
+    found = sum(1 for _ in matcher.finditer(pattern, text, FLAGS))
+    print(f"Email scan: {found} matches in {(time.perf_counter() - start) * 1000:.0f}ms")
+    assert time.perf_counter() - start > 0.05
+    assert found == 4000 and matcher.timeouts == 0
+
+class TimingOutMatcher(PatternMatcher):
+    """Times out after the first match of every scan"""
+
+    def finditer(self, pattern, text, flags=0, on_timeout=None):
+        for found in super().finditer(pattern, text, flags):
+            yield found
+            if on_timeout is not None:
+                on_timeout()
+            return
+
+def test_timeout_marks_result_partial():
+    text = "a@example.com b@example.com\n555-123-4567 555-765-4321\n"
+    extractor = PDFDataExtractor(TimingOutMatcher())
+    budget = ExtractionBudget()
+    results = extractor.extract_results(text, budget=budget, fields=['emails'])
+    assert results.to_dict()['emails'] == ['a@example.com'] and budget.exceeded == 'regex'
+
+    # Cut-short scans are not memoized
+    cache = PageCache()
+    extractor.extract_results(text, budget=ExtractionBudget(), fields=['emails'], cache=cache)
+    assert cache.matches.stats()['entries'] == 0
+    extractor.extract_results(text, fields=['emails'], cache=cache)
+    PDFDataExtractor().extract_results(text, fields=['emails'], cache=cache)
+    assert cache.matches.stats()['entries'] == 1
+
+if __name__ == "__main__":
+    test_every_pattern_rewritten()
+    test_rewrites_match_re()
+    test_same_results_as_re()
+    test_adversarial_scan_is_linear()
+    test_timeout_keeps_scanning()
+    test_timeout_applies_per_search()
+    test_timeout_marks_result_partial()
+    print("All regex backend tests passed")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test peak memory accounting of extraction stages.
+"""
+
+import sys
+import os
+import tempfile
+import tracemalloc
+sys.path.append('.')
+
+import app as app_module
+from memory import MemoryProbe, MemoryStats
+from generate_test_pdfs import create_long_document
+
+def allocate(size):
+    block = bytearray(size)
+    for i in range(0, size, 4096):
+        block[i] = 1
+    del block
+
+def test_probe_modes():
+    for mode in ('tracemalloc', 'rss'):
+        probe = MemoryProbe(mode)
+        report = {}
+        with probe.stage('big', report):
+            allocate(32 << 20)
+        with probe.stage('small', report):
+            allocate(1 << 10)
+        print(f"{mode}: {report}")
+        assert report['big'] >= 24 << 20
+        assert report['small'] < 8 << 20
+    # Tracing every allocation would slow down the tests that follow
+    tracemalloc.stop()
+
+    try:
+        MemoryProbe('heap')
+        assert False, "unknown mode accepted"
+    except ValueError:
+        pass
+
+def test_stats():
+    stats = MemoryStats()
+    stats.record({'text': 4000, 'fields': 100}, 4)
+    stats.record({'text': 2000, 'fields': 300}, 1)
+    metrics = stats.metrics()
+    assert metrics['text'] == {'count': 2, 'max_bytes': 4000, 'mean_bytes': 3000, 'max_bytes_per_page': 2000}
+    assert metrics['fields']['max_bytes_per_page'] == 300
+
+def test_upload_reports_memory():
+    saved = app_module.memory_probe, app_module.memory_stats
+    app_module.memory_probe = MemoryProbe('tracemalloc')
+    app_module.memory_stats = MemoryStats()
+    try:
+        _, _, budget = app_module.run_extraction('test_pdfs/sample_resume.pdf', app_module.ExtractionBudget())
+        assert budget.memory['mode'] == 'tracemalloc' and budget.memory['pages'] == 1
+        assert budget.memory['text'] > 0 and budget.memory['fields'] > 0
+
+        client = app_module.app.test_client()
+        with open('test_pdfs/contact_form.pdf', 'rb') as file:
+            r = client.post('/upload', data={'file': (file, 'contact_form.pdf')},
+                            content_type='multipart/form-data')
+        assert r.status_code == 200
+        memory = client.get('/metrics').get_json()['memory']
+        print(f"metrics: {memory}")
+        assert memory['mode'] == 'tracemalloc'
+        assert memory['stages']['text']['count'] == 1 and memory['stages']['text']['max_bytes'] > 0
+    finally:
+        app_module.memory_probe, app_module.memory_stats = saved
+        tracemalloc.stop()
+
+    # Without accounting the budget carries nothing
+    _, _, budget = app_module.run_extraction('test_pdfs/sample_resume.pdf', app_module.ExtractionBudget())
+    assert budget.memory is None
+
+def test_pages_released():
+    """Parsed pages are dropped as they are read, so memory stays flat with length"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        peaks = {}
+        for pages in (10, 40):
+            path = create_long_document(os.path.join(tmp_dir, f'long_{pages}.pdf'), pages=pages)
+            report = {}
+            with MemoryProbe('tracemalloc').stage('text', report):
+                app_module.extractor.extract_text_from_pdf(path)
+            peaks[pages] = report['text']
+        tracemalloc.stop()
+        per_page = (peaks[40] - peaks[10]) / 30
+        print(f"peaks: {peaks}, {per_page / 1024:.1f}KB per added page")
+        assert per_page < 64 << 10
+
+if __name__ == "__main__":
+    test_probe_modes()
+    test_stats()
+    test_upload_reports_memory()
+    test_pages_released()
+    print("All memory accounting tests passed")
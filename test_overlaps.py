@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test overlap resolution between matches of one field's patterns.
+"""
+
+import sys
+import random
+sys.path.append('.')
+
+from app import PDFDataExtractor
+from matcher import PatternMatcher
+from overlaps import IntervalIndex, overlap_regions, resolve_overlaps
+
+def test_interval_index():
+    index = IntervalIndex()
+    index.add(10, 20)
+    index.add(30, 40)
+    assert len(index) == 2
+    assert index.overlaps(15, 16) and index.overlaps(5, 11) and index.overlaps(19, 31)
+    assert not index.overlaps(0, 10) and not index.overlaps(20, 30) and not index.overlaps(40, 50)
+
+def test_best_match_per_region():
+    validated = []
+    def validate(raw):
+        validated.append(raw)
+        return None if raw.startswith('bad') else raw.upper()
+
+    candidates = [
+        (1, 0, 0, 5, 'short'),
+        (1, 1, 0, 9, 'longer me'),      # longest in its region
+        (1, 2, 2, 7, 'inner'),
+        (0, 3, 20, 24, 'pref'),         # preferred beats the longer match
+        (1, 0, 18, 30, 'long overlap'),
+        (1, 1, 40, 60, 'bad and long'), # invalid, so the shorter one is kept
+        (1, 0, 40, 60, 'bad and long'),
+        (1, 2, 42, 48, 'valid'),
+    ]
+    expected = [('LONGER ME', 0, 9), ('PREF', 20, 24), ('VALID', 42, 48)]
+    assert resolve_overlaps(candidates, validate) == expected
+    # Matches overlapping a kept one are never validated; spans only once
+    assert validated == ['pref', 'bad and long', 'longer me', 'valid']
+
+    rng = random.Random(3)
+    for _ in range(20):
+        rng.shuffle(candidates)
+        assert resolve_overlaps(candidates, validate) == expected
+
+    kept = resolve_overlaps(candidates, lambda raw: raw, exclusive=False)
+    assert len(kept) == 7 and kept == sorted(kept, key=lambda match: (match[1], match[2]))
+
+def test_phone_with_country_code():
+    text = "Mobile: +1-555-333-4445\nOffice: (555) 333-4444\n"
+    phones = PDFDataExtractor().extract_multiple_values(text, 'phone')
+    assert phones == ['+1-555-333-4445', '(555) 333-4444']
+    assert '555-333-4445' in PDFDataExtractor(resolve_overlaps=False).extract_multiple_values(text, 'phone')
+
+def test_full_address_preferred():
+    extractor = PDFDataExtractor()
+    text = extractor.extract_text_from_pdf('test_pdfs/sample_resume.pdf')
+    addresses = extractor.extract_structured_data(text)['addresses']
+    print(f"Addresses: {addresses}")
+    assert '123 Main Street, San Francisco, CA 94102' in addresses
+    assert not any(address.startswith('123 Main Street') and address != '123 Main Street, San Francisco, CA 94102'
+                   for address in addresses)
+
+def test_regions_match_whole_resolution():
+    rng = random.Random(7)
+    for _ in range(50):
+        candidates = []
+        for index in range(3):
+            start = 0
+            for _ in range(rng.randint(0, 15)):
+                start += rng.randint(0, 6)
+                length = rng.randint(1, 8)
+                candidates.append((rng.randint(0, 1), index, start, start + length, f'{index}:{start}'))
+                start += length
+        streams = [[c for c in candidates if c[1] == index] for index in range(3)]
+        validate = lambda raw: None if raw.endswith('3') else raw
+        for exclusive in (True, False):
+            by_region = [match for region in overlap_regions(streams)
+                         for match in resolve_overlaps(region, validate, exclusive)]
+            assert by_region == resolve_overlaps(candidates, validate, exclusive)
+
+class RecordingMatcher(PatternMatcher):
+    """Records the furthest match any pattern was asked for"""
+
+    furthest = 0
+
+    def finditer(self, pattern, text, flags=0, on_timeout=None):
+        for found in super().finditer(pattern, text, flags, on_timeout):
+            self.furthest = max(self.furthest, found.start())
+            yield found
+
+def test_limit_stops_scanning():
+    line = "Call (555) 333-4444 or +1-555-333-4445 today.\n"
+    text = ''.join(line.replace('4444', f'{i:04d}') for i in range(2000))
+    matcher = RecordingMatcher()
+    extractor = PDFDataExtractor(matcher)
+    assert extractor.extract_multiple_values(text, 'phone', limit=1) == ['(555) 333-0000']
+    # Only a match or so past the first line was read, not the whole segment
+    assert matcher.furthest < 2 * len(line)
+
+    for resolve in (True, False):
+        matcher = RecordingMatcher()
+        results = PDFDataExtractor(matcher, resolve_overlaps=resolve).extract_results(
+            text, fields=['phones'], limits={'phones': 3})
+        assert results.count('phones') == 3 and matcher.furthest < 4 * len(line)
+
+if __name__ == "__main__":
+    test_interval_index()
+    test_best_match_per_region()
+    test_phone_with_country_code()
+    test_full_address_preferred()
+    test_regions_match_whole_resolution()
+    test_limit_stops_scanning()
+    print("All overlap resolution tests passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the content-keyed page text and field match cache.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append('.')
+
+from app import PDFDataExtractor
+from prefilter import PageIndex
+from page_cache import PageCache, LRUCache
+from generate_test_pdfs import create_long_document
+
+def _extract(extractor, pdf_path, cache):
+    index = PageIndex()
+    text = extractor.extract_text_from_pdf(pdf_path, page_index=index, cache=cache)
+    return text, extractor.extract_results(text, page_index=index, cache=cache).to_provenance()
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.stats() == {'entries': 2, 'hits': 2, 'misses': 1}
+
+def test_appended_document():
+    """An appended version only extracts its new pages, with unchanged results"""
+    extractor = PDFDataExtractor()
+    cache = PageCache()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original = create_long_document(os.path.join(tmp_dir, 'v1.pdf'), pages=6)
+        appended = create_long_document(os.path.join(tmp_dir, 'v2.pdf'), pages=8)
+
+        assert _extract(extractor, original, cache) == _extract(extractor, original, None)
+        # Pages 3 and 6 are the same boilerplate page
+        assert cache.texts.stats() == {'entries': 5, 'hits': 1, 'misses': 5}
+
+        match_misses = cache.matches.stats()['misses']
+        assert _extract(extractor, appended, cache) == _extract(extractor, appended, None)
+        stats = cache.texts.stats()
+        print(f"Page cache after appended version: {stats}, matches: {cache.matches.stats()}")
+        assert stats['misses'] == 7
+        assert stats['hits'] == 7
+        assert cache.matches.stats()['hits'] > 0
+        # Entity matches are only scanned for the two new pages
+        assert cache.matches.stats()['misses'] - match_misses == 2 * len(PDFDataExtractor.FIELDS)
+
+def test_appended_document_single_run():
+    """With every page in one run, only the appended pages are scanned for entities"""
+    extractor = PDFDataExtractor()
+    cache = PageCache()
+    fields = len(PDFDataExtractor.FIELDS)
+
+    def extract(pdf_path, cache):
+        index = PageIndex(prefilter=False)
+        text = extractor.extract_text_from_pdf(pdf_path, page_index=index, cache=cache)
+        return extractor.extract_results(text, page_index=index, cache=cache).to_provenance()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original = create_long_document(os.path.join(tmp_dir, 'v1.pdf'), pages=6)
+        appended = create_long_document(os.path.join(tmp_dir, 'v2.pdf'), pages=8)
+        assert extract(original, cache) == extract(original, None)
+        before = cache.matches.stats()
+        assert extract(appended, cache) == extract(appended, None)
+        after = cache.matches.stats()
+    assert after['misses'] - before['misses'] == 2 * fields
+    assert after['hits'] - before['hits'] == 6 * fields
+
+def test_match_across_page_break():
+    """Matches that cross a page break are found as in a scan of the whole run"""
+    extractor = PDFDataExtractor()
+    pages = ["Jane Doe\nPhone: 555-123\n", "4567 is her line\nEmail: jane@example.com\n"]
+    index = PageIndex(prefilter=False)
+    for number, page in enumerate(pages, 1):
+        index.add(number, page)
+    text = ''.join(pages)
+    serial = extractor.extract_results(text, page_index=index).to_provenance()
+    cache = PageCache()
+    for _ in range(2):
+        assert extractor.extract_results(text, page_index=index, cache=cache).to_provenance() == serial
+    assert serial['phones'] and serial['emails']
+
+def test_different_pages_differ():
+    extractor = PDFDataExtractor()
+    cache = PageCache()
+    _extract(extractor, 'test_pdfs/sample_resume.pdf', cache)
+    _extract(extractor, 'test_pdfs/sample_invoice.pdf', cache)
+    assert cache.texts.stats() == {'entries': 2, 'hits': 0, 'misses': 2}
+
+if __name__ == "__main__":
+    test_lru_cache()
+    test_appended_document()
+    test_appended_document_single_run()
+    test_match_across_page_break()
+    test_different_pages_differ()
+    print("All page cache tests passed")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the per-page feature prefilter used to skip field scans.
+"""
+
+import sys
+import os
+import glob
+import tempfile
+sys.path.append('.')
+
+from app import PDFDataExtractor
+from prefilter import PageIndex, PageFeatures
+from generate_test_pdfs import create_long_document
+
+def test_page_features():
+    contact = PageFeatures(1, "Jane Doe\njane@example.com\n(555) 123-4567\n12 Oak Street\n")
+    boilerplate = PageFeatures(2, "GENERAL TERMS\nThese terms apply to every engagement.\n")
+
+    assert contact.at_count == 1
+    assert contact.digit_count == 12
+    assert contact.capitalized_lines == 1
+    for field in PDFDataExtractor.FIELDS:
+        assert contact.can_contain(field), field
+        assert not boilerplate.can_contain(field), field
+
+def test_segments():
+    """Runs of consecutive candidate pages are joined, others dropped"""
+    index = PageIndex()
+    index.add(1, "a@b.com\n")
+    index.add(2, "c@d.com\n")
+    index.add(3, "no contacts here\n")
+    index.add(4, "e@f.com\n")
+
+    assert index.segments('emails') == [(0, "a@b.com\nc@d.com\n"), (33, "e@f.com\n")]
+    assert index.stats()['emails'] == {'pages': 4, 'skipped': 1, 'skip_rate': 0.25}
+
+def test_same_results_on_examples():
+    """Single-page examples give the same results with the prefilter"""
+    extractor = PDFDataExtractor()
+    for pdf_path in sorted(glob.glob('test_pdfs/*.pdf')):
+        index = PageIndex()
+        text = extractor.extract_text_from_pdf(pdf_path, page_index=index)
+        assert extractor.extract_structured_data(text, page_index=index) == \
+            extractor.extract_structured_data(text), pdf_path
+
+def test_boilerplate_pages_skipped():
+    """Contact-free pages are skipped without losing contacts"""
+    extractor = PDFDataExtractor()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = create_long_document(os.path.join(tmp_dir, 'long.pdf'), pages=9)
+        index = PageIndex()
+        text = extractor.extract_text_from_pdf(pdf_path, page_index=index)
+
+    assert ''.join(page.text for page in index.pages) == text
+    full = extractor.extract_structured_data(text)
+    filtered = extractor.extract_structured_data(text, page_index=index)
+    print(f"Prefilter stats: {index.stats()}")
+
+    for field in PDFDataExtractor.FIELDS:
+        assert index.stats()[field]['skipped'] == 3, field
+    for field in ('names', 'emails', 'phones'):
+        assert filtered[field] == full[field], field
+    # Addresses no longer run on into the boilerplate page that follows
+    assert not any('GENERAL TERMS' in address for address in filtered['addresses'])
+
+if __name__ == "__main__":
+    test_page_features()
+    test_segments()
+    test_same_results_on_examples()
+    test_boilerplate_pages_skipped()
+    print("All prefilter tests passed")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test the PDF pre-flight inspector and upload routing.
+"""
+
+import sys
+import os
+import io
+import tempfile
+sys.path.append('.')
+
+import PyPDF2
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+
+from preflight import inspect_pdf, route_document, open_binary
+
+def _create_pdf(path, pages):
+    """Write a PDF where each entry of `pages` is the text for a page, or None for a drawing only"""
+    c = canvas.Canvas(path, pagesize=letter)
+    for page_text in pages:
+        if page_text:
+            c.drawString(100, 700, page_text)
+        else:
+            c.rect(100, 400, 300, 200, fill=1)
+        c.showPage()
+    c.save()
+    return path
+
+def _encrypt(source, target, user_password):
+    reader = PyPDF2.PdfReader(source)
+    writer = PyPDF2.PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    writer.encrypt(user_password, 'owner-secret')
+    with open(target, 'wb') as f:
+        writer.write(f)
+    return target
+
+def test_text_pages_and_cost():
+    """Pages without text operators are detected and cost less"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = _create_pdf(os.path.join(tmp_dir, 'mixed.pdf'),
+                           ['Jane Doe jane@example.com', None, 'Call (555) 123-4567'])
+        report = inspect_pdf(path)
+
+        print(f"   Report: {report.to_dict()}")
+        assert report.page_count == 3
+        assert not report.encrypted
+        assert report.text_page_numbers == [1, 3]
+        assert not report.image_only
+        assert 2 < report.estimated_cost < 3
+        assert route_document(report, fast_cost=5) == ('fast', None)
+        assert route_document(report, fast_cost=1) == ('queue', None)
+
+def test_rejections():
+    """Image-only, oversized and password-protected files are rejected"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_only = inspect_pdf(_create_pdf(os.path.join(tmp_dir, 'scan.pdf'), [None, None]))
+        assert image_only.image_only
+        assert route_document(image_only)[0] == 'reject'
+        assert route_document(image_only, reject_image_only=False)[0] == 'queue'
+
+        source = _create_pdf(os.path.join(tmp_dir, 'plain.pdf'), ['Page one', 'Page two'])
+        too_long = inspect_pdf(source, max_pages=1)
+        assert too_long.page_count == 2
+        assert too_long.text_pages == []
+        assert route_document(too_long, max_pages=1)[0] == 'reject'
+
+        locked = inspect_pdf(_encrypt(source, os.path.join(tmp_dir, 'locked.pdf'), 'secret'))
+        assert locked.encrypted and locked.needs_password
+        assert route_document(locked)[0] == 'reject'
+
+        # An owner password alone does not stop extraction
+        owner_only = inspect_pdf(_encrypt(source, os.path.join(tmp_dir, 'owner.pdf'), ''))
+        assert owner_only.encrypted and not owner_only.needs_password
+        assert owner_only.text_page_numbers == [1, 2]
+
+def test_example_pdfs():
+    """All bundled examples pass pre-flight"""
+    for filename in sorted(os.listdir('test_pdfs')):
+        report = inspect_pdf(os.path.join('test_pdfs', filename))
+        print(f"   {filename}: {report.to_dict()}")
+        assert report.error is None
+        assert report.text_page_numbers == [1]
+
+def test_mapped_input():
+    """Memory-mapped files read and extract the same as regular reads"""
+    from app import PDFDataExtractor
+    mapped = PDFDataExtractor(mmap_input=True)
+    for filename in sorted(os.listdir('test_pdfs')):
+        path = os.path.join('test_pdfs', filename)
+        assert inspect_pdf(path, mapped=True).to_dict() == inspect_pdf(path).to_dict()
+        assert mapped.extract_text_from_pdf(path) == PDFDataExtractor().extract_text_from_pdf(path)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'empty.pdf')
+        open(path, 'wb').close()
+        with open_binary(path, mapped=True) as file:
+            assert file.read() == b''
+        assert mapped.extract_text_from_pdf(path) == ''
+
+def test_upload_rejects_image_only():
+    """/upload answers 400 for a PDF with no text before parsing it"""
+    from app import app
+    app.config['TESTING'] = True
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = _create_pdf(os.path.join(tmp_dir, 'scan.pdf'), [None])
+        with open(path, 'rb') as f:
+            content = f.read()
+
+    with app.test_client() as client:
+        r = client.post('/upload', data={'file': (io.BytesIO(content), 'scan.pdf')},
+                        content_type='multipart/form-data')
+
+    data = r.get_json()
+    print(f"   Status: {r.status_code}, error: {data.get('error')}")
+    assert r.status_code == 400
+    assert data['preflight']['image_only'] is True
+
+if __name__ == "__main__":
+    print("Testing PDF pre-flight...")
+    test_text_pages_and_cost()
+    test_rejections()
+    test_example_pdfs()
+    test_mapped_input()
+    test_upload_rejects_image_only()
+    print("All pre-flight tests passed")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test prefork mode: shared socket, worker restarts and graceful shutdown.
+"""
+
+import sys
+import os
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+sys.path.append('.')
+
+import requests
+
+# A prefork server whose /slow requests outlast waitress's own 5s shutdown wait
+SLOW_SERVER = """
+import os, sys, time
+sys.path.insert(0, {path!r})
+from prefork import PreforkServer
+
+def app(environ, start_response):
+    if environ['PATH_INFO'] == '/slow':
+        time.sleep(7)
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [str(os.getpid()).encode()]
+
+PreforkServer(app, host='127.0.0.1', port={port}, workers=2, threads=2, graceful_timeout=20).run()
+"""
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+def _alive(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+def _wait_for(condition, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.2)
+    return False
+
+def test_prefork_workers():
+    """Workers share one socket, crashed workers are replaced, SIGTERM stops all"""
+    if not hasattr(os, 'fork') or not os.path.exists('/proc/self/task'):
+        print("SKIP: prefork test needs fork and /proc")
+        return
+
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port), WEB_WORKERS='2', GRACEFUL_TIMEOUT='5',
+               EXTRACTION_SANDBOX='true', SANDBOX_WORKERS='1')
+    master = subprocess.Popen([sys.executable, 'run_prod.py'], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        assert _wait_for(lambda: len(_children(master.pid)) == 2)
+        workers = _children(master.pid)
+        print(f"   Master {master.pid}, workers {workers}")
+
+        def serving():
+            try:
+                return requests.get(f'http://127.0.0.1:{port}/examples', timeout=2).status_code == 200
+            except requests.RequestException:
+                return False
+        assert _wait_for(serving)
+        # Each worker forked its own sandbox before serving, not on its first upload
+        assert all(len(_children(worker)) == 1 for worker in workers)
+        sandboxes = [pid for worker in workers for pid in _children(worker)]
+
+        os.kill(workers[0], signal.SIGKILL)
+        assert _wait_for(lambda: len(_children(master.pid)) == 2 and workers[0] not in _children(master.pid))
+        print(f"   Replaced worker: {_children(master.pid)}")
+        assert serving()
+
+        master.send_signal(signal.SIGTERM)
+        master.wait(15)
+        assert master.returncode == 0
+        # Sandbox workers exit with their web worker, even one that was killed
+        assert _wait_for(lambda: not any(_alive(pid) for pid in sandboxes), timeout=5)
+    finally:
+        if master.poll() is None:
+            master.kill()
+
+def _start_slow_server(tmp_dir):
+    port = _free_port()
+    script = os.path.join(tmp_dir, 'slow_server.py')
+    with open(script, 'w') as f:
+        f.write(SLOW_SERVER.format(path=os.getcwd(), port=port))
+    master = subprocess.Popen([sys.executable, script], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    assert _wait_for(lambda: len(_children(master.pid)) == 2)
+    url = f'http://127.0.0.1:{port}'
+    assert _wait_for(lambda: _get(url) is not None)
+    return master, url
+
+def _get(url, timeout=2):
+    try:
+        return requests.get(url, timeout=timeout, headers={'Connection': 'close'}).text
+    except requests.RequestException:
+        return None
+
+def _slow_request(url, results):
+    thread = threading.Thread(target=lambda: results.append(_get(url + '/slow', timeout=30)))
+    thread.start()
+    time.sleep(1)
+    return thread
+
+def test_graceful_stop_drains_requests():
+    """SIGTERM lets a request longer than waitress's 5s shutdown wait finish"""
+    if not hasattr(os, 'fork') or not os.path.exists('/proc/self/task'):
+        print("SKIP: prefork test needs fork and /proc")
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        master, url = _start_slow_server(tmp_dir)
+        try:
+            results = []
+            thread = _slow_request(url, results)
+            master.send_signal(signal.SIGTERM)
+            thread.join(30)
+            assert results and results[0] is not None and results[0].isdigit()
+            master.wait(15)
+            assert master.returncode == 0
+        finally:
+            if master.poll() is None:
+                master.kill()
+
+def test_rolling_reload():
+    """SIGHUP replaces workers one at a time; requests are served throughout"""
+    if not hasattr(os, 'fork') or not os.path.exists('/proc/self/task'):
+        print("SKIP: prefork test needs fork and /proc")
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        master, url = _start_slow_server(tmp_dir)
+        try:
+            old = set(_children(master.pid))
+            results = []
+            thread = _slow_request(url, results)
+            master.send_signal(signal.SIGHUP)
+            served = []
+            deadline = time.time() + 25
+            while time.time() < deadline and not (old.isdisjoint(_children(master.pid)) and
+                                                   len(_children(master.pid)) == 2):
+                served.append(_get(url))
+                time.sleep(0.2)
+            thread.join(30)
+            print(f"   {len(served)} requests during reload, {served.count(None)} failed")
+            assert None not in served
+            assert results and results[0] in {str(pid) for pid in old}
+            assert old.isdisjoint(_children(master.pid)) and len(_children(master.pid)) == 2
+            assert _get(url) is not None
+        finally:
+            master.send_signal(signal.SIGTERM)
+            try:
+                master.wait(30)
+            except subprocess.TimeoutExpired:
+                master.kill()
+
+if __name__ == "__main__":
+    print("Testing prefork mode...")
+    test_prefork_workers()
+    test_graceful_stop_drains_requests()
+    test_rolling_reload()
+    print("All prefork tests passed")
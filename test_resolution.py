@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test cross-document contact resolution.
+"""
+
+import sys
+import os
+sys.path.append('.')
+
+from app import PDFDataExtractor
+from resolution import ContactResolver, phone_key, name_key
+
+def test_keys():
+    assert phone_key('+1 (555) 123-4567') == phone_key('555.123.4567') == 'p:5551234567'
+    assert phone_key('123-45') is None
+    assert name_key('Carla J. Walker Jr') == name_key('walker carla') == 'n:carla walker'
+
+def test_merge_rules():
+    resolver = ContactResolver()
+    resolver.add_values('resume.pdf', {'names': ['Carla Walker'], 'emails': ['Carla.Walker@Example.com'],
+                                       'phones': ['(555) 123-4567'], 'addresses': ['12 Oak Street, Springfield']})
+    resolver.add_values('card.pdf', {'names': ['Carla J. Walker'], 'emails': ['carla.walker@example.com']})
+    resolver.add_values('form.pdf', {'names': ['C Walker'], 'phones': ['+1-555-123-4567']})
+    resolver.add_values('letter.pdf', {'names': ['Walker Carla'], 'addresses': ['12 Oak St']})
+    # Same name elsewhere is someone else
+    resolver.add_values('other.pdf', {'names': ['Carla Walker'], 'addresses': ['900 Pine Avenue']})
+    # A switchboard number shared by different people merges nobody
+    for name in ('Derek Foster', 'Elena Reyes', 'Frank Price', 'Grace Kim'):
+        resolver.add_values(f'{name}.pdf', {'names': [name], 'phones': ['(555) 010-0000']})
+
+    contacts = resolver.resolve()
+    carla = contacts[0]
+    print(f"   Contacts: {contacts}")
+    assert carla['documents'] == ['resume.pdf', 'card.pdf', 'form.pdf', 'letter.pdf']
+    assert carla['emails'] == ['Carla.Walker@Example.com'] and carla['phones'] == ['(555) 123-4567']
+    assert carla['name'] == 'Carla Walker'
+    assert len(contacts) == 6 and resolver.stats['shared_keys'] == 1
+
+def test_records_from_matches():
+    """Matches are grouped into one record per name on multi-contact documents"""
+    text = ("Alice Walker\nEmail: alice@example.com\nPhone: (555) 200-1000\n\n"
+            "Brian Turner\nEmail: brian@example.com\nPhone: (555) 200-2000\n")
+    results = PDFDataExtractor().extract_results(text)
+    resolver = ContactResolver()
+    resolver.add_document('cards.pdf', results)
+    resolver.add_values('resume.pdf', {'names': ['Brian Turner'], 'phones': ['555.200.2000']})
+    contacts = {contact['name']: contact for contact in resolver.resolve()}
+    assert contacts['Brian Turner']['documents'] == ['cards.pdf', 'resume.pdf']
+    assert contacts['Brian Turner']['emails'] == ['brian@example.com']
+    assert contacts['Alice Walker']['phones'] == ['(555) 200-1000']
+
+if __name__ == "__main__":
+    test_keys()
+    test_merge_rules()
+    test_records_from_matches()
+    print("All contact resolution tests passed")
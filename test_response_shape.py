@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test response shape parameters and compressed responses.
+"""
+
+import sys
+import io
+import gzip
+import json
+import zlib
+import zipfile
+sys.path.append('.')
+
+import app as app_module
+from compression import compress, compress_stream
+
+def upload(client, query='', encoding=None):
+    with open('test_pdfs/sample_resume.pdf', 'rb') as file:
+        return client.post('/upload' + query, data={'file': (file, 'sample_resume.pdf')},
+                           content_type='multipart/form-data',
+                           headers={'Accept-Encoding': encoding} if encoding else {})
+
+def test_text_shape():
+    client = app_module.app.test_client()
+    default = upload(client).get_json()
+    assert len(default['raw_text']) == 503 and default['raw_text'].endswith('...')
+
+    full = upload(client, '?text_limit=0').get_json()
+    assert len(full['raw_text']) > 503 and full['raw_text'].startswith(default['raw_text'][:-3])
+    assert upload(client, '?text_limit=20').get_json()['raw_text'] == full['raw_text'][:20] + '...'
+
+    bare = upload(client, '?include_text=0&fields=emails').get_json()
+    assert 'raw_text' not in bare and list(bare['data']) == ['emails']
+    assert bare['data'] == {'emails': default['data']['emails']}
+
+    for bad in ('-1', 'all'):
+        r = upload(client, f'?text_limit={bad}')
+        assert r.status_code == 400 and 'text_limit' in r.get_json()['error']
+
+def test_negotiated_encoding():
+    client = app_module.app.test_client()
+    identity = upload(client)
+    assert identity.headers.get('Content-Encoding') is None and 'Accept-Encoding' in identity.headers['Vary']
+    expected = identity.get_json()
+    expected.pop('processing_time')
+
+    for accept, encoding, decode in (('gzip, deflate', 'gzip', gzip.decompress),
+                                     ('deflate', 'deflate', zlib.decompress),
+                                     ('gzip;q=0.2, deflate;q=0.8', 'deflate', zlib.decompress)):
+        r = upload(client, encoding=accept)
+        assert r.headers['Content-Encoding'] == encoding
+        assert int(r.headers['Content-Length']) == len(r.data) < len(identity.data)
+        body = json.loads(decode(r.data))
+        body.pop('processing_time')
+        assert body == expected
+    for accept in ('br', 'gzip;q=0, deflate;q=0', 'identity'):
+        assert upload(client, encoding=accept).headers.get('Content-Encoding') is None
+
+    # Small bodies are not worth compressing
+    r = client.get('/metrics', headers={'Accept-Encoding': 'gzip'})
+    assert len(r.data) < app_module.app.config['RESPONSE_COMPRESS_MIN_BYTES']
+    assert r.headers.get('Content-Encoding') is None
+
+def test_streamed_compression():
+    lines = [json.dumps({'line': i, 'pad': 'x' * 200}) + '\n' for i in range(5)]
+    pieces = list(compress_stream(iter(lines), 'gzip'))
+    decompressor = zlib.decompressobj(31)
+    # Every line is decodable as soon as its piece arrives
+    for line, piece in zip(lines, pieces):
+        assert decompressor.decompress(piece).decode() == line
+    assert gzip.decompress(b''.join(pieces)).decode() == ''.join(lines)
+    assert zlib.decompress(compress(b'abc' * 100, 'deflate')) == b'abc' * 100
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.write('test_pdfs/contact_form.pdf', 'contact_form.pdf')
+    client = app_module.app.test_client()
+    r = client.post('/upload/archive?include_text=0', data=buffer.getvalue(), content_type='application/zip',
+                    headers={'Accept-Encoding': 'gzip'})
+    assert r.headers['Content-Encoding'] == 'gzip' and 'Content-Length' not in r.headers
+    results = [json.loads(line) for line in gzip.decompress(r.data).splitlines()]
+    assert results[0]['status'] == 200 and 'raw_text' not in results[0]
+    assert results[-1]['summary']['succeeded'] == 1
+
+if __name__ == "__main__":
+    test_text_shape()
+    test_negotiated_encoding()
+    test_streamed_compression()
+    print("All response shape tests passed")
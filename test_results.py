@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the span-based result model and its provenance output.
+"""
+
+import sys
+import pickle
+sys.path.append('.')
+
+from app import app, PDFDataExtractor
+from prefilter import PageIndex
+from results import ResultSet
+
+def test_result_set():
+    text = "a@b.com\nA@B.com\nc@d.com\n"
+    results = ResultSet(text, ['emails', 'phones'], pages=[(0, 1), (16, 2)])
+    assert results.add('emails', 'a@b.com', 0, 7)
+    assert not results.add('emails', 'a@b.com', 8, 15)
+    assert results.add('emails', 'c@d.com', 16, 23)
+
+    assert len(results) == 3
+    assert results.count('emails') == 2
+    assert results.to_dict() == {'emails': ['a@b.com', 'c@d.com'], 'phones': []}
+    assert results['emails'] == ['a@b.com', 'c@d.com']
+    assert results.to_provenance()['emails'] == [
+        {'value': 'a@b.com', 'occurrences': [{'page': 1, 'start': 0, 'end': 7},
+                                             {'page': 1, 'start': 8, 'end': 15}]},
+        {'value': 'c@d.com', 'occurrences': [{'page': 2, 'start': 16, 'end': 23}]},
+    ]
+
+    copy = pickle.loads(pickle.dumps(results))
+    assert copy.to_provenance() == results.to_provenance()
+
+def test_spans_point_into_text():
+    """Every match span covers the text its value came from"""
+    extractor = PDFDataExtractor()
+    index = PageIndex()
+    text = extractor.extract_text_from_pdf('test_pdfs/business_cards_collection.pdf', page_index=index)
+    results = extractor.extract_results(text, page_index=index)
+
+    assert results.to_dict() == extractor.extract_structured_data(text)
+    for field, value, page, start, end in results.matches():
+        assert page == 1
+        if field == 'emails':
+            assert text[start:end].replace(' ', '').lower() == value
+        else:
+            assert value.split()[0] in text[start:end], (field, value, text[start:end])
+
+def test_upload_provenance():
+    app.config['TESTING'] = True
+    with app.test_client() as client, open('test_pdfs/sample_resume.pdf', 'rb') as f:
+        r = client.post('/upload?provenance=1', data={'file': (f, 'sample_resume.pdf')},
+                        content_type='multipart/form-data')
+
+    data = r.get_json()
+    assert r.status_code == 200
+    emails = [entry['value'] for entry in data['provenance']['emails']]
+    assert emails == data['data']['emails']
+    first = data['provenance']['emails'][0]['occurrences'][0]
+    print(f"First email occurrence: {first}")
+    assert first['page'] == 1 and first['end'] > first['start']
+
+if __name__ == "__main__":
+    test_result_set()
+    test_spans_point_into_text()
+    test_upload_provenance()
+    print("All result model tests passed")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test the extraction sandbox: resource limits, hard kill and worker recycling.
+"""
+
+import sys
+import os
+import time
+sys.path.append('.')
+
+from sandbox import ExtractionSandbox, SandboxError
+
+def _current_vm_mb():
+    """Virtual memory size of this process, which forked workers inherit"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmSize:'):
+                return int(line.split()[1]) // 1024
+    return 512
+
+def _task(kind):
+    if kind == 'sleep':
+        time.sleep(30)
+    elif kind == 'memory':
+        return len(bytearray(8 * 1024 * 1024 * 1024))
+    elif kind == 'crash':
+        os._exit(3)
+    elif kind == 'spin':
+        while True:
+            pass
+    elif kind == 'raise':
+        raise ValueError('bad page tree')
+    return f'done:{os.getpid()}'
+
+def _expect_failure(sandbox, kind, reason):
+    try:
+        sandbox.run(kind)
+    except SandboxError as e:
+        print(f"   {kind}: {e.reason} ({e.detail})")
+        assert e.reason == reason
+        return
+    raise AssertionError(f'{kind} did not fail')
+
+def test_sandbox_failures_and_recycling():
+    """Each failure mode is reported and the pool keeps serving"""
+    if not os.path.exists('/proc/self/status'):
+        print("SKIP: sandbox limits test needs /proc")
+        return
+
+    sandbox = ExtractionSandbox(_task, workers=1, memory_mb=_current_vm_mb() + 256,
+                                cpu_seconds=30, timeout=1)
+    try:
+        first = sandbox.run('ok')
+        assert first.startswith('done:')
+
+        start = time.time()
+        _expect_failure(sandbox, 'sleep', 'timeout')
+        assert time.time() - start < 5
+
+        _expect_failure(sandbox, 'memory', 'memory_limit')
+        _expect_failure(sandbox, 'crash', 'crashed')
+        _expect_failure(sandbox, 'raise', 'exception')
+
+        # Failed workers were replaced, so the pool still answers
+        second = sandbox.run('ok')
+        assert second.startswith('done:')
+        assert second != first
+        print(f"   Stats: {sandbox.stats}")
+        assert sandbox.stats['recycled'] == 3
+        assert sandbox.stats['failures'] == 4
+    finally:
+        sandbox.shutdown()
+
+def test_sandbox_cpu_limit():
+    """A worker that burns its CPU allowance is stopped with SIGXCPU"""
+    sandbox = ExtractionSandbox(_task, workers=1, memory_mb=None, cpu_seconds=1, timeout=10)
+    try:
+        _expect_failure(sandbox, 'spin', 'cpu_limit')
+        assert sandbox.run('ok').startswith('done:')
+    finally:
+        sandbox.shutdown()
+
+def test_start_before_run():
+    """start() forks the whole pool up front and run() reuses it"""
+    sandbox = ExtractionSandbox(_task, workers=2, memory_mb=None, timeout=10)
+    try:
+        sandbox.start()
+        pids = {worker.process.pid for worker in sandbox._all}
+        assert len(pids) == 2
+        results = {sandbox.run('ok') for _ in range(4)}
+        assert {int(result.split(':')[1]) for result in results} <= pids
+        assert sandbox.stats['recycled'] == 0 and len(sandbox._all) == 2
+    finally:
+        sandbox.shutdown()
+
+def test_sandboxed_extraction():
+    """The app's extraction function runs unchanged inside the sandbox"""
+    from app import run_extraction, ExtractionBudget
+
+    sandbox = ExtractionSandbox(run_extraction, workers=1, memory_mb=None, timeout=30)
+    try:
+        text, data, budget = sandbox.run('test_pdfs/sample_resume.pdf', ExtractionBudget())
+        print(f"   Emails: {data['emails']}")
+        assert 'sarah.johnson@email.com' in data['emails']
+        assert budget.last_page == 1
+    finally:
+        sandbox.shutdown()
+
+if __name__ == "__main__":
+    print("Testing extraction sandbox...")
+    test_sandbox_failures_and_recycling()
+    test_sandbox_cpu_limit()
+    test_start_before_run()
+    test_sandboxed_extraction()
+    print("All sandbox tests passed")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test passing text and match spans through shared memory.
+"""
+
+import sys
+import os
+import time
+sys.path.append('.')
+
+from app import PDFDataExtractor
+from results import ResultSet
+from parallel_scan import ParallelScanner
+from sandbox import ExtractionSandbox, SandboxError
+from shm_transport import SHM_DIR, SharedTexts, decode_text, encode_text, pack_result, read_text, unpack_result
+
+def _contacts(count):
+    lines = []
+    for i in range(count):
+        lines += [f"Zoë Walker{'' if i % 2 else ' Jr'}",
+                  f"Email: zoe.{i}@example.com Phone: +1-555-{100 + i:03d}-{1000 + i:04d}",
+                  f"{100 + i} Oak Street, Springfield, IL 62701", ""]
+    return '\n'.join(lines) + '\n'
+
+def _blocks():
+    return set(os.listdir(SHM_DIR)) if os.path.isdir(SHM_DIR) else set()
+
+def test_round_trip():
+    extractor = PDFDataExtractor()
+    before = _blocks()
+    for text in (_contacts(50), _contacts(50).replace('ë', 'e')):
+        results = extractor.extract_results(text)
+        for min_bytes, kind in ((None, 'inline'), (1, 'shared')):
+            packet = pack_result(text, results, min_bytes)
+            assert packet[0] == kind
+            received, received_results = unpack_result(packet, ResultSet)
+            assert received == text
+            assert received_results.to_provenance() == results.to_provenance()
+            assert received_results.to_dict() == results.to_dict()
+    assert _blocks() == before
+
+def test_compact_width():
+    """Text is stored at the narrowest fixed width its characters allow"""
+    text = _contacts(50)
+    packet = pack_result(text, PDFDataExtractor().extract_results(text), 1)
+    received, _ = unpack_result(packet, ResultSet)
+    assert received == text and packet[2] == (len(text), 1)
+    for sample, width in (('Zoë', 1), ('naïve ✓', 2), ('math 𝐀', 4), ('pair \ud835\udc00 apart', 4)):
+        encoded, encoded_width = encode_text(sample)
+        assert encoded_width == width and len(encoded) == len(sample) * width
+        assert decode_text(encoded, width) == sample
+
+def test_lone_surrogates():
+    text = _contacts(5) + 'broken \ud835 glyph\n'
+    results = PDFDataExtractor().extract_results(text)
+    received, _ = unpack_result(pack_result(text, results, 1), ResultSet)
+    assert received == text
+    shared = SharedTexts([text])
+    try:
+        assert read_text(shared.ref(0, 0, len(text))) == text
+    finally:
+        shared.close()
+
+def _handoff_then(kind):
+    text = _contacts(20)
+    packet = pack_result(text, PDFDataExtractor().extract_results(text), 1)
+    assert packet[0] == 'shared'
+    if kind == 'sleep':
+        time.sleep(30)
+    elif kind == 'crash':
+        os._exit(3)
+    return packet
+
+def test_sandbox_unlinks_undelivered_handoffs():
+    """A block handed off by a task that times out or dies is unlinked by the parent"""
+    if not os.path.isdir(SHM_DIR):
+        print("SKIP: needs /dev/shm")
+        return
+    sandbox = ExtractionSandbox(_handoff_then, workers=1, memory_mb=None, timeout=2)
+    before = _blocks()
+    try:
+        for kind, reason in (('sleep', 'timeout'), ('crash', 'crashed')):
+            try:
+                sandbox.run(kind)
+                assert False, f'{kind} did not fail'
+            except SandboxError as e:
+                assert e.reason == reason
+            assert _blocks() == before
+        text, _ = unpack_result(sandbox.run('ok'), ResultSet)
+        assert text == _contacts(20)
+    finally:
+        sandbox.shutdown()
+    assert _blocks() == before
+
+def test_shared_texts():
+    texts = ['plain ascii text', 'naïve café ✓ text']
+    before = _blocks()
+    shared = SharedTexts(texts)
+    try:
+        assert shared.width == 2
+        assert read_text(shared.ref(1, 6, 12)) == texts[1][6:12]
+        assert read_text(shared.ref(0, 0, len(texts[0]))) == texts[0]
+    finally:
+        shared.close()
+    assert _blocks() == before
+
+def test_scanner_over_shared_memory():
+    extractor = PDFDataExtractor()
+    scanner = ParallelScanner(extractor, workers=2, window_chars=97, min_chars=1, shm_min_bytes=1)
+    before = _blocks()
+    try:
+        text = _contacts(30)
+        serial = extractor.extract_results(text)
+        parallel = extractor.extract_results(text, scanner=scanner)
+        assert parallel.to_provenance() == serial.to_provenance()
+        assert scanner.stats['shared'] == scanner.stats['scans'] > 0
+        assert scanner.stats['failures'] == 0
+    finally:
+        scanner.shutdown()
+    assert _blocks() == before
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_compact_width()
+    test_lone_surrogates()
+    test_sandbox_unlinks_undelivered_handoffs()
+    test_shared_texts()
+    test_scanner_over_shared_memory()
+    print("All shared memory transport tests passed")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite document store and the /search endpoint.
+"""
+
+import sys
+import os
+import io
+import tempfile
+sys.path.append('.')
+
+import app as app_module
+from store import DocumentStore, normalize
+from generate_test_pdfs import create_long_document
+
+def test_save_and_search():
+    extractor = app_module.extractor
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = DocumentStore(os.path.join(tmp_dir, 'db', 'documents.db'))
+        path = create_long_document(os.path.join(tmp_dir, 'long.pdf'), pages=6)
+        text, results, _ = app_module.run_extraction(path)
+        document_id = store.save('long.pdf', results, sha256='abc')
+        assert store.save('long.pdf', results, sha256='abc') == document_id
+        assert store.save('long.pdf', results, sha256='abc', partial=True) != document_id
+
+        email = results['emails'][0]
+        found = store.search_entities(email.upper(), ['emails'])
+        assert found and found[0]['value'] == email and found[0]['filename'] == 'long.pdf'
+        assert text[found[0]['start']:found[0]['end']] == email
+        assert found[0]['page'] == results.page_at(found[0]['start'])
+
+        phone = results['phones'][0]
+        digits = normalize('phones', phone)
+        prefix = store.search_entities(f'{digits[:3]}-{digits[3:6]}', ['phones'])
+        assert prefix and all(normalize('phones', entity['value']).startswith(digits[:6]) for entity in prefix)
+
+        pages = store.search_text('GENERAL TERMS')
+        assert pages and {page['page'] for page in pages} == {3, 6}
+        assert '[GENERAL]' in pages[0]['snippet']
+        assert store.search_text('"unbalanced AND (') == []
+        assert store.stats() == {'documents': 2}
+        stored = dict(store.iter_documents())
+        assert sorted(stored) == [1, 2] and sorted(stored[1]) == sorted(results.matches())
+
+def test_search_endpoint():
+    saved_store = app_module.document_store
+    client = app_module.app.test_client()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_module.document_store = DocumentStore(os.path.join(tmp_dir, 'documents.db'))
+        try:
+            path = create_long_document(os.path.join(tmp_dir, 'long.pdf'), pages=3)
+            with open(path, 'rb') as file:
+                content = file.read()
+            r = client.post('/upload', data={'file': (io.BytesIO(content), 'long.pdf')},
+                            content_type='multipart/form-data')
+            data = r.get_json()
+            assert r.status_code == 200 and data['document_id'] == 1
+            r = client.post('/upload?store=0', data={'file': (io.BytesIO(content), 'long.pdf')},
+                            content_type='multipart/form-data')
+            assert 'document_id' not in r.get_json()
+
+            email = data['data']['emails'][0]
+            r = client.get(f'/search?q={email}&field=emails')
+            found = r.get_json()
+            print(f"   Search took {found['took_ms']}ms")
+            assert [entity['value'] for entity in found['entities']] == [email]
+            assert found['pages'][0]['document_id'] == 1
+
+            assert client.get('/search').status_code == 400
+            assert client.get('/search?q=x&field=bogus').status_code == 400
+            app_module.document_store = None
+            assert client.get('/search?q=x').status_code == 404
+        finally:
+            app_module.document_store = saved_store
+
+if __name__ == "__main__":
+    test_save_and_search()
+    test_search_endpoint()
+    print("All document store tests passed")
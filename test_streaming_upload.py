@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test chunked streaming uploads: hashing, header checks, size caps and spooling.
+"""
+
+import sys
+import os
+import io
+import hashlib
+import tempfile
+sys.path.append('.')
+
+from streaming_upload import receive_pdf_stream, UploadTooLarge, InvalidUpload
+
+class CountingStream(io.BytesIO):
+    """BytesIO that records how many bytes were read from it"""
+    bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+def _sample_pdf():
+    with open('test_pdfs/sample_resume.pdf', 'rb') as f:
+        return f.read()
+
+def test_in_memory_and_spooled():
+    """Small bodies stay in memory, larger ones are spooled to disk"""
+    content = _sample_pdf()
+    expected = hashlib.sha256(content).hexdigest()
+
+    upload = receive_pdf_stream(io.BytesIO(content), max_bytes=1024 * 1024,
+                                spool_bytes=1024 * 1024, chunk_size=512)
+    assert not upload.spooled
+    assert upload.sha256 == expected
+    assert upload.source.read() == content
+    upload.close()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        upload = receive_pdf_stream(io.BytesIO(content), max_bytes=1024 * 1024,
+                                    spool_bytes=1000, spool_dir=tmp_dir, chunk_size=512)
+        print(f"   Spooled to {upload.spool_path} ({upload.size} bytes)")
+        assert upload.spooled
+        assert upload.size == len(content)
+        assert upload.sha256 == expected
+        with open(upload.source, 'rb') as f:
+            assert f.read() == content
+        upload.close()
+        assert os.listdir(tmp_dir) == []
+
+def test_rejects_early():
+    """Bad headers and oversized bodies stop the read early"""
+    stream = CountingStream(b'GIF89a' + b'x' * 100000)
+    try:
+        receive_pdf_stream(stream, max_bytes=None, spool_bytes=1024, chunk_size=1024)
+        raise AssertionError('non-PDF body accepted')
+    except InvalidUpload:
+        pass
+    assert stream.bytes_read == 1024
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stream = CountingStream(b'%PDF' + b'x' * 100000)
+        try:
+            receive_pdf_stream(stream, max_bytes=10000, spool_bytes=2048,
+                               spool_dir=tmp_dir, chunk_size=1024)
+            raise AssertionError('oversized body accepted')
+        except UploadTooLarge:
+            pass
+        assert stream.bytes_read <= 11 * 1024
+        assert os.listdir(tmp_dir) == []
+
+    try:
+        receive_pdf_stream(io.BytesIO(b''), max_bytes=None, spool_bytes=1024)
+        raise AssertionError('empty body accepted')
+    except InvalidUpload:
+        pass
+
+def test_stream_endpoint():
+    """/upload/stream extracts a raw PDF body and reports its hash"""
+    from app import app
+    app.config['TESTING'] = True
+    content = _sample_pdf()
+
+    with app.test_client() as client:
+        r = client.post('/upload/stream?filename=resume.pdf', data=content,
+                        content_type='application/pdf')
+        data = r.get_json()
+        print(f"   Status: {r.status_code}, fields: {data.get('total_fields_extracted')}")
+        assert r.status_code == 200
+        assert data['content_sha256'] == hashlib.sha256(content).hexdigest()
+        assert 'sarah.johnson@email.com' in data['data']['emails']
+
+        r = client.post('/upload/stream?filename=fake.pdf', data=b'not a pdf',
+                        content_type='application/pdf')
+        assert r.status_code == 400
+
+def test_size_limit_is_configurable():
+    """Both upload paths answer 413 with JSON above MAX_CONTENT_LENGTH"""
+    from app import app
+    app.config['TESTING'] = True
+    saved = app.config['MAX_CONTENT_LENGTH']
+    app.config['MAX_CONTENT_LENGTH'] = 1024
+
+    try:
+        with app.test_client() as client:
+            r = client.post('/upload/stream?filename=resume.pdf', data=_sample_pdf(),
+                            content_type='application/pdf')
+            assert r.status_code == 413
+            assert 'error' in r.get_json()
+
+            r = client.post('/upload', data={'file': (io.BytesIO(_sample_pdf()), 'resume.pdf')},
+                            content_type='multipart/form-data')
+            assert r.status_code == 413
+            assert 'error' in r.get_json()
+    finally:
+        app.config['MAX_CONTENT_LENGTH'] = saved
+
+if __name__ == "__main__":
+    print("Testing streaming uploads...")
+    test_in_memory_and_spooled()
+    test_rejects_early()
+    test_stream_endpoint()
+    test_size_limit_is_configurable()
+    print("All streaming upload tests passed")
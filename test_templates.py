@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test template fingerprinting and region-restricted extraction.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append('.')
+
+import app as app_module
+from templates import TemplateStore
+from generate_test_pdfs import create_vendor_invoice
+
+def _full(pdf_path):
+    extractor = app_module.extractor
+    return extractor.extract_structured_data(extractor.extract_text_from_pdf(pdf_path))
+
+def test_learn_match_and_fall_back():
+    """A learned layout is extracted from its regions, with full-page fallback"""
+    saved_store = app_module.template_store
+    store = app_module.template_store = TemplateStore()
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            first = create_vendor_invoice(os.path.join(tmp_dir, 'a.pdf'), ('Alice', 'Walker'), 1001)
+            second = create_vendor_invoice(os.path.join(tmp_dir, 'b.pdf'), ('Brian', 'Turner'), 1002)
+            moved = create_vendor_invoice(os.path.join(tmp_dir, 'c.pdf'), ('Carla', 'Nguyen'), 1003,
+                                          email_in_notes=True)
+
+            full_text, results, _ = app_module.run_extraction(first)
+            assert results.to_dict() == _full(first)
+            assert store.metrics() == {'matched': 0, 'learned': 1, 'fallbacks': 0, 'templates': 1}
+
+            # Same layout: only the learned regions are read
+            text, results, _ = app_module.run_extraction(second)
+            print(f"Region text: {len(text)} chars vs {len(full_text)} full page")
+            assert results.to_dict() == _full(second)
+            assert 'payment is due' not in text
+            assert store.metrics()['matched'] == 1
+
+            # The email moved out of its region: fall back to the full page
+            text, results, _ = app_module.run_extraction(moved)
+            print(f"Fallback result: {results.to_dict()}, {store.metrics()}")
+            assert results['emails'] == ['carla.nguyen@example.com']
+            assert store.metrics()['fallbacks'] == 1
+    finally:
+        app_module.template_store = saved_store
+
+def test_different_layouts_do_not_match():
+    store = TemplateStore()
+    extractor = app_module.extractor
+    for pdf_path in ('test_pdfs/sample_resume.pdf', 'test_pdfs/sample_invoice.pdf'):
+        session = store.session()
+        extractor.extract_text_from_pdf(pdf_path, template=session)
+        assert not session.matched
+    assert store.metrics()['matched'] == 0
+
+if __name__ == "__main__":
+    test_learn_match_and_fall_back()
+    test_different_layouts_do_not_match()
+    print("All template tests passed")
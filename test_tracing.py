@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test request ids, nested spans and trace export.
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('.')
+
+import app as app_module
+from tracing import JsonlSink, NOOP_SPAN, RingBufferSink, Tracer, request_id, span
+
+def test_spans_nest_and_export():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        buffer = RingBufferSink(2)
+        tracer = Tracer([buffer, JsonlSink(os.path.join(tmp_dir, 'traces', 'out.jsonl'))])
+        assert span('outside') is NOOP_SPAN
+
+        for trace_id in ('a', 'b', 'c'):
+            trace = tracer.start(trace_id, 'job')
+            with span('outer', size=1) as outer:
+                with span('inner'):
+                    pass
+                outer.set(done=True)
+            try:
+                with span('failing'):
+                    raise ValueError
+            except ValueError:
+                pass
+            exported = tracer.finish(trace, status=200)
+
+        names = [(s['name'], s['parent']) for s in exported['spans']]
+        assert names == [('outer', 0), ('inner', 1), ('failing', 0)]
+        assert exported['spans'][0]['attrs'] == {'size': 1, 'done': True}
+        assert exported['spans'][2]['attrs'] == {'error': 'ValueError'}
+        assert span('after') is NOOP_SPAN
+
+        assert [t['trace_id'] for t in buffer.query()] == ['c', 'b']
+        assert buffer.query(trace_id='b')[0]['attrs'] == {'status': 200}
+        with open(os.path.join(tmp_dir, 'traces', 'out.jsonl')) as file:
+            assert [json.loads(line)['trace_id'] for line in file] == ['a', 'b', 'c']
+
+        trace = tracer.start('d', 'job')
+        trace.pid = -1  # as seen from a forked worker
+        assert span('in_worker') is NOOP_SPAN
+        tracer.finish(trace)
+
+def test_sampling():
+    tracer = Tracer([RingBufferSink()], sample_rate=0)
+    assert tracer.start('a', 'job') is None and span('x') is NOOP_SPAN
+    assert tracer.stats['unsampled'] == 1
+    assert request_id('ok-id_1.2') == 'ok-id_1.2'
+    assert request_id('bad id\n') != 'bad id\n' and len(request_id()) == 32
+
+def test_upload_trace():
+    client = app_module.app.test_client()
+    with open('test_pdfs/contact_form.pdf', 'rb') as file:
+        r = client.post('/upload', data={'file': (file, 'contact_form.pdf')},
+                        headers={'X-Request-ID': 'trace-test-1'})
+    assert r.status_code == 200 and r.headers['X-Request-ID'] == 'trace-test-1'
+    assert client.get('/metrics').headers['X-Request-ID']
+
+    trace = client.get('/traces?trace_id=trace-test-1').get_json()['traces'][0]
+    spans = {s['name']: s for s in trace['spans']}
+    print(f"   Spans: {[(s['name'], s['duration_us']) for s in trace['spans']]}")
+    assert trace['name'] == 'POST /upload' and trace['attrs']['status'] == 200
+    for name in ('upload.receive', 'upload.save', 'extract', 'serialize'):
+        assert name in spans, name
+    if app_module.sandbox:
+        # Pages and fields are read in the sandbox worker, under the 'extract' span
+        return
+    by_id = {s['id']: s for s in trace['spans']}
+    assert by_id[spans['pdf.page']['parent']]['name'] == 'extract.text'
+    assert {s['attrs']['field'] for s in trace['spans'] if s['name'] == 'field'} == set(app_module.extractor.FIELDS)
+    assert client.get('/traces?min_ms=x').status_code == 400
+
+if __name__ == "__main__":
+    test_spans_nest_and_export()
+    test_sampling()
+    test_upload_trace()
+    print("All tracing tests passed")
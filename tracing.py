@@ -0,0 +1,204 @@
+"""
+Lightweight request tracing with nested spans and local export.
+
+Every request gets a request id, taken from a well-formed X-Request-ID
+header or generated, and echoed on the response. A sampled request also
+opens a trace: the code it runs records nested spans (upload receive and
+save, PDF open, each page, each field scan, serialization) with their
+start offset and duration in microseconds and a few attributes. When the request ends, the
+whole trace is written at once, as one JSON line, to an in-memory ring
+buffer that /traces queries and optionally appended to a JSONL file.
+
+The current trace and span live in context variables, so each request
+thread sees only its own. Outside a sampled trace `span()` returns a
+shared no-op after one context variable lookup, which keeps tracing cheap
+enough to leave on (see bench_tracing.py). Work done in other processes,
+such as sandbox and parallel scan workers, shows up as the span that waits
+for it; workers forked mid-request do not record into the inherited trace.
+"""
+
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+
+REQUEST_ID_PATTERN = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+_current = ContextVar('trace_span', default=None)
+
+def request_id(header=None):
+    """The caller's request id if it is well formed, else a new one"""
+    if header and REQUEST_ID_PATTERN.fullmatch(header):
+        return header
+    return uuid.uuid4().hex
+
+class _NoopSpan:
+    """Stands in for a span when the request is not traced"""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'start', 'end', 'attrs', '_token')
+
+    def __init__(self, trace, span_id, parent_id, name, attrs):
+        self.trace = trace
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = self.end = None
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter_ns()
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.trace.spans.append(self)
+        return False
+
+    def to_dict(self, origin):
+        return {'id': self.span_id, 'parent': self.parent_id, 'name': self.name,
+                'start_us': (self.start - origin) // 1000, 'duration_us': (self.end - self.start) // 1000,
+                'attrs': self.attrs}
+
+class Trace:
+    """Spans of one request; the root span covers the whole request"""
+
+    def __init__(self, trace_id, name, attrs):
+        self.trace_id = trace_id
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self.spans = []
+        # next() on a count is atomic, so threads working for one request can share it
+        self.ids = itertools.count(1)
+        self.root = Span(self, 0, None, name, attrs)
+
+    def to_dict(self):
+        origin = self.root.start
+        spans = sorted(self.spans, key=lambda span: span.start)
+        return {'trace_id': self.trace_id, 'name': self.root.name, 'started_at': self.started_at,
+                'duration_ms': round((self.root.end - origin) / 1e6, 3), 'attrs': self.root.attrs,
+                'spans': [span.to_dict(origin) for span in spans if span is not self.root]}
+
+class RingBufferSink:
+    """The most recent traces, newest first on query"""
+
+    def __init__(self, size=500):
+        self.traces = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def write(self, trace):
+        with self.lock:
+            self.traces.append(trace)
+
+    def query(self, limit=20, name=None, min_duration_ms=None, trace_id=None):
+        with self.lock:
+            traces = list(self.traces)
+        found = []
+        for trace in reversed(traces):
+            if trace_id is not None and trace['trace_id'] != trace_id:
+                continue
+            if name is not None and trace['name'] != name:
+                continue
+            if min_duration_ms is not None and trace['duration_ms'] < min_duration_ms:
+                continue
+            found.append(trace)
+            if len(found) >= limit:
+                break
+        return found
+
+class JsonlSink:
+    """Appends one JSON line per trace; safe to share between prefork workers"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+
+    def write(self, trace):
+        line = (json.dumps(trace, separators=(',', ':'), default=str) + '\n').encode()
+        # A single O_APPEND write keeps lines from concurrent writers whole
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+class Tracer:
+    """Starts sampled traces and records spans into the active one"""
+
+    def __init__(self, sinks=(), sample_rate=1.0):
+        self.sinks = list(sinks)
+        self.sample_rate = sample_rate
+        self.stats = {'sampled': 0, 'unsampled': 0, 'spans': 0, 'export_errors': 0}
+        self.lock = threading.Lock()
+
+    def sampled(self):
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def start(self, trace_id, name, **attrs):
+        """Open a trace for the current context; returns it, or None when not sampled"""
+        if not self.sinks or not self.sampled():
+            with self.lock:
+                self.stats['unsampled'] += 1
+            return None
+        trace = Trace(trace_id, name, attrs)
+        trace.root.__enter__()
+        return trace
+
+    def finish(self, trace, **attrs):
+        """Close a trace opened by start() in this context and export it"""
+        trace.root.attrs.update(attrs)
+        trace.root.__exit__(None, None, None)
+        exported = trace.to_dict()
+        errors = 0
+        for sink in self.sinks:
+            try:
+                sink.write(exported)
+            except OSError:
+                errors += 1
+        with self.lock:
+            self.stats['sampled'] += 1
+            self.stats['spans'] += len(exported['spans'])
+            self.stats['export_errors'] += errors
+        return exported
+
+def span(name, **attrs):
+    """Context manager for a child of the current span; a no-op outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    trace = parent.trace
+    if trace.pid != os.getpid():
+        # A worker forked during a traced request; its trace is never exported
+        return NOOP_SPAN
+    span_id = next(trace.ids)
+    return Span(trace, span_id, parent.span_id, name, attrs)
+
+def current_span():
+    """The innermost open span, or the no-op span outside a trace"""
+    return _current.get() or NOOP_SPAN